@@ -0,0 +1,76 @@
+"""Microbenchmark: string patterns through the `re` cache vs precompiled ones.
+
+Runs the regex work of converting one note both ways and prints the time per
+note. The "evicted" column purges the `re` cache before every note, which is
+what happens once other code has used more than `re._MAXCACHE` patterns.
+
+Usage: python benchmarks/bench_patterns.py [--notes N] [--repeat R]
+"""
+
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from obsidian_se_hugo import constants  # noqa: E402
+
+NOTE = (
+    "Intro [[Some Note]] and [[Other Note#Header|alias]] with `inline [[code]]`.\n\n"
+    "![Video](https://youtu.be/abc123)\n\n$$a \\\\ b \\$ c$$\n\n"
+    "```python\nx = '[[not a link]]'\n```\n\n#### Code\n\n```java\nclass A {}\n```\n\n"
+    "## Solution\n\ntext [[Third Note]]\n"
+) * 20
+
+STRING_PATTERNS = [
+    (name, pattern.pattern, pattern.flags)
+    for name, pattern in vars(constants).items()
+    if isinstance(pattern, re.Pattern)
+]
+COMPILED_PATTERNS = [getattr(constants, name) for name, _, _ in STRING_PATTERNS]
+
+
+def with_strings() -> None:
+    for _, pattern, flags in STRING_PATTERNS:
+        for _ in re.finditer(pattern, NOTE, flags):
+            pass
+        re.sub(pattern, "", NOTE, flags=flags)
+
+
+def with_compiled() -> None:
+    for pattern in COMPILED_PATTERNS:
+        for _ in pattern.finditer(NOTE):
+            pass
+        pattern.sub("", NOTE)
+
+
+def with_strings_evicted() -> None:
+    re.purge()
+    with_strings()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=200, help="notes converted per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="measurements, the best one is reported")
+    args = parser.parse_args()
+
+    results = {}
+    for label, func in [
+        ("strings (re cache)", with_strings),
+        ("strings (evicted)", with_strings_evicted),
+        ("precompiled", with_compiled),
+    ]:
+        best = min(timeit.repeat(func, number=args.notes, repeat=args.repeat))
+        results[label] = best / args.notes * 1e6
+        print(f"{label:>20}: {results[label]:9.1f} us/note")
+
+    for label in ("strings (re cache)", "strings (evicted)"):
+        saved = results[label] - results["precompiled"]
+        print(f"saved vs {label}: {saved:.1f} us/note")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Benchmarks the export pipeline on synthetic vaults and compares runs.
+
+For every vault size the stages are timed on their own (link extraction,
+link rewriting, front matter conversion and the BFS over the vault), then
+`hmain.main` runs end to end, once as a full export and once as a no-op
+incremental export. The best of --repeat measurements is reported.
+
+Results are stored as JSON, by default under benchmarks/results/ named after
+the current commit, and --compare prints the change against an earlier file.
+
+Usage: python benchmarks/bench_pipeline.py [--notes 1000 10000 50000]
+           [--results PATH] [--compare PATH] [--threshold 0.1]
+"""
+
+import argparse
+import contextlib
+import copy
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import hmain  # noqa: E402
+from obsidian_se_hugo.graph_util import grow_publish_list  # noqa: E402
+from obsidian_se_hugo.hugo_util import (  # noqa: E402
+    change_front_matter,
+    replace_wikilinks_with_markdown_links,
+)
+from obsidian_se_hugo.link_resolver import LinkResolver  # noqa: E402
+from obsidian_se_hugo.markdown_util import extract_wiki_links  # noqa: E402
+from obsidian_se_hugo.vault_index import VaultIndex  # noqa: E402
+from obsidian_se_hugo.vault_scanner import scan_vault  # noqa: E402
+from vault_generator import VaultSpec, generate_vault  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def best_of(func, repeat: int) -> float:
+    """Returns the fastest of `repeat` runs of `func`, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+@contextlib.contextmanager
+def working_directory(path: str):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def bench_vault(workdir: str, repeat: int) -> dict[str, float]:
+    vault = os.path.join(workdir, "vault")
+    scan = scan_vault(vault)
+    name_map = scan.file_name_to_path_dict
+    vault_index = VaultIndex.from_files(scan.markdown_files)
+    texts = []
+    for file_path in scan.markdown_files:
+        with open(file_path, encoding="utf-8") as f:
+            texts.append(f.read())
+    published = vault_index.explicit_publish_list()
+    alt_dict = vault_index.alternate_link_dict()
+    posts = [
+        (file_path, vault_index.load_post(file_path))
+        for file_path in published
+        if vault_index.get(file_path).title
+    ]
+
+    def rewrite_links():
+        # a fresh resolver per run, so its memo does not carry over
+        resolver = LinkResolver(name_map, alt_dict, vault_index)
+        for file_path, post in posts:
+            replace_wikilinks_with_markdown_links(
+                post.content, alt_dict, file_path, name_map, vault_index, link_resolver=resolver
+            )
+
+    def convert_front_matter():
+        for file_path, post in posts:
+            post = copy.copy(post)
+            post.metadata = copy.deepcopy(post.metadata)
+            change_front_matter(post, set(), file_path, name_map, vault_index)
+
+    results = {
+        "extract_wiki_links": best_of(lambda: [extract_wiki_links(t) for t in texts], repeat),
+        "replace_wikilinks_with_markdown_links": best_of(rewrite_links, repeat),
+        "change_front_matter": best_of(convert_front_matter, repeat),
+        "bfs": best_of(lambda: grow_publish_list(published, name_map, vault_index), repeat),
+    }
+
+    with working_directory(workdir):
+        started = time.perf_counter()
+        hmain.main([])
+        results["hmain_full"] = time.perf_counter() - started
+        results["hmain_noop_incremental"] = best_of(
+            lambda: hmain.main(["--incremental"]), repeat
+        )
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=SRC,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(previous: dict, current: dict, threshold: float) -> int:
+    """Prints the relative change per benchmark, returns the number of regressions."""
+    regressions = 0
+    for size, benchmarks in current["results"].items():
+        for name, seconds in benchmarks.items():
+            before = previous["results"].get(size, {}).get(name)
+            if not before:
+                continue
+            change = seconds / before - 1
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"{size:>6} {name:>40}: {before:9.4f}s -> {seconds:9.4f}s {change:+7.1%}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--links-per-note", type=float, default=VaultSpec.links_per_note)
+    parser.add_argument("--code-share", type=float, default=VaultSpec.code_share)
+    parser.add_argument("--latex-share", type=float, default=VaultSpec.latex_share)
+    parser.add_argument("--assets", type=int, default=VaultSpec.assets)
+    parser.add_argument("--section-skew", type=float, default=VaultSpec.section_skew)
+    parser.add_argument("--repeat", type=int, default=3, help="measurements, the best one is kept")
+    parser.add_argument("--results", help="where to store the results (default: results/<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="slowdown reported as a regression (default: 10%%)"
+    )
+    args = parser.parse_args()
+    # hmain still writes its log file, but nothing reaches the console
+    logging.basicConfig(handlers=[logging.NullHandler()])
+
+    commit = git_commit()
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": vars(args),
+        "results": {},
+    }
+    for notes in args.notes:
+        spec = VaultSpec(
+            notes=notes,
+            links_per_note=args.links_per_note,
+            code_share=args.code_share,
+            latex_share=args.latex_share,
+            assets=args.assets,
+            section_skew=args.section_skew,
+        )
+        with tempfile.TemporaryDirectory(prefix="obsidian-se-hugo-bench-") as workdir:
+            generate_vault(workdir, spec)
+            results = bench_vault(workdir, args.repeat)
+        report["results"][str(notes)] = results
+        for name, seconds in results.items():
+            print(f"{notes:>6} {name:>40}: {seconds:9.4f}s")
+
+    results_path = Path(args.results) if args.results else RESULTS_DIR / f"{commit}.json"
+    results_path.parent.mkdir(parents=True, exist_ok=True)
+    results_path.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {results_path}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text())
+        regressions = compare(previous, report, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Generates synthetic Obsidian vaults, with a Hugo site and config, for benchmarks.
+
+The vault looks like a real one to the exporter: published notes spread over
+hugo sections, wiki links between them (to headers and with aliases), code
+blocks with links that must stay untouched, LaTeX, YouTube embeds, code tabs,
+related problems, alternate-link notes and image/gif/excalidraw assets.
+
+Usage: python benchmarks/vault_generator.py DESTINATION [--notes N] [...]
+"""
+
+import argparse
+import os
+import random
+import shutil
+from dataclasses import dataclass, field
+
+DEFAULT_SECTIONS = (
+    "cs/algorithms",
+    "cs/algorithms/graph",
+    "cs/problems/algorithms",
+    "cs/problems/database",
+    "cs/ood",
+    "maths/statistics",
+)
+
+
+@dataclass
+class VaultSpec:
+    """Shape of a generated vault.
+
+    `links_per_note` is the average number of wiki links in a note body,
+    `code_share` and `latex_share` are the fraction of notes with code blocks
+    (and code tabs) and with LaTeX. `section_skew` spreads notes over the
+    sections with weights 1/rank**skew, 0 spreads them evenly.
+    """
+
+    notes: int = 1000
+    links_per_note: float = 8.0
+    code_share: float = 0.5
+    latex_share: float = 0.2
+    assets: int = 50
+    sections: tuple[str, ...] = DEFAULT_SECTIONS
+    section_skew: float = 1.0
+    published_share: float = 0.8
+    alternate_link_share: float = 0.02
+    paragraphs: int = 6
+    seed: int = 0
+
+
+@dataclass
+class _Vault:
+    """Decisions shared by all notes of a vault being generated."""
+
+    spec: VaultSpec
+    sections: list[str]
+    statuses: list[str]
+    # notes that may be linked to, the exporter rejects links to private notes
+    linkable: list[int] = field(default_factory=list)
+    published: list[int] = field(default_factory=list)
+    asset_names: list[str] = field(default_factory=list)
+
+
+def note_name(index: int) -> str:
+    return f"Note {index:06d}"
+
+
+def _asset_names(count: int) -> list[str]:
+    names = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            names.append(f"drawing {i}.excalidraw")
+        elif kind == 1:
+            names.append(f"animation {i}.gif")
+        else:
+            names.append(f"figure {i}.png")
+    return names
+
+
+def _link(rng: random.Random, vault: _Vault) -> str:
+    roll = rng.random()
+    if vault.asset_names and roll < 0.05:
+        return f"[[{rng.choice(vault.asset_names)}]]"
+    target = note_name(rng.choice(vault.linkable))
+    if roll < 0.15:
+        return f"[[{target}#Section {rng.randrange(3)}]]"
+    if roll < 0.3:
+        return f"[[{target}|alias {rng.randrange(100)}]]"
+    if roll < 0.33:
+        return "[[#Section 1]]"
+    return f"[[{target}]]"
+
+
+def _paragraph(rng: random.Random, vault: _Vault, links: int) -> str:
+    words = [f"word{rng.randrange(1000)}" for _ in range(40)]
+    for _ in range(links):
+        words.insert(rng.randrange(len(words) + 1), _link(rng, vault))
+    if rng.random() < 0.3:
+        words.insert(rng.randrange(len(words) + 1), "`inline [[Not A Link]] code`")
+    return " ".join(words)
+
+
+def _note_text(index: int, rng: random.Random, vault: _Vault) -> str:
+    spec = vault.spec
+    section = vault.sections[index]
+    status = vault.statuses[index]
+    lines = ["---", f"title: {note_name(index)}"]
+    if status == "alternate":
+        lines.append(f"alternate_link: https://example.com/{index}")
+    else:
+        lines.append(f"hugo_section: {section}")
+        if status == "published":
+            lines.append("published: true")
+    lines += [
+        f"date_created: 2024-01-{1 + index % 28:02d} 10:00",
+        f"date_modified: 2024-02-{1 + index % 28:02d} 11:00",
+        f"topic: {rng.choice(['database', 'graphs', 'maths'])}",
+        "aliases:",
+        f"  - Alias Of {index}",
+        "tags: [benchmark]",
+    ]
+    if section.startswith("cs/problems"):
+        lines.append("related_problems:")
+        for _ in range(2):
+            lines.append(f'  - "[[{note_name(rng.choice(vault.published))}]]"')
+    lines += ["---", "", f"# {note_name(index)}", ""]
+
+    # poisson-ish spread of the links over the paragraphs
+    links = [0] * spec.paragraphs
+    for _ in range(round(rng.expovariate(1 / spec.links_per_note)) if spec.links_per_note else 0):
+        links[rng.randrange(spec.paragraphs)] += 1
+
+    for paragraph in range(spec.paragraphs):
+        lines += [f"## Section {paragraph}", "", _paragraph(rng, vault, links[paragraph]), ""]
+        if paragraph == 1 and rng.random() < 0.1:
+            lines += [f"![Video](https://youtu.be/v{index}x{paragraph})", ""]
+    if rng.random() < spec.latex_share:
+        lines += ["$$", "a \\\\ b \\$ c \\# \\cellcolor{YellowOrange} x", "$$", ""]
+    if rng.random() < spec.code_share:
+        lines += [
+            "```python",
+            'x = "[[Inside Code]]"',
+            "## not a heading",
+            "```",
+            "",
+            "## Solution",
+            "",
+            "#### Code",
+            "",
+            "```java",
+            "class A {}",
+            "```",
+            "",
+            "```python",
+            "pass",
+            "```",
+            "",
+            "#### Complexity",
+            "",
+            "- O(n)",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def _plan(rng: random.Random, spec: VaultSpec) -> _Vault:
+    weights = [1 / (rank**spec.section_skew) for rank in range(1, len(spec.sections) + 1)]
+    sections = rng.choices(spec.sections, weights=weights, k=spec.notes)
+    statuses = []
+    for index in range(spec.notes):
+        roll = rng.random()
+        if index == 0 or roll < spec.published_share:
+            # the first note is published, so that the export is never empty
+            statuses.append("published")
+        elif roll < spec.published_share + spec.alternate_link_share:
+            statuses.append("alternate")
+        else:
+            statuses.append("private")
+    return _Vault(
+        spec=spec,
+        sections=sections,
+        statuses=statuses,
+        linkable=[i for i, status in enumerate(statuses) if status != "private"],
+        published=[i for i, status in enumerate(statuses) if status == "published"],
+        asset_names=_asset_names(spec.assets),
+    )
+
+
+def generate_vault(destination: str, spec: VaultSpec) -> str:
+    """Writes a vault, a Hugo site and `conf/hconfig.yaml` under `destination`.
+
+    Returns:
+        The destination, which can be used as working directory for `hmain`.
+    """
+    rng = random.Random(spec.seed)
+    shutil.rmtree(destination, ignore_errors=True)
+    vault = os.path.join(destination, "vault")
+    site = os.path.join(destination, "site")
+    for directory in ("attachments", *spec.sections):
+        os.makedirs(os.path.join(vault, directory), exist_ok=True)
+    os.makedirs(os.path.join(site, "content"))
+    os.makedirs(os.path.join(site, "manual-content", "cs"))
+    os.makedirs(os.path.join(destination, "conf"))
+    os.makedirs(os.path.join(destination, "logs"))
+    with open(os.path.join(site, "manual-content", "cs", "_index.md"), "w") as f:
+        f.write("---\ntitle: CS\n---\n")
+
+    plan = _plan(rng, spec)
+    for name in plan.asset_names:
+        if name.endswith(".excalidraw"):
+            with open(os.path.join(vault, "attachments", name + ".md"), "w") as f:
+                f.write('---\nexcalidraw-plugin: parsed\n---\n```json\n{"type": "excalidraw"}\n```\n')
+        else:
+            with open(os.path.join(vault, "attachments", name), "wb") as f:
+                f.write(rng.randbytes(4096))
+
+    for index, section in enumerate(plan.sections):
+        with open(os.path.join(vault, section, note_name(index) + ".md"), "w") as f:
+            f.write(_note_text(index, rng, plan))
+
+    posts_dir_list = sorted({*spec.sections, "cs/problems"})
+    with open(os.path.join(destination, "conf", "hconfig.yaml"), "w") as f:
+        f.write(
+            "obsidian:\n"
+            f'  root_path: "{vault}"\n'
+            "hugo:\n"
+            f'  root_path: "{site}"\n'
+            '  content_dir: "content"\n'
+            '  manual_content_dir: "manual-content"\n'
+            '  posts_dir: ""\n'
+            f"  posts_dir_list: {posts_dir_list}\n"
+            '  images_dir: "assets/images/obsidian"\n'
+            '  content_images_dir: "assets/images/content"\n'
+            "  allowed_frontmatter_keys: []\n"
+        )
+    return destination
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("destination")
+    parser.add_argument("--notes", type=int, default=VaultSpec.notes)
+    parser.add_argument("--links-per-note", type=float, default=VaultSpec.links_per_note)
+    parser.add_argument("--code-share", type=float, default=VaultSpec.code_share)
+    parser.add_argument("--latex-share", type=float, default=VaultSpec.latex_share)
+    parser.add_argument("--assets", type=int, default=VaultSpec.assets)
+    parser.add_argument("--section-skew", type=float, default=VaultSpec.section_skew)
+    parser.add_argument("--seed", type=int, default=VaultSpec.seed)
+    args = parser.parse_args()
+    generate_vault(
+        args.destination,
+        VaultSpec(
+            notes=args.notes,
+            links_per_note=args.links_per_note,
+            code_share=args.code_share,
+            latex_share=args.latex_share,
+            assets=args.assets,
+            section_skew=args.section_skew,
+            seed=args.seed,
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from obsidian_se_hugo.cli import main
+
+main()
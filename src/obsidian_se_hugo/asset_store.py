@@ -0,0 +1,28 @@
+import os
+from collections.abc import Callable
+
+
+def find_duplicate_assets(
+    asset_destinations: dict[str, tuple[str, str]],
+    content_hash: Callable[[str], str],
+) -> dict[str, str]:
+    """Maps every asset holding the same content as another asset to the asset served instead.
+
+    Assets are grouped by destination directory and content hash, and each
+    group is stored once, under the first asset name in sort order, so a
+    vault without duplicates keeps its URLs. The other names of a group are
+    never copied, links to them point at the stored copy.
+
+    Args:
+        asset_destinations: See `file_util.get_asset_destinations`.
+        content_hash: Returns the sha256 of a source file.
+    """
+    stored: dict[tuple[str, str], str] = {}
+    aliases = {}
+    for asset_filename in sorted(asset_destinations):
+        source_path, destination_path = asset_destinations[asset_filename]
+        key = (os.path.dirname(destination_path), content_hash(source_path))
+        stored_filename = stored.setdefault(key, asset_filename)
+        if stored_filename != asset_filename:
+            aliases[asset_filename] = stored_filename
+    return aliases
@@ -0,0 +1,375 @@
+"""Command line of the exporter, installed as `obsidian-se-hugo`.
+
+Only what the no-op check needs is imported up front, the conversion
+modules are loaded once there is something to export.
+"""
+
+import argparse
+import cProfile
+import os
+import logging
+import sys
+from dataclasses import asdict
+from obsidian_se_hugo.config import load_config, Config
+from obsidian_se_hugo.image_optimizer import image_optimization_settings
+from obsidian_se_hugo.manifest import (
+    MANIFEST_FILE_NAME,
+    Manifest,
+    file_states,
+    hash_states,
+    hash_settings,
+    prune_unlisted_outputs,
+)
+from obsidian_se_hugo.metrics import metrics
+from obsidian_se_hugo.vault_scanner import scan_vault
+from obsidian_se_hugo.file_util import (
+    COMPARE_HASH,
+    COMPARE_STAT,
+    LINK_MODE_COPY,
+    LINK_MODES,
+    MergeConflictError,
+    create_directory_if_not_exists,
+    get_dir_path_or_exit,
+    list_files,
+    merge_folders,
+)
+
+DEFAULT_CONFIG_PATH = os.path.join("conf", "hconfig.yaml")
+# where the caches are kept unless their options say otherwise, see
+# parse_cache.DEFAULT_PARSE_CACHE_PATH and link_graph.DEFAULT_LINK_GRAPH_PATH
+DEFAULT_CACHE_DIR = os.path.join(".cache", "obsidian-se-hugo")
+
+
+def configure_logging(log_level=logging.DEBUG):
+    """Configures logging with a specified log level.
+
+    Args:
+        log_level (int, optional): The logging level. Defaults to logging.INFO.
+    """
+    logger = logging.getLogger(__name__)
+    logger.setLevel(log_level)
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    handler = logging.FileHandler(
+        "logs/hierarchial-main.log", mode="a", encoding="utf-8"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+    return logger
+
+
+def parse_args(args=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="obsidian-se-hugo",
+        description="Export published Obsidian notes into a Hugo site."
+    )
+    parser.add_argument(
+        "--config",
+        default=DEFAULT_CONFIG_PATH,
+        metavar="PATH",
+        help="configuration file (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only reconvert notes whose source or link targets changed since the last export, "
+        "exit right away when no input file changed",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="export into staging copies of the output directories, made of hardlinks, "
+        "and swap them into place at the end, the site is left as it was on any failure",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="number of processes used to convert notes, and of threads used to parse them (default: 1)",
+    )
+    parser.add_argument(
+        "--asset-link-mode",
+        choices=LINK_MODES,
+        default=LINK_MODE_COPY,
+        help="how assets are placed into the Hugo site, links fall back to copies across filesystems",
+    )
+    parser.add_argument(
+        "--manual-link-mode",
+        choices=LINK_MODES,
+        default=LINK_MODE_COPY,
+        help="how manual content is placed into the Hugo site, with hardlinks a tool "
+        "editing a merged file in place edits the manual file too (default: copy)",
+    )
+    parser.add_argument(
+        "--asset-compare",
+        choices=(COMPARE_STAT, COMPARE_HASH),
+        default=COMPARE_STAT,
+        help="how already copied assets are recognised (default: size and mtime)",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        metavar="PATH",
+        help=f"SQLite file keeping parsed notes between runs (default: in {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help="parse every note, without reading or writing the parse cache",
+    )
+    parser.add_argument(
+        "--link-graph",
+        metavar="PATH",
+        help="where to save the link graph of the vault, incremental runs update the saved "
+        f"graph (default: in {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="write stage timings, counters and the slowest notes as JSON",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="run under cProfile and dump the stats, e.g. for snakeviz or pstats",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after the export, keep running and export every change of the vault",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        metavar="SECONDS",
+        help="how often --watch scans the vault when watchdog is not installed (default: 0.5)",
+    )
+    parsed = parser.parse_args(args)
+    if parsed.staged and parsed.watch:
+        parser.error("--staged cannot be combined with --watch")
+    return parsed
+
+
+def main(args=None):
+    args = parse_args(args)
+    if not args.profile:
+        return run(args)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(run, args)
+    finally:
+        profiler.dump_stats(args.profile)
+
+
+def run(args: argparse.Namespace):
+    metrics.reset()
+    logger = configure_logging()
+
+    with metrics.stage("config"):
+        config: Config = load_config(args.config, logger=logger)
+
+    logger.info("Successfully loaded configuration")
+
+    obsidian_vault_path = get_dir_path_or_exit(config.obsidian.root_path, logger=logger)
+
+    hugo_site_path = get_dir_path_or_exit(config.hugo.root_path, logger=logger)
+
+    logger.info(f"ORIGIN: {obsidian_vault_path}, DESTINATION: {hugo_site_path}")
+
+    manifest_path = os.path.join(config.hugo.root_path, MANIFEST_FILE_NAME)
+    manifest = Manifest(
+        hash_settings(
+            config.hugo.allowed_frontmatter_keys,
+            config.hugo.posts_dir_list,
+            config.hugo.excalidraw_export_command,
+            image_optimization_settings(config.hugo.image_optimization),
+            None if config.hugo.transforms is None else [asdict(rule) for rule in config.hugo.transforms],
+            config.hugo.topic_categories,
+            config.hugo.flattened_sections,
+        )
+    )
+    # a full export reads it as well, to remove manual files deleted since
+    saved_manifest = Manifest.load(manifest_path)
+    previous_manifest = saved_manifest if args.incremental else None
+    if args.incremental and previous_manifest is None:
+        logger.info("No usable manifest found, running a full export")
+
+    hugo_manual_content_path = os.path.join(
+        config.hugo.root_path, config.hugo.manual_content_dir
+    )
+    with metrics.stage("scan"):
+        vault_scan = scan_vault(obsidian_vault_path, config.obsidian.ignore)
+        input_files = [args.config, *vault_scan.files]
+        if os.path.isdir(hugo_manual_content_path):
+            input_files.extend(scan_vault(hugo_manual_content_path, ignore=()).files)
+        input_states = file_states(input_files)
+        manifest.inputs = hash_states(input_states)
+    if not args.watch and manifest.nothing_changed(previous_manifest):
+        logger.info("Nothing changed since the last export")
+        if args.report:
+            metrics.save_report(args.report)
+        return
+
+    # imported here, they load the markdown and YAML parsers which a run
+    # without changes never needs
+    from obsidian_se_hugo.exporter import export_notes
+    from obsidian_se_hugo.link_graph import DEFAULT_LINK_GRAPH_PATH, LinkGraph
+    from obsidian_se_hugo.parse_cache import DEFAULT_PARSE_CACHE_PATH, ParseCache
+    from obsidian_se_hugo.publish import (
+        discard_staging,
+        output_directories,
+        prepare_staging,
+        publish_staging,
+        staged_config,
+    )
+    from obsidian_se_hugo.vault_index import VaultIndex
+
+    link_graph_path = args.link_graph or DEFAULT_LINK_GRAPH_PATH
+
+    # A staged export writes into hardlinked copies of its directories and
+    # moves them into place at the end, the live site does not change before.
+    staged = {}
+    output_config = config
+    if args.staged:
+        with metrics.stage("stage"):
+            staged = prepare_staging(output_directories(config), logger=logger)
+        output_config = staged_config(config, staged)
+        if saved_manifest is not None:
+            saved_manifest.relocate(staged)
+    try:
+        hugo_content_path = os.path.join(
+            output_config.hugo.root_path, output_config.hugo.content_dir
+        )
+        images_destination_dir = os.path.join(
+            output_config.hugo.root_path, output_config.hugo.images_dir
+        )
+        images_content_destination_dir = os.path.join(
+            output_config.hugo.root_path, output_config.hugo.content_images_dir
+        )
+
+        posts_destination_dirs = [
+            os.path.join(hugo_content_path, posts_dir) for posts_dir in config.hugo.posts_dir_list
+        ]
+        with metrics.stage("prepare"):
+            for posts_destination_dir in posts_destination_dirs:
+                create_directory_if_not_exists(posts_destination_dir, logger=logger)
+            # Instead of wiping its directories up front, a full export removes
+            # what it did not write at the end, unchanged files are not touched.
+            owned_files = set()
+            if previous_manifest is None:
+                owned_files = list_files(
+                    [*posts_destination_dirs, images_destination_dir, images_content_destination_dir]
+                )
+
+        with metrics.stage("merge_folders"):
+            try:
+                manifest.manual = merge_folders(
+                    hugo_manual_content_path,
+                    hugo_content_path,
+                    replaceable=owned_files,
+                    previous=saved_manifest.manual if saved_manifest else (),
+                    link_mode=args.manual_link_mode,
+                    jobs=args.jobs,
+                )
+            except MergeConflictError as e:
+                for conflict in e.conflicts:
+                    logger.error(f"Manual file would overwrite an existing file: {conflict}")
+                sys.exit(1)
+
+        for file_name, paths in sorted(vault_scan.duplicates.items()):
+            logger.warning(f"Duplicate file name {file_name}, links resolve to {paths[0]}: {paths}")
+
+        # every note is read and parsed once, all later stages share the index
+        with metrics.stage("index"):
+            parse_cache = None
+            if not args.no_parse_cache:
+                parse_cache = ParseCache(args.parse_cache or DEFAULT_PARSE_CACHE_PATH)
+            vault_index = VaultIndex.from_files(
+                vault_scan.markdown_files, parse_cache, jobs=args.jobs
+            )
+
+        file_name_to_path_dict = vault_scan.file_name_to_path_dict
+        logger.info(f"File name to path dictionary: {len(file_name_to_path_dict)}")
+
+        with metrics.stage("graph"):
+            note_states = {
+                file_path: input_states[file_path] for file_path in vault_scan.markdown_files
+            }
+            if previous_manifest is None:
+                link_graph = LinkGraph.from_index(vault_index, file_name_to_path_dict)
+                link_graph.note_states = note_states
+            else:
+                # an incremental run adds the links of the notes which changed
+                # to the graph saved by the previous run
+                link_graph = LinkGraph.load_or_build(
+                    link_graph_path, note_states, vault_index, file_name_to_path_dict
+                )
+        logger.info(
+            f"Link graph: {len(link_graph.orphans())} orphan notes, "
+            f"{len(link_graph.broken_links())} missing notes"
+        )
+
+        conversion = export_notes(
+            output_config,
+            vault_index,
+            file_name_to_path_dict,
+            manifest,
+            previous_manifest,
+            jobs=args.jobs,
+            link_mode=args.asset_link_mode,
+            compare=args.asset_compare,
+            logger=logger,
+            link_graph=link_graph,
+        )
+        if previous_manifest is None:
+            with metrics.stage("prune"):
+                prune_unlisted_outputs(owned_files, manifest, logger=logger)
+        if staged:
+            with metrics.stage("publish"):
+                publish_staging(staged, logger=logger)
+            manifest.relocate({staging: live for live, staging in staged.items()})
+    except BaseException:
+        # the live directories are as they were before the export
+        discard_staging(staged)
+        raise
+    with metrics.stage("manifest"):
+        manifest.save(manifest_path)
+        link_graph.save(link_graph_path)
+
+    logger.info(
+        "Stages: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in metrics.stages.items())
+    )
+    if args.report:
+        metrics.count("conversion_errors", len(conversion.errors))
+        metrics.save_report(args.report)
+        logger.info(f"Wrote run report to {args.report}")
+
+    if conversion.errors:
+        for link, error in sorted(conversion.errors.items()):
+            logger.error(f"Could not convert ({link}): {error}")
+        logger.error(f"{len(conversion.errors)} notes failed to convert")
+
+    if args.watch:
+        from obsidian_se_hugo.watch import POLL_INTERVAL_SECONDS, WatchSession
+
+        poll_interval = POLL_INTERVAL_SECONDS if args.poll_interval is None else args.poll_interval
+        WatchSession(
+            config,
+            obsidian_vault_path,
+            vault_index,
+            file_name_to_path_dict,
+            manifest,
+            manifest_path,
+            link_mode=args.asset_link_mode,
+            compare=args.asset_compare,
+            logger=logger,
+            link_graph=link_graph,
+            input_states=input_states,
+        ).watch(poll_interval)
+    if parse_cache is not None:
+        parse_cache.close()
+    if conversion.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,30 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import logging
 
+from obsidian_se_hugo.vault_scanner import DEFAULT_IGNORE
+
+
 @dataclass
 class ObsidianConfig:
     root_path: str
+    # globs of vault files and directories that are never scanned
+    ignore: list[str] = field(default_factory=lambda: list(DEFAULT_IGNORE))
+
+
+@dataclass
+class ImageOptimizationConfig:
+    # wider images are scaled down to this width
+    max_width: int = 1600
+    # WebP quality, 0 to 100
+    quality: int = 80
+
+
+@dataclass
+class TransformRule:
+    # globs of the hugo_section values the rule applies to, e.g. "cs/problems/*"
+    sections: list[str]
+    # names of the transforms, see hugo_util.hugo_transforms
+    plugins: list[str]
 
 
 @dataclass
@@ -16,11 +37,28 @@ class HugoConfig:
     manual_content_dir: str
     content_dir: str
     content_images_dir: str
+    # converter rendering Excalidraw drawings to SVG, e.g. ["excalidraw_export"],
+    # drawings are copied as they are without it
+    excalidraw_export_command: list[str] | None = None
+    # converts raster images to WebP with Pillow, images are copied as they are without it
+    image_optimization: ImageOptimizationConfig | None = None
+    # which transforms notes get per hugo_section, hugo_util.DEFAULT_TRANSFORM_RULES without it
+    transforms: list[TransformRule] | None = None
+    # front matter topics published as other categories, hugo_util.topic_to_category without it
+    topic_categories: dict[str, list[str]] | None = None
+    # sections whose subsections are all published into the section itself
+    flattened_sections: list[str] = field(default_factory=lambda: ["cs/problems"])
 
     def __post_init__(self):
         # Convert list to set if it's not already a set
         if isinstance(self.allowed_frontmatter_keys, list):
             self.allowed_frontmatter_keys = set(self.allowed_frontmatter_keys)
+        if isinstance(self.image_optimization, dict):
+            self.image_optimization = ImageOptimizationConfig(**self.image_optimization)
+        if self.transforms is not None:
+            self.transforms = [
+                TransformRule(**rule) if isinstance(rule, dict) else rule for rule in self.transforms
+            ]
 
 
 @dataclass
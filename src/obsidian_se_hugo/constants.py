@@ -1,3 +1,39 @@
-wiki_link_pattern = r"\[\[(.+?)(\|.*?)?\]\]"
-code_block_pattern = r"```[\s\S]*?```"
-inline_code_pattern = r"`[^`]*`"
+"""Compiled regular expressions shared by the markdown and Hugo helpers.
+
+Patterns are compiled once at import, so the hot paths never go through the
+`re` module cache. Where transforms combine patterns, use `.pattern`.
+"""
+
+import re
+
+# [[link]], [[link|alias]]: group 1 is the link, group 2 the "|alias" part and group 3 the alias
+wiki_link_pattern = re.compile(r"\[\[(.*?)(\|(.*?))?\]\]")
+code_block_pattern = re.compile(r"```[\s\S]*?```")
+inline_code_pattern = re.compile(r"`[^`]*`")
+json_code_block_pattern = re.compile(r"```json\n([\s\S]*?)\n```")
+
+youtube_pattern = re.compile(
+    r"!\[(.*?)\]\((https:\/\/www\.youtube\.com\/watch\?v=([a-zA-Z0-9_-]+)|https:\/\/youtu\.be\/([a-zA-Z0-9_-]+))\)"
+)
+# $$ ... $$ within one paragraph, Hugo renders paragraphs as separate HTML
+# elements and the math renderer never pairs delimiters across them, so a $$
+# without a closing one before the next blank line is text
+latex_pattern = re.compile(r"\$\$((?:(?!\n[ \t]*\n)[\s\S])*?)\$\$")
+# the last blank line of a text, in group 1
+last_blank_line_pattern = re.compile(r"[\s\S]*(\n[ \t]*\n)")
+latex_escaped_dollar_pattern = re.compile(r"\\\$")
+latex_escaped_hash_pattern = re.compile(r"\\\#")
+latex_yellow_orange_pattern = re.compile(r"YellowOrange")
+
+# level 2-4 headings, and the "#### Code" heading with its blank line
+heading_pattern = re.compile(r"(?<![^\n])#{2,4} ")
+code_tabs_heading_pattern = re.compile(r"(?<![^\n])#### Code\s*\n\n")
+code_tabs_section_pattern = re.compile(r"(#### Code\s*\n\n)(.*?)(?=\n## |\n### |\n#### |\Z)", re.DOTALL)
+solution_heading_pattern = re.compile(r"(^|\n)(## Solution)")
+
+excalidraw_extension_pattern = re.compile(r"\.excalidraw$", re.IGNORECASE)
+image_extension_pattern = re.compile(r"\.(png|jpg|jpeg|gif|svg|webp)$", re.IGNORECASE)
+# raster images which the image optimizer converts to WebP
+optimizable_image_pattern = re.compile(r"\.(png|jpg|jpeg|webp)$", re.IGNORECASE)
+slug_separator_pattern = re.compile(r"[^a-z0-9]+")
+whitespace_pattern = re.compile(r"\s+")
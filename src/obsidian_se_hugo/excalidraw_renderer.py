@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from obsidian_se_hugo.markdown_util import read_json_from_markdown
+from obsidian_se_hugo.output_writer import write_if_changed
+
+DEFAULT_SVG_CACHE_DIR = os.path.join(".cache", "obsidian-se-hugo", "excalidraw")
+# drawings per converter process, starting the converter costs more than a drawing
+BATCH_SIZE = 16
+# converter processes running at once
+RENDER_JOBS = 4
+RENDER_TIMEOUT_SECONDS = 600
+
+
+@dataclass
+class RenderStats:
+    rendered: int = 0
+    cached: int = 0
+    failed: int = 0
+
+    def __str__(self) -> str:
+        return f"rendered {self.rendered}, cached {self.cached}, failed {self.failed} drawings"
+
+
+def svg_destination(destination_path: str) -> str:
+    """Returns where the SVG of a drawing copied to `destination_path` goes."""
+    return os.path.splitext(destination_path)[0] + ".svg"
+
+
+class ExcalidrawRenderer:
+    """Renders Excalidraw drawings to SVG with an external converter.
+
+    The converter is run as `command + [paths]` on a batch of `<name>.excalidraw`
+    files and writes `<name>.svg` next to each of them, like `excalidraw_export`.
+    Up to `jobs` batches are converted at once. SVGs are cached by the sha256
+    of the drawing JSON, so a drawing is only rendered again once it changed.
+    """
+
+    def __init__(
+        self,
+        command: list[str],
+        cache_dir: str = DEFAULT_SVG_CACHE_DIR,
+        batch_size: int = BATCH_SIZE,
+        jobs: int = RENDER_JOBS,
+        timeout: float = RENDER_TIMEOUT_SECONDS,
+    ):
+        self.command = list(command)
+        self.cache_dir = cache_dir
+        self.batch_size = batch_size
+        self.jobs = jobs
+        self.timeout = timeout
+
+    def _cached_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".svg")
+
+    def _convert(self, batch: list[str], staging_dir: str) -> None:
+        try:
+            result = subprocess.run(
+                self.command + batch,
+                cwd=staging_dir,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logging.error(f"Excalidraw converter failed: {e}")
+            return
+        if result.returncode != 0:
+            # drawings it converted before failing are still used
+            logging.error(f"Excalidraw converter exited with {result.returncode}: {result.stderr}")
+
+    def render(self, pairs: list[tuple[str, str]]) -> tuple[list[tuple[str, str]], RenderStats]:
+        """Renders (drawing markdown path, SVG path) pairs.
+
+        Returns:
+            The pairs that could not be rendered, and the render statistics.
+        """
+        stats = RenderStats()
+        failed = []
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix="render-", dir=self.cache_dir)
+        try:
+            pending: dict[str, list[tuple[str, str]]] = {}
+            for source_path, svg_path in pairs:
+                json_content = read_json_from_markdown(source_path)
+                if json_content is None:
+                    logging.warning(f"No Excalidraw JSON found in {source_path}")
+                    failed.append((source_path, svg_path))
+                    continue
+                key = hashlib.sha256(json_content.encode("utf-8")).hexdigest()
+                if os.path.isfile(self._cached_path(key)):
+                    stats.cached += 1
+                    self._place(key, svg_path)
+                    continue
+                if key not in pending:
+                    with open(os.path.join(staging_dir, key + ".excalidraw"), "w", encoding="utf8") as f:
+                        f.write(json_content)
+                pending.setdefault(key, []).append((source_path, svg_path))
+
+            keys = list(pending)
+            batches = [
+                [key + ".excalidraw" for key in keys[i : i + self.batch_size]]
+                for i in range(0, len(keys), self.batch_size)
+            ]
+            with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+                list(executor.map(lambda batch: self._convert(batch, staging_dir), batches))
+
+            for key, key_pairs in pending.items():
+                rendered_path = os.path.join(staging_dir, key + ".svg")
+                if not os.path.isfile(rendered_path):
+                    failed.extend(key_pairs)
+                    continue
+                os.replace(rendered_path, self._cached_path(key))
+                stats.rendered += 1
+                for _, svg_path in key_pairs:
+                    self._place(key, svg_path)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        stats.failed = len(failed)
+        return failed, stats
+
+    def _place(self, key: str, svg_path: str) -> None:
+        os.makedirs(os.path.dirname(svg_path), exist_ok=True)
+        with open(self._cached_path(key), "rb") as f:
+            write_if_changed(svg_path, f.read())
@@ -0,0 +1,327 @@
+import logging
+import os
+
+from obsidian_se_hugo.asset_store import find_duplicate_assets
+from obsidian_se_hugo.config import Config
+from obsidian_se_hugo.constants import optimizable_image_pattern
+from obsidian_se_hugo.excalidraw_renderer import ExcalidrawRenderer, svg_destination
+from obsidian_se_hugo.file_util import (
+    COMPARE_STAT,
+    LINK_MODE_COPY,
+    copy_assets,
+    get_asset_destinations,
+)
+from obsidian_se_hugo.graph_util import grow_publish_list
+from obsidian_se_hugo.hugo_util import (
+    ConversionResult,
+    copy_markdown_files_using_hugo_section,
+    create_transform_registry,
+    get_hugo_output_path,
+)
+from obsidian_se_hugo.image_optimizer import (
+    OPTIMIZED_IMAGE_SUFFIX,
+    ImageOptimizer,
+    optimized_destination,
+    pillow_available,
+)
+from obsidian_se_hugo.link_graph import LinkGraph
+from obsidian_se_hugo.link_resolver import LinkResolver
+from obsidian_se_hugo.manifest import Manifest, prune_stale_outputs
+from obsidian_se_hugo.metrics import (
+    BYTES_READ,
+    BYTES_WRITTEN,
+    FILES_READ,
+    FILES_WRITTEN,
+    metrics,
+)
+from obsidian_se_hugo.problem_catalog import ProblemCatalog
+from obsidian_se_hugo.vault_index import VaultIndex
+
+
+def export_notes(
+    config: Config,
+    vault_index: VaultIndex,
+    file_name_to_path_dict: dict[str, str],
+    manifest: Manifest,
+    previous_manifest: Manifest | None = None,
+    jobs: int = 1,
+    link_mode: str = LINK_MODE_COPY,
+    compare: str = COMPARE_STAT,
+    logger: logging.Logger = logging.getLogger(__name__),
+    link_graph: LinkGraph | None = None,
+    problem_catalog: ProblemCatalog | None = None,
+) -> ConversionResult:
+    """Converts the published notes and copies the assets they link to.
+
+    Every note and asset is recorded in `manifest`, but only the ones that
+    changed since `previous_manifest` are written. Outputs of the previous
+    export which this one no longer produces are removed. The link graph of
+    the vault and the catalog of related problems are built from the index
+    unless they are given. With an
+    `excalidraw_export_command` configured, drawings are rendered to SVG and
+    only copied as they are when rendering fails. The same goes for raster
+    images with `image_optimization` configured, which are converted to WebP.
+    Assets with the same content are copied once, see `find_duplicate_assets`.
+    Notes get the transforms configured for their hugo section.
+    """
+    hugo_content_path = os.path.join(config.hugo.root_path, config.hugo.content_dir)
+    images_destination_dir = os.path.join(config.hugo.root_path, config.hugo.images_dir)
+    images_content_destination_dir = os.path.join(
+        config.hugo.root_path, config.hugo.content_images_dir
+    )
+
+    with metrics.stage("publish_list"):
+        initial_explicit_publish_list = vault_index.explicit_publish_list()
+
+    with metrics.stage("alternate_links"):
+        # {'Segment Tree Data Structure DS Index': 'https://en.wikipedia.org/wiki/Segment_tree'}
+        file_name_to_alternate_link_dict = vault_index.alternate_link_dict()
+    logger.info(
+        f"File name to alternate link dictionary: {file_name_to_alternate_link_dict}"
+    )
+
+    with metrics.stage("bfs"):
+        reachable_links, reachable_assets = grow_publish_list(
+            initial_explicit_publish_list, file_name_to_path_dict, vault_index, jobs=jobs
+        )
+
+    if link_graph is None:
+        with metrics.stage("graph"):
+            link_graph = LinkGraph.from_index(vault_index, file_name_to_path_dict)
+
+    with metrics.stage("asset_store"):
+        asset_destinations = get_asset_destinations(
+            reachable_assets,
+            images_destination_dir,
+            images_content_destination_dir,
+            file_name_to_path_dict,
+        )
+        manifest.asset_aliases = find_duplicate_assets(
+            asset_destinations,
+            lambda source_path: manifest.fingerprint(source_path, previous_manifest)["sha256"],
+        )
+    logger.info(f"{len(manifest.asset_aliases)} assets duplicate another asset")
+
+    image_config = config.hugo.image_optimization
+    optimizer = None
+    if image_config and not pillow_available():
+        logger.warning("Image optimization needs Pillow, images are copied as they are")
+    elif image_config:
+        optimizer = ImageOptimizer(image_config.max_width, image_config.quality)
+    # Images are optimized before the notes are converted, the ones which
+    # cannot be are copied as they are and linked by their own name.
+    unoptimized_images = set()
+    relinked_images = set()
+    if optimizer is not None:
+        with metrics.stage("images"):
+            unoptimized_images, relinked_images = optimize_images(
+                optimizer, asset_destinations, manifest, previous_manifest, logger
+            )
+
+    with metrics.stage("plan"):
+        links_to_convert = plan_conversion(
+            reachable_links,
+            hugo_content_path,
+            file_name_to_path_dict,
+            vault_index,
+            manifest,
+            previous_manifest,
+            link_graph,
+            link_graph.dependents(
+                manifest.changed_asset_aliases(previous_manifest) | relinked_images
+            ),
+        )
+    logger.info(f"Converting {len(links_to_convert)} of {len(reachable_links)} notes")
+
+    export_command = config.hugo.excalidraw_export_command
+    renderer = ExcalidrawRenderer(export_command) if export_command else None
+    link_resolver = LinkResolver(
+        file_name_to_path_dict,
+        file_name_to_alternate_link_dict,
+        vault_index,
+        excalidraw_extension=".svg" if renderer else ".png",
+        asset_aliases=manifest.asset_aliases,
+        optimized_image_suffix=OPTIMIZED_IMAGE_SUFFIX if optimizer else "",
+        unoptimized_images=unoptimized_images,
+        flattened_sections=config.hugo.flattened_sections,
+    )
+
+    with metrics.stage("conversion"):
+        conversion = copy_markdown_files_using_hugo_section(
+            links_to_convert,
+            hugo_content_path,
+            file_name_to_path_dict,
+            config.hugo.allowed_frontmatter_keys,
+            file_name_to_alternate_link_dict,
+            vault_index,
+            jobs=jobs,
+            link_resolver=link_resolver,
+            transforms=create_transform_registry(config.hugo),
+            problem_catalog=problem_catalog,
+        )
+    metrics.note_seconds.update(conversion.seconds)
+    for link in conversion.errors:
+        # keep the previous output, but retry the note on the next run
+        manifest.invalidate(file_name_to_path_dict[link + ".md"])
+
+    with metrics.stage("assets"):
+        assets_to_copy = set()
+        # (source, SVG destination) of the drawings to render
+        drawings_to_render = []
+        for asset_filename, (source_path, _) in asset_destinations.items():
+            drawing = renderer is not None and asset_filename.lower().endswith(".excalidraw")
+            stored_filename = manifest.asset_aliases.get(asset_filename, asset_filename)
+            # optimized images are written by `optimize_images` already
+            optimized = (
+                optimizer is not None
+                and bool(optimizable_image_pattern.search(stored_filename))
+                and stored_filename not in unoptimized_images
+            )
+            destination_path = asset_destinations[stored_filename][1]
+            if drawing:
+                destination_path = svg_destination(destination_path)
+            elif optimized:
+                destination_path = optimized_destination(destination_path)
+            manifest.add_asset(source_path, destination_path)
+            if (
+                optimized
+                or stored_filename != asset_filename
+                or not manifest.asset_needs_copy(source_path, previous_manifest)
+            ):
+                continue
+            if drawing:
+                drawings_to_render.append((source_path, destination_path))
+            else:
+                assets_to_copy.add(asset_filename)
+
+        if drawings_to_render:
+            failed, render_stats = renderer.render(drawings_to_render)
+            logger.info(f"Excalidraw: {render_stats}")
+            failed_sources = {source_path for source_path, _ in failed}
+            for asset_filename, (source_path, _) in asset_destinations.items():
+                stored_filename = manifest.asset_aliases.get(asset_filename, asset_filename)
+                stored_source_path, destination_path = asset_destinations[stored_filename]
+                if stored_source_path in failed_sources:
+                    # fall back to the drawing itself, rendering is retried next run
+                    manifest.add_asset(source_path, destination_path)
+                    manifest.invalidate(source_path)
+                    if stored_filename == asset_filename:
+                        assets_to_copy.add(asset_filename)
+        logger.info(f"Copying {len(assets_to_copy)} of {len(reachable_assets)} assets")
+
+        asset_stats = copy_assets(
+            reachable_assets,
+            images_destination_dir,
+            images_content_destination_dir,
+            file_name_to_path_dict,
+            only=assets_to_copy,
+            link_mode=link_mode,
+            compare=compare,
+        )
+    logger.info(f"Assets: {asset_stats}")
+    metrics.count(FILES_READ, asset_stats.copied)
+    metrics.count(BYTES_READ, asset_stats.bytes_copied)
+    metrics.count(FILES_WRITTEN, asset_stats.copied)
+    metrics.count(BYTES_WRITTEN, asset_stats.bytes_copied)
+
+    with metrics.stage("prune"):
+        prune_stale_outputs(previous_manifest, manifest, logger=logger)
+    return conversion
+
+
+def optimize_images(
+    optimizer: ImageOptimizer,
+    asset_destinations: dict[str, tuple[str, str]],
+    manifest: Manifest,
+    previous_manifest: Manifest | None = None,
+    logger: logging.Logger = logging.getLogger(__name__),
+) -> tuple[set[str], set[str]]:
+    """Writes the raster images which changed as WebP, and records them in the manifest.
+
+    An image which cannot be optimized keeps its own destination, it is
+    copied as it is with the other assets and optimized again on the next
+    run. Images which duplicate another one are left to the caller.
+
+    Returns:
+        The images which could not be optimized, and the images, duplicates
+        included, which are linked by another file name than in the previous
+        export.
+    """
+    stored_images = {
+        asset_filename: paths
+        for asset_filename, paths in asset_destinations.items()
+        if asset_filename not in manifest.asset_aliases
+        and optimizable_image_pattern.search(asset_filename)
+    }
+    # (source, source sha256, WebP destination) of the images to optimize
+    images_to_optimize = []
+    for source_path, destination_path in stored_images.values():
+        destination_path = optimized_destination(destination_path)
+        manifest.add_asset(source_path, destination_path)
+        if manifest.asset_needs_copy(source_path, previous_manifest):
+            source_sha256 = manifest.sources[source_path]["sha256"]
+            images_to_optimize.append((source_path, source_sha256, destination_path))
+
+    unoptimized_images = set()
+    if images_to_optimize:
+        failed_images, optimize_stats = optimizer.optimize(images_to_optimize)
+        logger.info(f"Images: {optimize_stats}")
+        failed_sources = {source_path for source_path, _, _ in failed_images}
+        for asset_filename, (source_path, destination_path) in stored_images.items():
+            if source_path in failed_sources:
+                manifest.add_asset(source_path, destination_path)
+                manifest.invalidate(source_path)
+                unoptimized_images.add(asset_filename)
+
+    relinked_images = set()
+    if previous_manifest is not None:
+        for asset_filename, (source_path, _) in stored_images.items():
+            previous_asset = previous_manifest.assets.get(source_path)
+            if previous_asset and previous_asset["output"] != manifest.assets[source_path]["output"]:
+                relinked_images.add(asset_filename)
+        relinked_images.update(
+            asset_filename
+            for asset_filename, stored_filename in manifest.asset_aliases.items()
+            if stored_filename in relinked_images
+        )
+    return unoptimized_images, relinked_images
+
+
+def plan_conversion(
+    reachable_links: list[str],
+    hugo_content_path: str,
+    file_name_to_path_dict: dict[str, str],
+    vault_index: VaultIndex,
+    manifest: Manifest,
+    previous_manifest: Manifest | None,
+    link_graph: LinkGraph,
+    stale_notes: set[str] = frozenset(),
+) -> list[str]:
+    """Records the reachable notes in the manifest, returns the ones to convert.
+
+    Notes in `stale_notes` are converted even when they did not change.
+    """
+    for link in reachable_links:
+        file_path = file_name_to_path_dict[link + ".md"]
+        record = vault_index.get(file_path)
+        manifest.fingerprint(
+            file_path,
+            previous_manifest,
+            link_signature=[bool(record.published), record.hugo_section, record.alternate_link],
+        )
+        output_path = get_hugo_output_path(
+            link, hugo_content_path, file_name_to_path_dict, vault_index
+        )
+        if not output_path:
+            continue
+        manifest.add_note(file_path, output_path, link_graph.note_dependencies(file_path))
+
+    links_to_convert = []
+    for link in reachable_links:
+        file_path = file_name_to_path_dict[link + ".md"]
+        if file_path in manifest.notes and (
+            file_path in stale_notes
+            or manifest.note_needs_conversion(file_path, previous_manifest)
+        ):
+            links_to_convert.append(link)
+    return links_to_convert
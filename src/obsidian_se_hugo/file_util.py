@@ -3,13 +3,26 @@ import shutil
 import sys
 import logging
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from obsidian_se_hugo.hugo_util import slugify_filename
-from obsidian_se_hugo.markdown_util import read_json_from_markdown
+from obsidian_se_hugo.manifest import hash_file
+from obsidian_se_hugo.vault_scanner import scan_vault
 
 EXCALIDRAW_SUBDIR = "excalidraw"
 REGULAR_IMAGES_SUBDIR = "regular"
 
+LINK_MODE_COPY = "copy"
+LINK_MODE_HARDLINK = "hardlink"
+LINK_MODE_REFLINK = "reflink"
+LINK_MODES = (LINK_MODE_COPY, LINK_MODE_HARDLINK, LINK_MODE_REFLINK)
+
+COMPARE_STAT = "stat"
+COMPARE_HASH = "hash"
+
+# _IOW(0x94, 9, int) from linux/fs.h
+FICLONE = 0x40049409
+
 
 def get_dir_path(directory_path: str):
     return Path(directory_path)
@@ -65,15 +78,9 @@ def create_file_name_to_path_dictionary(directory: str) -> dict[str, Path]:
         directory: The starting directory to scan.
 
     Returns:
-        A dictionary of filename to file path.
+        A dictionary of filename to file path, see `scan_vault` for duplicates.
     """
-
-    file_dict = {}
-    for root, _, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            file_dict[file] = file_path
-    return file_dict
+    return scan_vault(directory, ignore=()).file_name_to_path_dict
 
 
 def has_extension(file_name):
@@ -89,6 +96,15 @@ def has_extension(file_name):
     return ext != ""
 
 
+def list_files(directories) -> set[str]:
+    """Returns the normalized paths of the files under the given directories."""
+    files = set()
+    for directory in directories:
+        for root, _, file_names in os.walk(directory):
+            files.update(os.path.normpath(os.path.join(root, name)) for name in file_names)
+    return files
+
+
 def create_directory_if_not_exists(dir_path: str, logger: logging.Logger = logging.getLogger(__name__)):
     logger.debug(f"Checking if directory exists: {dir_path}")
     if not os.path.exists(dir_path):
@@ -96,30 +112,48 @@ def create_directory_if_not_exists(dir_path: str, logger: logging.Logger = loggi
         logger.info(f"Created directory: {dir_path}")
 
 
-def copy_assets(
+@dataclass
+class CopyStats:
+    copied: int = 0
+    skipped: int = 0
+    bytes_copied: int = 0
+    bytes_skipped: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"copied {self.copied} files ({self.bytes_copied} bytes), "
+            f"skipped {self.skipped} unchanged files ({self.bytes_skipped} bytes)"
+        )
+
+
+def get_asset_destinations(
     asset_file_names: list[str],
     images_destination_dir: str,
     content_images_destination_dir: str,
     file_name_to_path_dict: dict[str, str],
-):
-    # Create subdirectories for different asset types
+) -> dict[str, tuple[str, str]]:
+    """Resolves where each asset is copied from and to.
+
+    Returns:
+        A dictionary of asset name to its (source path, destination path).
+    """
+    # imported here, the command line loads this module before it knows
+    # whether there is anything to convert
+    from obsidian_se_hugo.hugo_util import slugify_filename
+
     excalidraw_dir = os.path.join(images_destination_dir, EXCALIDRAW_SUBDIR)
     regular_images_dir = os.path.join(images_destination_dir, REGULAR_IMAGES_SUBDIR)
 
-    # Ensure that the destination directory exists
-    os.makedirs(excalidraw_dir, exist_ok=True)
-    os.makedirs(regular_images_dir, exist_ok=True)
-    os.makedirs(content_images_destination_dir, exist_ok=True)
-
+    destinations = {}
     image_dir = None
-    # Copy each asset from the list to the destination directory
     for asset_filename in asset_file_names:
+        source_filename = asset_filename
         base_filename = os.path.basename(asset_filename)
         if asset_filename.lower().endswith(".excalidraw"):
-            # as excalidraw file has markdown extension at end
-            # for now export to svg doesnt work properly, hence manually copying.
-            asset_filename = asset_filename + ".md"
-            base_filename = os.path.basename(asset_filename)
+            # as excalidraw file has markdown extension at end, the exporter
+            # renders it to svg instead when a converter is configured
+            source_filename = asset_filename + ".md"
+            base_filename = os.path.basename(source_filename)
             image_dir = excalidraw_dir
         elif asset_filename.lower().endswith(".gif"):
             # as gif file has markdown extension at end
@@ -128,10 +162,158 @@ def copy_assets(
         else:
             image_dir = regular_images_dir
 
-        source_path = file_name_to_path_dict[asset_filename]
+        source_path = file_name_to_path_dict[source_filename]
         slugified_filename = slugify_filename(base_filename)
         destination_path = os.path.join(image_dir, slugified_filename)
-        shutil.copy(source_path, destination_path)
+        destinations[asset_filename] = (source_path, destination_path)
+    return destinations
+
+
+def copy_assets(
+    asset_file_names: list[str],
+    images_destination_dir: str,
+    content_images_destination_dir: str,
+    file_name_to_path_dict: dict[str, str],
+    only: set[str] | None = None,
+    link_mode: str = LINK_MODE_COPY,
+    compare: str = COMPARE_STAT,
+    jobs: int | None = None,
+) -> CopyStats:
+    """Copies the assets into the Hugo image directories.
+
+    Args:
+        only: When given, only these assets are copied.
+        link_mode, compare, jobs: See `copy_files`.
+    """
+    # Create subdirectories for different asset types
+    excalidraw_dir = os.path.join(images_destination_dir, EXCALIDRAW_SUBDIR)
+    regular_images_dir = os.path.join(images_destination_dir, REGULAR_IMAGES_SUBDIR)
+
+    # Ensure that the destination directory exists
+    os.makedirs(excalidraw_dir, exist_ok=True)
+    os.makedirs(regular_images_dir, exist_ok=True)
+    os.makedirs(content_images_destination_dir, exist_ok=True)
+
+    destinations = get_asset_destinations(
+        asset_file_names,
+        images_destination_dir,
+        content_images_destination_dir,
+        file_name_to_path_dict,
+    )
+    # Copy each asset from the list to the destination directory
+    pairs = [
+        (source_path, destination_path)
+        for asset_filename, (source_path, destination_path) in destinations.items()
+        if only is None or asset_filename in only
+    ]
+    stats = copy_files(pairs, link_mode=link_mode, compare=compare, jobs=jobs)
+    logging.info(f"Assets: {stats}")
+    return stats
+
+
+def is_up_to_date(
+    source_path: str,
+    destination_path: str,
+    compare: str = COMPARE_STAT,
+    link_mode: str = LINK_MODE_COPY,
+) -> bool:
+    """Checks if the destination already holds the source file.
+
+    Args:
+        compare: `stat` trusts matching size and mtime, `hash` compares the
+            contents of files of the same size.
+        link_mode: A hardlink of the source is only up to date when placing
+            hardlinks, otherwise it is replaced by a separate file.
+    """
+    try:
+        destination_stat = os.stat(destination_path)
+    except FileNotFoundError:
+        return False
+    source_stat = os.stat(source_path)
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    if os.path.samestat(source_stat, destination_stat):
+        # hardlinked by a previous run
+        return link_mode == LINK_MODE_HARDLINK
+    if compare == COMPARE_HASH:
+        return hash_file(source_path) == hash_file(destination_path)
+    return source_stat.st_mtime_ns == destination_stat.st_mtime_ns
+
+
+def _reflink(source_path: str, destination_path: str) -> None:
+    """Clones the file with the Linux FICLONE ioctl (btrfs, XFS, ...)."""
+    import fcntl
+
+    with open(source_path, "rb") as source, open(destination_path, "wb") as destination:
+        fcntl.ioctl(destination.fileno(), FICLONE, source.fileno())
+    shutil.copystat(source_path, destination_path)
+
+
+def link_or_copy_file(source_path: str, destination_path: str, link_mode: str = LINK_MODE_COPY) -> None:
+    """Places the source at the destination, sharing its blocks if possible.
+
+    Hardlinks and reflinks only work within one filesystem, on any error the
+    file is copied instead. The copy keeps the mtime of the source, so that
+    `is_up_to_date` recognises it on the next run. The destination is always
+    replaced, never written in place, so where it is a hardlink, e.g. in a
+    staged export, the other links keep their content.
+    """
+    temp_path = f"{destination_path}.{os.getpid()}.tmp"
+    if link_mode != LINK_MODE_COPY:
+        try:
+            if link_mode == LINK_MODE_HARDLINK:
+                os.link(source_path, temp_path)
+            else:
+                _reflink(source_path, temp_path)
+            os.replace(temp_path, destination_path)
+            return
+        except (OSError, ImportError) as e:
+            logging.debug(f"Cannot {link_mode} {source_path}, copying instead: {e}")
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
+    try:
+        shutil.copy2(source_path, temp_path)
+        os.replace(temp_path, destination_path)
+    except BaseException:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def copy_files(
+    pairs: list[tuple[str, str]],
+    link_mode: str = LINK_MODE_COPY,
+    compare: str = COMPARE_STAT,
+    jobs: int | None = None,
+) -> CopyStats:
+    """Copies (source, destination) pairs on a thread pool, skipping unchanged ones.
+
+    Args:
+        link_mode: `copy`, `hardlink` or `reflink`.
+        compare: How unchanged destinations are detected, see `is_up_to_date`.
+        jobs: Number of threads, defaults to the `ThreadPoolExecutor` default.
+    """
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode: {link_mode}")
+
+    def copy_pair(pair: tuple[str, str]) -> tuple[bool, int]:
+        source_path, destination_path = pair
+        size = os.path.getsize(source_path)
+        if is_up_to_date(source_path, destination_path, compare, link_mode):
+            return False, size
+        link_or_copy_file(source_path, destination_path, link_mode)
+        return True, size
+
+    stats = CopyStats()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for copied, size in executor.map(copy_pair, pairs):
+            if copied:
+                stats.copied += 1
+                stats.bytes_copied += size
+            else:
+                stats.skipped += 1
+                stats.bytes_skipped += size
+    return stats
 
 
 def save_to_excalidraw_file(json_content, excalidraw_path):
@@ -155,6 +337,8 @@ def process_excalidraw_file_using_external_process(
     images_destination_dir: str,
     file_name_to_path_dict: dict[str, str],
 ) -> bool:
+    from obsidian_se_hugo.hugo_util import slugify_filename
+
     actual_asset_filename = asset_filename + ".md"
     source_path = file_name_to_path_dict[actual_asset_filename]
     svg_filename = os.path.splitext(base_filename)[0] + ".svg"
@@ -168,6 +352,8 @@ def process_excalidraw_file_using_external_process(
 
 
 def extract_json_and_export_excalidraw_to_svg(markdown_path, svg_path) -> bool:
+    from obsidian_se_hugo.markdown_util import read_json_from_markdown
+
     json_content = read_json_from_markdown(markdown_path)
     if json_content is not None:
         # create temp excalidraw file at same location where svg will be generated
@@ -183,36 +369,94 @@ def extract_json_and_export_excalidraw_to_svg(markdown_path, svg_path) -> bool:
         return False
 
 
-def merge_folders(source_dir, dest_dir):
+class MergeConflictError(FileExistsError):
+    """Raised before anything is copied, with every manual file that would overwrite another."""
+
+    def __init__(self, conflicts: list[str]):
+        self.conflicts = conflicts
+        super().__init__(f"{len(conflicts)} manual files already exist:\n" + "\n".join(conflicts))
+
+
+def _list_relative_files(directory: str, relative_dirs) -> set[str]:
+    """Lists the files directly in each of `relative_dirs` under `directory`."""
+    files = set()
+    for relative_dir in relative_dirs:
+        try:
+            with os.scandir(os.path.join(directory, relative_dir)) as entries:
+                files.update(
+                    os.path.normpath(os.path.join(relative_dir, entry.name))
+                    for entry in entries
+                    if entry.is_file()
+                )
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+    return files
+
+
+def merge_folders(
+    source_dir,
+    dest_dir,
+    replaceable: set[str] = frozenset(),
+    previous=(),
+    link_mode: str = LINK_MODE_COPY,
+    jobs: int | None = None,
+) -> list[str]:
     """
     Merges files from source directory to destination directory,
-    preserving folder structure and skipping existing files.
+    preserving folder structure.
+
+    Both trees are listed once up front, so every conflict is reported
+    before anything is copied. Only new and changed files are copied.
 
     Args:
       source_dir: Path to the source directory (manual-content).
       dest_dir: Path to the destination directory (content).
-    """
-    for root, dirs, files in os.walk(source_dir):
-        # Construct relative path within destination directory
-        relative_path = os.path.relpath(root, source_dir)
-        dest_path = os.path.join(dest_dir, relative_path)
-
-        # Create destination directory if it doesn't exist
-        if not os.path.exists(dest_path):
-            os.makedirs(dest_path)
-
-        for filename in files:
-            if filename == ".DS_Store":
-                continue
-            source_file = os.path.join(root, filename)
-            dest_file = os.path.join(dest_path, filename)
-
-            # Skip existing files in destination
-            if os.path.exists(dest_file):
-                raise FileExistsError(
-                    f"Destination File '{source_file}' already exists"
-                )
+      replaceable: Destination files which may be overwritten.
+      previous: Destination files of the previous merge. They may be
+        overwritten as well, the ones whose source is gone are removed.
+      link_mode: How files are placed, see `copy_files`. With hardlinks,
+        a tool editing a merged file in place edits the manual file too.
+      jobs: Number of scanning and copying threads.
+
+    Returns:
+      The destination paths of all merged files.
 
-            # Copy the file
-            shutil.copy2(source_file, dest_file)
-            logging.info(f"Copied: {source_file} to {dest_file}")
+    Raises:
+      MergeConflictError: When merged files would overwrite other files.
+    """
+    previous = {os.path.normpath(path) for path in previous}
+    replaceable = {os.path.normpath(path) for path in replaceable} | previous
+    source_files = []
+    if os.path.isdir(source_dir):
+        source_files = [
+            os.path.relpath(path, source_dir)
+            for path in scan_vault(source_dir, ignore=(".DS_Store",), jobs=jobs).files
+        ]
+    dest_files = _list_relative_files(
+        dest_dir, {os.path.dirname(relative_path) for relative_path in source_files}
+    )
+
+    conflicts = [
+        os.path.join(source_dir, relative_path)
+        for relative_path in source_files
+        if relative_path in dest_files
+        and os.path.normpath(os.path.join(dest_dir, relative_path)) not in replaceable
+    ]
+    if conflicts:
+        raise MergeConflictError(conflicts)
+
+    pairs = [
+        (os.path.join(source_dir, relative_path), os.path.join(dest_dir, relative_path))
+        for relative_path in source_files
+    ]
+    for directory in {os.path.dirname(dest_file) for _, dest_file in pairs}:
+        os.makedirs(directory, exist_ok=True)
+    stats = copy_files(pairs, link_mode=link_mode, jobs=jobs)
+    logging.info(f"Merged {source_dir} into {dest_dir}: {stats}")
+
+    merged = [dest_file for _, dest_file in pairs]
+    for dest_file in sorted(previous - {os.path.normpath(path) for path in merged}):
+        if os.path.isfile(dest_file):
+            logging.info(f"Removing deleted manual file: {dest_file}")
+            os.remove(dest_file)
+    return merged
@@ -1,70 +1,116 @@
 import logging
 import os
-from collections import deque
 
 from .hyperlink import Hyperlink
-from .markdown_util import extract_wiki_links, get_alternate_link, is_published
-from .file_util import has_extension, read_text_file
+from .file_util import has_extension
+from .vault_index import VaultIndex
 
 
-def get_outgoing_links(file_path: str) -> list[Hyperlink]:
-    should_be_published = is_published(file_path)
-    if not should_be_published and not get_alternate_link(file_path):
+def get_outgoing_links(file_path: str, vault_index: VaultIndex | None = None) -> list[Hyperlink]:
+    if vault_index is None:
+        vault_index = VaultIndex()
+    record = vault_index.get(file_path)
+    should_be_published = record.published
+    if not should_be_published and not record.alternate_link:
         raise ValueError(
             f"File {file_path} should not be published and has no alternate link."
         )
     elif not should_be_published:
         return []
-    markdown_text = read_text_file(file_path)
-    wiki_links = extract_wiki_links(markdown_text)
-    return wiki_links
+    return record.wiki_links
+
+
+def get_note_dependencies(
+    file_path: str, file_name_to_path_dict: dict[str, str], vault_index: VaultIndex
+) -> list[str]:
+    """Returns the paths of the notes whose metadata the rendered note links to."""
+    deps = set()
+    for hyperlink in vault_index.get(file_path).wiki_links:
+        link = hyperlink.link
+        if has_extension(link):
+            continue
+        markdown_link = link.split("#", 1)[0] + ".md"
+        if markdown_link in file_name_to_path_dict:
+            deps.add(file_name_to_path_dict[markdown_link])
+    deps.discard(file_path)
+    return sorted(deps)
+
+
+class MissingLinksError(ValueError):
+    """Raised once the whole graph is explored, with every broken link found."""
+
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} broken links:\n" + "\n".join(errors))
 
 
 def grow_publish_list(
-    initial_explicit_publish_list: list[str], file_name_to_path_dict: dict[str, str]
-) -> tuple[set[str], set[str]]:
-    return bfs(initial_explicit_publish_list, file_name_to_path_dict)
+    initial_explicit_publish_list: list[str],
+    file_name_to_path_dict: dict[str, str],
+    vault_index: VaultIndex | None = None,
+    jobs: int | None = None,
+) -> tuple[list[str], list[str]]:
+    return bfs(initial_explicit_publish_list, file_name_to_path_dict, vault_index, jobs)
 
 
 def bfs(
-    source_list: list[str], file_name_to_path_dict: dict[str, str]
+    source_list: list[str],
+    file_name_to_path_dict: dict[str, str],
+    vault_index: VaultIndex | None = None,
+    jobs: int | None = None,
 ) -> tuple[list[str], list[str]]:
-    visited = set[str]()
+    """Finds the notes and assets reachable from `source_list`.
+
+    The graph is explored one frontier at a time, the notes of a frontier
+    which are not indexed yet are parsed together on `jobs` threads. Links
+    that cannot be followed do not stop the search, they are all reported
+    at the end in a `MissingLinksError`.
+    """
+    if vault_index is None:
+        vault_index = VaultIndex()
+    visited = set[str](source_list)
     reachable_links = set[str]()
     reachable_assets = set[str]()
-    queue = deque[str](source_list)
+    errors = []
+    frontier = list(dict.fromkeys(source_list))
 
-    while queue:
-        node = queue.popleft()
-        if node not in visited:
-            visited.add(node)
+    while frontier:
+        vault_index.prefetch(frontier, jobs)
+        next_frontier = []
+        for node in frontier:
             base_file_name = os.path.basename(node)
             base_file_name_wo_ext, _ = os.path.splitext(base_file_name)
             reachable_links.add(base_file_name_wo_ext)
-            outgoing_links = get_outgoing_links(node)
-            neighbors = []
+            try:
+                outgoing_links = get_outgoing_links(node, vault_index)
+            except ValueError as e:
+                errors.append(str(e))
+                continue
             for hyperlink in outgoing_links:
                 link = hyperlink.link
                 has_ext = has_extension(link)
                 if has_ext:
                     reachable_assets.add(link)
-                else:
-                    # handle the links that link to headers
-                    link_parts = link.split("#", 1)
-                    file_link = link_parts[0]
-                    if not file_link:
-                        # some files have links like [[#header]], we ignore them
-                        continue
-                    markdown_link = file_link + ".md"
-                    if markdown_link not in file_name_to_path_dict:
-                        raise ValueError(
-                            f"Outgoing Link {markdown_link} in '{base_file_name}' cannot be found."
-                        )
-                    neighbors.append(file_name_to_path_dict[markdown_link])
-            # Process node if needed, then add its neighbors to the queue
-            # Here we add to the queue all adjacent nodes that haven't been visited
-            queue.extend(neighbor for neighbor in neighbors if neighbor not in visited)
+                    continue
+                # handle the links that link to headers
+                file_link = link.split("#", 1)[0]
+                if not file_link:
+                    # some files have links like [[#header]], we ignore them
+                    continue
+                markdown_link = file_link + ".md"
+                if markdown_link not in file_name_to_path_dict:
+                    errors.append(
+                        f"Outgoing Link {markdown_link} in '{base_file_name}' cannot be found."
+                    )
+                    continue
+                neighbor = file_name_to_path_dict[markdown_link]
+                if neighbor not in visited:
+                    visited.add(neighbor)
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
 
-    logging.info("Reachable Links: ", reachable_links)
-    logging.info("Reachable Assets: ", reachable_assets)
+    logging.info("Reachable Links: %s", reachable_links)
+    logging.info("Reachable Assets: %s", reachable_assets)
+    if errors:
+        raise MissingLinksError(sorted(set(errors)))
     return sorted(reachable_links), sorted(reachable_assets)
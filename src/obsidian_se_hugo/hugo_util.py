@@ -1,14 +1,40 @@
 import logging
+import math
+import time
 import re
 import frontmatter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from types import SimpleNamespace
 import os
-from obsidian_se_hugo.markdown_util import (
-    extract_single_wiki_link,
-    get_hugo_section,
-    is_published,
+from obsidian_se_hugo.markdown_util import CodeRegions, find_code_regions
+from obsidian_se_hugo.constants import (
+    code_tabs_heading_pattern,
+    code_tabs_section_pattern,
+    heading_pattern,
+    latex_escaped_dollar_pattern,
+    latex_escaped_hash_pattern,
+    latex_pattern,
+    latex_yellow_orange_pattern,
+    slug_separator_pattern,
+    solution_heading_pattern,
+    whitespace_pattern,
+    wiki_link_pattern,
+    youtube_pattern,
 )
-from obsidian_se_hugo.constants import code_block_pattern, inline_code_pattern
+from obsidian_se_hugo.config import HugoConfig
+from obsidian_se_hugo.link_resolver import LINK_KIND_NOTE, LinkResolver
+from obsidian_se_hugo.metrics import NOTES_NOT_SCANNED, metrics
+from obsidian_se_hugo.output_writer import OutputWriter, atomic_text_output, write_if_changed
+from obsidian_se_hugo.problem_catalog import ProblemCatalog
+from obsidian_se_hugo.transform_pipeline import (
+    OutputBuffer,
+    Transform,
+    TransformPipeline,
+    TransformRegistry,
+)
+from obsidian_se_hugo.vault_index import STREAMING_THRESHOLD_BYTES, VaultIndex
 from slugify import slugify
 
 default_allowed_frontmatter_keys_in_hugo = {
@@ -51,7 +77,19 @@ def change_front_matter(
     allowed_keys: set[str],
     input_file_path: str,
     file_name_to_path_dict: dict[str, str],
+    vault_index: VaultIndex | None = None,
+    transforms: list[Transform] | None = None,
+    link_resolver: LinkResolver | None = None,
+    problem_catalog: ProblemCatalog | None = None,
 ) -> None:
+    if vault_index is None:
+        vault_index = VaultIndex()
+    if transforms is None:
+        transforms = default_transform_registry.transforms_for(
+            vault_index.get_hugo_section(input_file_path)
+        )
+    if link_resolver is None:
+        link_resolver = LinkResolver(file_name_to_path_dict, {}, vault_index)
     if "title" not in post.metadata:
         raise ValueError(f"Title is missing in front matter in {input_file_path}")
 
@@ -67,13 +105,8 @@ def change_front_matter(
         post.metadata["lastmod"] = convert_date_to_iso(post.metadata["date_modified"])
         del post.metadata["date_modified"]
 
-    # Add categories based on topic
-    if "topic" in post.metadata:
-        topic = post.metadata["topic"]
-        if topic in topic_to_category:
-            post.metadata["categories"] = topic_to_category[topic]
-        else:
-            post.metadata["categories"] = [topic]
+    for transform in transforms:
+        transform.front_matter(post.metadata)
 
     # Slugify aliases if present
     if "aliases" in post.metadata:
@@ -85,37 +118,11 @@ def change_front_matter(
         "related_problems" in post.metadata
         and post.metadata["related_problems"] is not None
     ):
-        related_problems = post.metadata["related_problems"]
-        new_related_problems = []
-        for related_problem in related_problems:
-            # Try to resolve the file path
-            related_problem_name = extract_single_wiki_link(related_problem) + ".md"
-            problem_file = file_name_to_path_dict.get(related_problem_name)
-            if problem_file:
-                is_related_problem_published = is_published(problem_file)
-                if is_related_problem_published:
-                    hugo_section = get_hugo_section(problem_file)
-                    slug = slugify_filename(
-                        os.path.splitext(os.path.basename(problem_file))[0]
-                    )
-                    if hugo_section:
-                        if hugo_section.startswith("cs/problems"):
-                            new_related_problems.append(f"/cs/problems/{slug}")
-                        else:
-                            new_related_problems.append(f"/{hugo_section}/{slug}")
-                    else:
-                        raise ValueError(
-                            f"Related problem '{related_problem_name}' for '{input_file_path}' doesn't have a Hugo section"
-                        )
-                else:
-                    raise ValueError(
-                        f"Related problem '{related_problem_name}' not published for '{input_file_path}'"
-                    )
-            else:
-                raise ValueError(
-                    f"Related problem '{related_problem_name}' not found for '{input_file_path}'"
-                )
-        post.metadata["related_problems"] = new_related_problems
+        if problem_catalog is None:
+            problem_catalog = ProblemCatalog(link_resolver)
+        post.metadata["related_problems"] = problem_catalog.related_problem_urls(
+            post.metadata["related_problems"], input_file_path
+        )
 
     # Remove extra keys from the markdown
     allowed_keys = allowed_keys.union(default_allowed_frontmatter_keys_in_hugo)
@@ -125,8 +132,48 @@ def change_front_matter(
         del post.metadata[key]
 
 
-wiki_link_pattern = re.compile(r"\[\[(.*?)(\|(.*?))?\]\]")
-youtube_pattern = r"!\[(.*?)\]\((https:\/\/www\.youtube\.com\/watch\?v=([a-zA-Z0-9_-]+)|https:\/\/youtu\.be\/([a-zA-Z0-9_-]+))\)"
+CODE_TABS_START = "{{< code_tabs >}}"
+CODE_TABS_END = "{{< /code_tabs >}}"
+RELATED_PROBLEMS_EXPANDER = "{{< related_problems_expander >}}"
+
+
+def wikilink_to_markdown(
+    link: str,
+    alias: str | None,
+    link_resolver: LinkResolver,
+    current_file_hugo_section: str | None = None,
+) -> str:
+    """Renders the wiki link `[[link|alias]]`, alias is None without a pipe."""
+    link = link.strip()
+    alias = alias if alias is not None else link
+
+    link_parts = link.split("#", 1)
+    section = ""
+    if len(link_parts) > 1:
+        link = link_parts[0]
+        section = link_parts[1]
+
+    note = link_resolver.resolve(link)
+    if note.kind != LINK_KIND_NOTE:
+        # alternate links of non published notes and assets are plain links
+        return f"[{alias}]({note.url})"
+
+    link_slug = note.slug
+    section_slug = link_resolver.section_slug(section) if section else ""
+
+    if section_slug:
+        section_slug = "#" + section_slug
+
+    if not link_slug:
+        # Handle links like [[#header]]
+        hugo_link = f"{section_slug}"
+    else:
+        section_slug = "/" + section_slug if section_slug else ""
+        hugo_link = link_resolver.relref(note, current_file_hugo_section) + section_slug
+
+    # Replace with your actual Hugo shortcode format for links.
+    # Here I'm assuming a hypothetical Hugo shortcode for links like: {{< link "url" "text" >}}
+    return '[{}]({{{{< relref "{}" >}}}})'.format(alias, hugo_link)
 
 
 def replace_wikilinks_with_markdown_links(
@@ -134,120 +181,65 @@ def replace_wikilinks_with_markdown_links(
     file_name_to_alternate_link_dict: dict[str, str] = {},
     input_file_path: str = "",
     file_name_to_path_dict: dict[str, str] = {},
+    vault_index: VaultIndex | None = None,
+    code_regions: CodeRegions | None = None,
+    link_resolver: LinkResolver | None = None,
 ) -> str:
-    # Function to convert wiki link to Hugo format
-    def is_inside_code_block(start_index: int, end_index: int, text: str) -> bool:
-        """
-        Checks if the given indices fall inside a code block or inline code.
-        """
-        for pattern in [code_block_pattern, inline_code_pattern]:
-            for match in re.finditer(pattern, text):
-                if (
-                    match.start() <= start_index < match.end()
-                    or match.start() < end_index <= match.end()
-                ):
-                    return True
-        return False
+    if vault_index is None:
+        vault_index = VaultIndex()
+    if code_regions is None:
+        code_regions = find_code_regions(content)
+    if link_resolver is None:
+        link_resolver = LinkResolver(
+            file_name_to_path_dict, file_name_to_alternate_link_dict, vault_index
+        )
+    current_file_hugo_section = (
+        vault_index.get_hugo_section(input_file_path) if input_file_path else None
+    )
 
+    # Function to convert wiki link to Hugo format
     def wikilink_to_markdown_replacer(match: re.Match) -> str:
 
-        if is_inside_code_block(match.start(), match.end(), content):
+        if code_regions.overlaps(match.start(), match.end()):
             return match.group(0)  # Return the original text if within a code block
-        link = match.group(1).strip()
-        alias = match.group(3) if match.group(2) else link
-
-        link_parts = link.split("#", 1)
-        section = ""
-        if len(link_parts) > 1:
-            link = link_parts[0]
-            section = link_parts[1]
-
-        # handle non published links as external links
-        if link in file_name_to_alternate_link_dict:
-            print(link)
-            external_link = file_name_to_alternate_link_dict[link]
-            return f"[{alias}]({external_link})"
-
-        link_slug = slugify_filename(link)
-        section_slug = slugify_section(section) if section else ""
-
-        if section_slug:
-            section_slug = "#" + section_slug
-
-        if link_slug.lower().endswith(".excalidraw"):
-            link_slug = re.sub(
-                r"\.excalidraw$", ".excalidraw.png", link_slug, flags=re.IGNORECASE
-            )
-            from obsidian_se_hugo.file_util import EXCALIDRAW_SUBDIR
-
-            return "[{}]({})".format(
-                alias, f"/images/obsidian/{EXCALIDRAW_SUBDIR}/" + link_slug
-            )
+        return wikilink_to_markdown(
+            match.group(1),
+            match.group(3) if match.group(2) else None,
+            link_resolver,
+            current_file_hugo_section,
+        )
 
-        if re.search(r"\.(png|jpg|jpeg|gif|svg|webp)$", link_slug, re.IGNORECASE):
-            # Determine the appropriate subdirectory based on file type
-            if link_slug.lower().endswith(".gif"):
-                # GIF files go to content images directory
-                return "[{}]({})".format(alias, "/images/content/" + link_slug)
-            else:
-                # Regular images go to regular subdirectory
-                from obsidian_se_hugo.file_util import REGULAR_IMAGES_SUBDIR
-
-                return "[{}]({})".format(
-                    alias, f"/images/obsidian/{REGULAR_IMAGES_SUBDIR}/" + link_slug
-                )
+    return wiki_link_pattern.sub(wikilink_to_markdown_replacer, content)
 
-        if not link_slug:
-            # Handle links like [[#header]]
-            hugo_link = f"{section_slug}"
-        else:
-            section_slug = "/" + section_slug if section_slug else ""
 
-            current_file_hugo_section = (
-                get_hugo_section(input_file_path) if input_file_path else None
-            )
-            outgoing_file_name = link + ".md"
-            outgoing_file_path = file_name_to_path_dict.get(outgoing_file_name)
-            outgoing_hugo_section = None
-            if outgoing_file_path and os.path.exists(outgoing_file_path):
-                outgoing_hugo_section = get_hugo_section(outgoing_file_path)
-
-            def is_cs_problems(section):
-                return section and section.startswith("cs/problems")
-
-            if (
-                outgoing_hugo_section
-                and not (
-                    is_cs_problems(outgoing_hugo_section)
-                    and is_cs_problems(current_file_hugo_section)
-                )
-                and outgoing_hugo_section != current_file_hugo_section
-            ):
-                if is_cs_problems(outgoing_hugo_section):
-                    hugo_link = f"/cs/problems/{link_slug}.md{section_slug}"
-                else:
-                    hugo_link = f"/{outgoing_hugo_section}/{link_slug}.md{section_slug}"
-            else:
-                hugo_link = f"{link_slug}.md{section_slug}"
-
-        # Replace with your actual Hugo shortcode format for links.
-        # Here I'm assuming a hypothetical Hugo shortcode for links like: {{< link "url" "text" >}}
-        return '[{}]({{{{< relref "{}" >}}}})'.format(alias, hugo_link)
-
-    return wiki_link_pattern.sub(wikilink_to_markdown_replacer, content)
+def youtube_to_shortcode(alias: str, youtube_id: str) -> str:
+    alias = alias.strip()
+    youtube_id = youtube_id.strip()
+    title_part = f' title="{alias}"' if alias else ""
+    return f'{{{{< youtube id="{youtube_id}"{title_part} >}}}}'
 
 
 def replace_youtube_links_with_hugo_format_links(content: str) -> str:
     # Function to convert youtube link to Hugo format
     def youtube_to_markdown_replacer(match: re.Match) -> str:
-        alias = match.group(1).strip()
         # Extract video id from either type of URL
         youtube_id = match.group(3) if match.group(3) is not None else match.group(4)
-        youtube_id = youtube_id.strip()
-        title_part = f' title="{alias}"' if alias else ""
-        return f'{{{{< youtube id="{youtube_id}"{title_part} >}}}}'
+        return youtube_to_shortcode(match.group(1), youtube_id)
+
+    return youtube_pattern.sub(youtube_to_markdown_replacer, content)
 
-    return re.sub(youtube_pattern, youtube_to_markdown_replacer, content)
+
+def escape_latex(latex_content: str) -> str:
+    """Escapes the content of a `$$ ... $$` expression and re-wraps it."""
+    # Replace "\\" with "\\\\"
+    updated_latex_content = latex_content.replace("\\\\", "\\\\\\\\")
+    updated_latex_content = latex_escaped_dollar_pattern.sub(r"\\\\$", updated_latex_content)
+    updated_latex_content = latex_escaped_hash_pattern.sub(r"\\\\#", updated_latex_content)
+    updated_latex_content = updated_latex_content.replace(
+        "\\cellcolor", "\\colorbox"
+    )
+    updated_latex_content = latex_yellow_orange_pattern.sub(r"orange", updated_latex_content)
+    return f"$${updated_latex_content}$$"
 
 
 def replace_latex_syntax(content: str) -> str:
@@ -257,20 +249,10 @@ def replace_latex_syntax(content: str) -> str:
     """
 
     def latex_replacer(match: re.Match) -> str:
-        latex_content = match.group(1)
-        # Replace "\\" with "\\\\"
-        updated_latex_content = latex_content.replace("\\\\", "\\\\\\\\")
-        updated_latex_content = re.sub(r"\\\$", r"\\\\$", updated_latex_content)
-        updated_latex_content = re.sub(r"\\\#", r"\\\\#", updated_latex_content)
-        updated_latex_content = updated_latex_content.replace(
-            "\\cellcolor", "\\colorbox"
-        )
-        updated_latex_content = re.sub(r"YellowOrange", r"orange", updated_latex_content)
-        return f"$${updated_latex_content}$$"
+        return escape_latex(match.group(1))
 
     # Regex pattern to find LaTeX expressions between $$
-    latex_pattern = re.compile(r"\$\$(.*?)\$\$", re.DOTALL)
-    updated_content = re.sub(latex_pattern, latex_replacer, content)
+    updated_content = latex_pattern.sub(latex_replacer, content)
 
     return updated_content
 
@@ -279,72 +261,288 @@ def insert_code_tabs(content: str) -> str:
     # Regex to find "#### Code" sections and insert `{{< code_tabs >}}` and `{{< /code_tabs >}}`
     # Match content after "#### Code"
     # until the next "#### " or "### " OR "## " end of file
-    pattern = r"(#### Code\s*\n\n)(.*?)(?=\n## |\n### |\n#### |\Z)"
-
     def replacer(match):
         code_section = match.group(2).strip()
         # Wrap the code section with `{{< code_tabs >}}` and `{{< /code_tabs >}}`
-        return f"{match.group(1)}{{{{< code_tabs >}}}}\n{code_section}\n{{{{< /code_tabs >}}}}"
+        return f"{match.group(1)}{CODE_TABS_START}\n{code_section}\n{CODE_TABS_END}"
 
     # Replace all matches in the content
-    updated_content = re.sub(pattern, replacer, content, flags=re.DOTALL)
+    updated_content = code_tabs_section_pattern.sub(replacer, content)
 
     return updated_content
 
 
 def insert_related_problems(content: str) -> str:
     # Insert before the first '## Solution'
-    pattern = r"(^|\n)(## Solution)"
-    replacement = r"\1{{< related_problems_expander >}}\n\2"
-    new_content, count = re.subn(pattern, replacement, content, count=1)
+    replacement = r"\1" + RELATED_PROBLEMS_EXPANDER + r"\n\2"
+    new_content, count = solution_heading_pattern.subn(replacement, content, count=1)
     if count == 0:
         # If '## Solution' not found, optionally insert at the end or skip
         pass
     return new_content
 
 
+@dataclass
+class ConversionContext:
+    """What the body transforms need to know about the note being converted."""
+
+    input_file_path: str
+    hugo_section: str | None
+    metadata: dict
+    link_resolver: LinkResolver
+
+
+class TopicCategoriesTransform(Transform):
+    """Publishes the front matter topic as categories, some topics as several."""
+
+    name = "topic_categories"
+
+    def __init__(self, categories: dict[str, list[str]] | None = None):
+        self.categories = topic_to_category if categories is None else categories
+
+    def front_matter(self, metadata: dict) -> None:
+        if "topic" in metadata:
+            topic = metadata["topic"]
+            metadata["categories"] = self.categories.get(topic, [topic])
+
+
+class WikiLinkTransform(Transform):
+    name = "wikilinks"
+    tokens = {"wikilink": wiki_link_pattern.pattern}
+    requires = ("[[",)
+
+    def handle(self, token, out, context, state) -> bool:
+        out.write(
+            wikilink_to_markdown(
+                token.group(1),
+                token.group(3) if token.group(2) else None,
+                context.link_resolver,
+                context.hugo_section,
+            )
+        )
+        return True
+
+
+class YoutubeTransform(Transform):
+    name = "youtube"
+    tokens = {"youtube": youtube_pattern.pattern}
+    requires = ("https://www.youtube.com/watch?v=", "https://youtu.be/")
+
+    def handle(self, token, out, context, state) -> bool:
+        youtube_id = token.group(3) if token.group(3) is not None else token.group(4)
+        out.write(youtube_to_shortcode(token.group(1), youtube_id))
+        return True
+
+
+class LatexTransform(Transform):
+    name = "latex"
+    tokens = {"latex": latex_pattern.pattern}
+    paragraph_openers = ("$$",)
+    requires = ("$$",)
+
+    def handle(self, token, out, context, state) -> bool:
+        out.write(escape_latex(token.group(1)))
+        return True
+
+
+class CodeTabsTransform(Transform):
+    """Streaming version of `insert_code_tabs`.
+
+    A "#### Code" section is wrapped when it starts and closed at the next
+    level 2-4 heading or at the end of the note, headings inside code do not
+    end it.
+    """
+
+    name = "code_tabs"
+    tokens = {
+        "code_tabs": code_tabs_heading_pattern.pattern,
+        "heading": heading_pattern.pattern,
+    }
+    requires = ("#### Code",)
+
+    def begin(self, context) -> SimpleNamespace:
+        return SimpleNamespace(mark=None)
+
+    def _close(self, out, state) -> None:
+        if state.mark is not None:
+            out.rstrip(state.mark)
+            out.write(f"\n{CODE_TABS_END}")
+            state.mark = None
+
+    def handle(self, token, out, context, state) -> bool:
+        if state.mark is not None:
+            # the newline in front of the heading is part of the section, it gets stripped
+            self._close(out, state)
+            out.write("\n")
+        if token.kind != "code_tabs":
+            return False
+        out.write(f"{token.text}{CODE_TABS_START}\n")
+        state.mark = out.mark()
+        out.strip_leading_whitespace()
+        return True
+
+    def end(self, out, context, state) -> None:
+        self._close(out, state)
+
+
+class RelatedProblemsTransform(Transform):
+    """Streaming version of `insert_related_problems`, for notes with related problems."""
+
+    name = "related_problems"
+    tokens = {"heading": heading_pattern.pattern}
+    requires = ("## Solution",)
+
+    def begin(self, context) -> SimpleNamespace | None:
+        if context.metadata.get("related_problems"):
+            return SimpleNamespace(inserted=False)
+        return None
+
+    def handle(self, token, out, context, state) -> bool:
+        if not state.inserted and token.string.startswith("## Solution", token.start()):
+            out.write(f"{RELATED_PROBLEMS_EXPANDER}\n")
+            state.inserted = True
+        return False
+
+
+# (hugo_section globs, transform names), used when hconfig.yaml has no `transforms`
+DEFAULT_TRANSFORM_RULES = [
+    (["*"], ["topic_categories", "wikilinks", "youtube", "latex", "code_tabs"]),
+    (["cs/problems/*"], ["related_problems"]),
+]
+
+
+def hugo_transforms(topic_categories: dict[str, list[str]] | None = None) -> list[Transform]:
+    """Returns every transform a note can get, in the order they are applied."""
+    return [
+        TopicCategoriesTransform(topic_categories),
+        WikiLinkTransform(),
+        YoutubeTransform(),
+        LatexTransform(),
+        CodeTabsTransform(),
+        RelatedProblemsTransform(),
+    ]
+
+
+def create_transform_registry(hugo_config: HugoConfig | None = None) -> TransformRegistry:
+    """Returns the registry of the `transforms` and `topic_categories` in hconfig.yaml."""
+    rules = DEFAULT_TRANSFORM_RULES
+    topic_categories = None
+    if hugo_config is not None:
+        if hugo_config.transforms is not None:
+            rules = [(rule.sections, rule.plugins) for rule in hugo_config.transforms]
+        topic_categories = hugo_config.topic_categories
+    return TransformRegistry(hugo_transforms(topic_categories), rules)
+
+
+default_transform_registry = create_transform_registry()
+# every body transform at once, whatever the section
+hugo_transform_pipeline = TransformPipeline(
+    [transform for transform in hugo_transforms() if transform.tokens]
+)
+
+
 def convert_markdown_file_to_hugo_format(
     input_file_path: str,
     output_file_path: str,
     allowed_keys: set[str] = set(),
     file_name_to_alternate_link_dict: dict[str, str] = {},
     file_name_to_path_dict: dict[str, str] = {},
+    vault_index: VaultIndex | None = None,
+    link_resolver: LinkResolver | None = None,
+    output_writer: OutputWriter | None = None,
+    transforms: TransformRegistry | None = None,
+    problem_catalog: ProblemCatalog | None = None,
 ) -> None:
-    post = frontmatter.load(input_file_path)
+    """Converts a note and writes it, unless the output already holds it.
+
+    With an `output_writer` the converted note is queued and written on its
+    thread, large notes are always streamed from the calling thread. The note
+    gets the `transforms` of its hugo section, the default rules without them.
+    """
+    if vault_index is None:
+        vault_index = VaultIndex()
+    if transforms is None:
+        transforms = default_transform_registry
+    if link_resolver is None:
+        link_resolver = LinkResolver(
+            file_name_to_path_dict, file_name_to_alternate_link_dict, vault_index
+        )
+    streaming = os.path.getsize(input_file_path) >= STREAMING_THRESHOLD_BYTES
+    if streaming:
+        # only the header is loaded, the body is read while it is written
+        post = frontmatter.Post("")
+        post.metadata = vault_index.load_metadata(input_file_path)
+    else:
+        post = vault_index.load_post(input_file_path)
+    hugo_section = vault_index.get_hugo_section(input_file_path)
     try:
-        change_front_matter(post, allowed_keys, input_file_path, file_name_to_path_dict)
+        change_front_matter(
+            post,
+            allowed_keys,
+            input_file_path,
+            file_name_to_path_dict,
+            vault_index,
+            transforms.transforms_for(hugo_section),
+            link_resolver,
+            problem_catalog,
+        )
     except Exception as e:
         logging.error(f"Error in front matter of {input_file_path}: {e}")
         raise e
 
-    content = post.content
-    # replace wikilinks with markdown links
-    new_content = replace_wikilinks_with_markdown_links(
-        content,
-        file_name_to_alternate_link_dict,
-        input_file_path,
-        file_name_to_path_dict,
+    context = ConversionContext(
+        input_file_path=input_file_path,
+        hugo_section=hugo_section,
+        metadata=post.metadata,
+        link_resolver=link_resolver,
     )
-    # replace youtube links with hugo format
-    new_content = replace_youtube_links_with_hugo_format_links(new_content)
-    new_content = replace_latex_syntax(new_content)
-    new_content = insert_code_tabs(new_content)
+    if streaming:
+        stream_hugo_file(
+            input_file_path,
+            output_file_path,
+            post,
+            context,
+            vault_index,
+            transforms.pipeline(hugo_section),
+        )
+        return
+    # wikilinks, youtube links, latex, code tabs and the related problems
+    # partial are all rewritten in a single scan of the content, which is
+    # skipped when the note contains nothing any of them rewrites
+    pipeline = transforms.pipeline(hugo_section, post.content)
+    if pipeline.transforms:
+        post.content = pipeline.run(post.content, context)
+    else:
+        metrics.count(NOTES_NOT_SCANNED)
 
-    # Insert related_posts partial if conditions are met
-    hugo_section = get_hugo_section(input_file_path)
-    if (
-        hugo_section
-        and hugo_section.startswith("cs/problems/")
-        and post.metadata.get("related_problems")
-    ):
-        new_content = insert_related_problems(new_content)
+    # Manually serialize the front matter and content
+    front_matter_str = frontmatter.dumps(post)
+    if output_writer is None:
+        write_if_changed(output_file_path, front_matter_str.encode("utf-8"))
+    else:
+        output_writer.write(output_file_path, front_matter_str)
 
-    post.content = new_content
 
-    with open(output_file_path, "w", encoding="utf-8") as output_file:
-        # Manually serialize the front matter and content
-        front_matter_str = frontmatter.dumps(post)
-        output_file.write(front_matter_str)
+def stream_hugo_file(
+    input_file_path: str,
+    output_file_path: str,
+    post: frontmatter.Post,
+    context: ConversionContext,
+    vault_index: VaultIndex,
+    pipeline: TransformPipeline = hugo_transform_pipeline,
+) -> None:
+    """Writes a converted note chunk by chunk, with the front matter of `post`.
+
+    The output is the same as `frontmatter.dumps` of the post with its whole
+    body converted, but peak memory does not grow with the size of the note.
+    """
+    with atomic_text_output(output_file_path) as output_file:
+        output_file.write(frontmatter.dumps(post))
+        out = OutputBuffer(sink=output_file.write)
+        # dropped again with the trailing whitespace when the body is empty
+        out.write("\n\n")
+        pipeline.run_lines(vault_index.read_body_lines(input_file_path), out, context)
+        output_file.write(out.getvalue().rstrip())
 
 
 def slugify_filename(input_filename: str) -> str:
@@ -363,7 +561,7 @@ def slugify_filename(input_filename: str) -> str:
         file_extension = ""
 
     # Replace any sequence of non-alphanumeric characters (except hyphens) with a hyphen
-    slugified = re.sub(r"[^a-z0-9]+", "-", filename_base)
+    slugified = slug_separator_pattern.sub("-", filename_base)
 
     # Return the slugified filename with the extension preserved
     return slugified + file_extension
@@ -373,7 +571,7 @@ def slugify_section(input: str) -> str:
     output = input.lower()
 
     # Replace spaces with a single hyphen
-    output = re.sub(r"\s+", "-", output)
+    output = whitespace_pattern.sub("-", output)
 
     return output
 
@@ -383,14 +581,134 @@ def copy_markdown_files_in_hugo_format(
     notes_destination_dir: str,
     file_name_to_path_dict: dict[str, str],
     allowed_keys=set[str](),
+    vault_index: VaultIndex | None = None,
 ):
+    if vault_index is None:
+        vault_index = VaultIndex()
+    link_resolver = LinkResolver(file_name_to_path_dict, {}, vault_index)
     for link in reachable_links:
         logging.info(f"Converting ({link}) to hugo format")
         file_path = file_name_to_path_dict[link + ".md"]
         new_file_name = slugify_filename(link)
         new_file_name = new_file_name + ".md"
         new_path = os.path.join(notes_destination_dir, new_file_name)
-        convert_markdown_file_to_hugo_format(file_path, new_path, allowed_keys)
+        convert_markdown_file_to_hugo_format(
+            file_path,
+            new_path,
+            allowed_keys,
+            vault_index=vault_index,
+            link_resolver=link_resolver,
+        )
+
+
+def get_hugo_output_path(
+    link: str,
+    hugo_content_dir: str,
+    file_name_to_path_dict: dict[str, str],
+    vault_index: VaultIndex,
+) -> str | None:
+    """Returns where a note is written to, or None for non publishable notes."""
+    file_path = file_name_to_path_dict[link + ".md"]
+    notes_destination_dir = vault_index.get_hugo_section(file_path)
+    if not notes_destination_dir:
+        return None
+    new_file_name = slugify_filename(link) + ".md"
+    return os.path.join(hugo_content_dir, notes_destination_dir, new_file_name)
+
+
+@dataclass
+class ConversionResult:
+    """Outcome of converting a batch of notes.
+
+    `written` maps a note name to its output path, `errors` maps the notes
+    that could not be converted to the error message and `seconds` maps every
+    note to its conversion time. `counters` carries the metrics counters of a
+    worker process back to the parent.
+    """
+
+    written: dict[str, str] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    seconds: dict[str, float] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+
+    def update(self, other: "ConversionResult") -> None:
+        self.written.update(other.written)
+        self.errors.update(other.errors)
+        self.seconds.update(other.seconds)
+
+
+def convert_links_using_hugo_section(
+    links: list[str],
+    hugo_content_dir: str,
+    file_name_to_path_dict: dict[str, str],
+    allowed_keys: set[str],
+    file_name_to_alternate_link_dict: dict[str, str],
+    vault_index: VaultIndex,
+    link_resolver: LinkResolver | None = None,
+    transforms: TransformRegistry | None = None,
+    problem_catalog: ProblemCatalog | None = None,
+) -> ConversionResult:
+    if link_resolver is None:
+        link_resolver = LinkResolver(
+            file_name_to_path_dict, file_name_to_alternate_link_dict, vault_index
+        )
+    if problem_catalog is None:
+        problem_catalog = ProblemCatalog(link_resolver)
+    result = ConversionResult()
+    with OutputWriter() as output_writer:
+        for link in links:
+            logging.info(f"Converting ({link}) to hugo format")
+            started = time.perf_counter()
+            try:
+                file_path = file_name_to_path_dict[link + ".md"]
+                new_path = get_hugo_output_path(
+                    link, hugo_content_dir, file_name_to_path_dict, vault_index
+                )
+                if not new_path:
+                    # non publishable links
+                    continue
+                convert_markdown_file_to_hugo_format(
+                    file_path,
+                    new_path,
+                    allowed_keys,
+                    file_name_to_alternate_link_dict,
+                    file_name_to_path_dict=file_name_to_path_dict,
+                    vault_index=vault_index,
+                    link_resolver=link_resolver,
+                    output_writer=output_writer,
+                    transforms=transforms,
+                    problem_catalog=problem_catalog,
+                )
+                result.written[link] = new_path
+            except Exception as e:
+                logging.error(f"Failed to convert ({link}): {e}")
+                result.errors[link] = f"{type(e).__name__}: {e}"
+            result.seconds[link] = time.perf_counter() - started
+
+    # writes fail after their note was converted
+    links_by_path = {path: link for link, path in result.written.items()}
+    for path, error in output_writer.errors.items():
+        link = links_by_path[path]
+        logging.error(f"Failed to write ({link}): {error}")
+        del result.written[link]
+        result.errors[link] = error
+    return result
+
+
+# Read-only state of a conversion worker process, set once by its initializer
+_worker_args: tuple | None = None
+
+
+def _init_conversion_worker(*args) -> None:
+    global _worker_args
+    _worker_args = args
+
+
+def _convert_links_in_worker(links: list[str]) -> ConversionResult:
+    metrics.reset()
+    result = convert_links_using_hugo_section(links, *_worker_args)
+    result.counters = dict(metrics.counters)
+    return result
 
 
 def copy_markdown_files_using_hugo_section(
@@ -399,21 +717,57 @@ def copy_markdown_files_using_hugo_section(
     file_name_to_path_dict: dict[str, str],
     allowed_keys=set[str](),
     file_name_to_alternate_link_dict: dict[str, str] = {},
-):
-    for link in reachable_links:
-        logging.info(f"Converting ({link}) to hugo format")
-        file_path = file_name_to_path_dict[link + ".md"]
-        new_file_name = slugify_filename(link)
-        new_file_name = new_file_name + ".md"
-        notes_destination_dir = get_hugo_section(file_path)
-        if not notes_destination_dir:
-            # non publishable links
-            continue
-        new_path = os.path.join(hugo_content_dir, notes_destination_dir, new_file_name)
-        convert_markdown_file_to_hugo_format(
-            file_path,
-            new_path,
-            allowed_keys,
-            file_name_to_alternate_link_dict,
-            file_name_to_path_dict=file_name_to_path_dict,
+    vault_index: VaultIndex | None = None,
+    jobs: int = 1,
+    link_resolver: LinkResolver | None = None,
+    transforms: TransformRegistry | None = None,
+    problem_catalog: ProblemCatalog | None = None,
+) -> ConversionResult:
+    """Converts the notes into the content directory of their hugo section.
+
+    A note that fails to convert does not stop the others, its error is
+    collected in the returned result instead.
+
+    Args:
+        jobs: Number of worker processes, notes are converted in chunks and
+            the read-only lookup tables are sent to every worker once.
+        problem_catalog: Targets of `related_problems`, built from the vault
+            index without it.
+    """
+    if vault_index is None:
+        vault_index = VaultIndex()
+    if link_resolver is None:
+        link_resolver = LinkResolver(
+            file_name_to_path_dict, file_name_to_alternate_link_dict, vault_index
         )
+    if problem_catalog is None:
+        problem_catalog = ProblemCatalog.from_index(link_resolver)
+    shared_args = (
+        hugo_content_dir,
+        file_name_to_path_dict,
+        allowed_keys,
+        file_name_to_alternate_link_dict,
+        vault_index,
+        link_resolver,
+        transforms,
+        problem_catalog,
+    )
+    if jobs <= 1 or len(reachable_links) <= 1:
+        return convert_links_using_hugo_section(reachable_links, *shared_args)
+
+    # a few chunks per worker keep them busy without paying for a task per note
+    chunk_size = max(1, math.ceil(len(reachable_links) / (jobs * 4)))
+    chunks = [
+        reachable_links[i : i + chunk_size]
+        for i in range(0, len(reachable_links), chunk_size)
+    ]
+    result = ConversionResult()
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_conversion_worker,
+        initargs=shared_args,
+    ) as executor:
+        for chunk_result in executor.map(_convert_links_in_worker, chunks):
+            result.update(chunk_result)
+            metrics.merge_counters(chunk_result.counters)
+    return result
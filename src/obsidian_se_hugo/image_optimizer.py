@@ -0,0 +1,157 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+from dataclasses import dataclass
+
+from obsidian_se_hugo.config import ImageOptimizationConfig
+from obsidian_se_hugo.output_writer import write_if_changed
+
+DEFAULT_IMAGE_CACHE_DIR = os.path.join(".cache", "obsidian-se-hugo", "images")
+# Bump when `optimize_image` writes other output for the same settings
+IMAGE_CACHE_VERSION = 1
+# appended to the image name, so that a.png and a.jpg do not collide, WebP
+# images keep their name
+OPTIMIZED_IMAGE_SUFFIX = ".webp"
+
+
+@dataclass
+class OptimizeStats:
+    optimized: int = 0
+    cached: int = 0
+    failed: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"optimized {self.optimized}, cached {self.cached}, failed {self.failed} images, "
+            f"{self.bytes_in} bytes to {self.bytes_out} bytes"
+        )
+
+
+def pillow_available() -> bool:
+    return importlib.util.find_spec("PIL") is not None
+
+
+def image_optimization_settings(image_config: ImageOptimizationConfig | None) -> list | None:
+    """Returns the settings the optimized images depend on, None when images are copied."""
+    if image_config is None or not pillow_available():
+        return None
+    return [image_config.max_width, image_config.quality]
+
+
+def optimized_destination(destination_path: str) -> str:
+    if destination_path.lower().endswith(OPTIMIZED_IMAGE_SUFFIX):
+        return destination_path
+    return destination_path + OPTIMIZED_IMAGE_SUFFIX
+
+
+def optimize_image(source_path: str, output_path: str, max_width: int, quality: int) -> None:
+    """Writes the image at `source_path` as WebP, scaled down to at most `max_width`.
+
+    The EXIF orientation is applied, then EXIF and all other metadata are
+    dropped.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+    if image.width > max_width:
+        height = max(1, round(image.height * max_width / image.width))
+        image = image.resize((max_width, height), Image.LANCZOS)
+    if image.mode not in ("RGB", "RGBA"):
+        transparent = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+    image.save(output_path, "WEBP", quality=quality, method=6)
+
+
+def _optimize_into_cache(args: tuple[str, str, int, int]) -> str | None:
+    """Runs `optimize_image` in a worker, returns the error if it failed."""
+    source_path, cached_path, max_width, quality = args
+    temp_path = f"{cached_path}.{os.getpid()}.tmp"
+    try:
+        optimize_image(source_path, temp_path, max_width, quality)
+        os.replace(temp_path, cached_path)
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+class ImageOptimizer:
+    """Resizes images and converts them to WebP with Pillow, on a process pool.
+
+    Results are cached by the sha256 of the source and the settings, so an
+    image is only processed again when it or the settings changed.
+    """
+
+    def __init__(
+        self,
+        max_width: int,
+        quality: int,
+        cache_dir: str = DEFAULT_IMAGE_CACHE_DIR,
+        jobs: int | None = None,
+    ):
+        self.max_width = max_width
+        self.quality = quality
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+
+    def _cached_path(self, source_sha256: str) -> str:
+        settings = [IMAGE_CACHE_VERSION, source_sha256, self.max_width, self.quality]
+        key = hashlib.sha256(json.dumps(settings).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + OPTIMIZED_IMAGE_SUFFIX)
+
+    def optimize(
+        self, images: list[tuple[str, str, str]]
+    ) -> tuple[list[tuple[str, str, str]], OptimizeStats]:
+        """Optimizes (source path, source sha256, destination path) images.
+
+        Returns:
+            The images that could not be optimized, and the statistics.
+        """
+        stats = OptimizeStats()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # cache path -> source path, each distinct source is processed once
+        pending: dict[str, str] = {}
+        for source_path, source_sha256, _ in images:
+            cached_path = self._cached_path(source_sha256)
+            if not os.path.isfile(cached_path):
+                pending.setdefault(cached_path, source_path)
+
+        tasks = [
+            (source_path, cached_path, self.max_width, self.quality)
+            for cached_path, source_path in pending.items()
+        ]
+        if len(tasks) <= 1:
+            errors = [_optimize_into_cache(task) for task in tasks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+                errors = list(executor.map(_optimize_into_cache, tasks))
+        for (source_path, _, _, _), error in zip(tasks, errors):
+            if error is not None:
+                logging.warning(f"Could not optimize {source_path}: {error}")
+
+        failed = []
+        for source_path, source_sha256, destination_path in images:
+            cached_path = self._cached_path(source_sha256)
+            if not os.path.isfile(cached_path):
+                failed.append((source_path, source_sha256, destination_path))
+                continue
+            if cached_path in pending:
+                stats.optimized += 1
+            else:
+                stats.cached += 1
+            with open(cached_path, "rb") as f:
+                data = f.read()
+            os.makedirs(os.path.dirname(destination_path), exist_ok=True)
+            write_if_changed(destination_path, data)
+            stats.bytes_in += os.path.getsize(source_path)
+            stats.bytes_out += len(data)
+        stats.failed = len(failed)
+        return failed, stats
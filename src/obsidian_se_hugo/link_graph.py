@@ -0,0 +1,289 @@
+import logging
+import os
+import pickle
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+
+from obsidian_se_hugo.file_util import has_extension
+from obsidian_se_hugo.hyperlink import Hyperlink
+
+if TYPE_CHECKING:
+    from obsidian_se_hugo.vault_index import VaultIndex
+
+DEFAULT_LINK_GRAPH_PATH = os.path.join(".cache", "obsidian-se-hugo", "link-graph.pickle")
+# Bump when the saved layout changes, older files are then ignored
+LINK_GRAPH_VERSION = 2
+
+NODE_NOTE = 0
+NODE_ASSET = 1
+# a link target which is neither a note of the vault nor an asset
+NODE_MISSING = 2
+# a note which was deleted, see `LinkGraph.update`
+NODE_REMOVED = 3
+
+
+class LinkGraph:
+    """The wiki links of the vault, with forward and backward adjacency.
+
+    Notes are identified by their path, assets by their file name and
+    missing notes by the `<name>.md` they are linked as. Every node name is
+    interned to an integer id, and edges are kept in `array`s: appended as
+    (source, target) pairs while the graph is built, then indexed in CSR
+    form (an offset per node into one flat target array) per direction, the
+    first time a query needs them. A note linking several times to the same
+    target has a single edge to it.
+
+    `note_states` are the (mtime, size) of the notes the graph was built
+    from, by path. They are saved with it, see `load_or_build`.
+    """
+
+    def __init__(self):
+        self._names: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._kinds = bytearray()
+        self._sources = array("I")
+        self._targets = array("I")
+        self._forward: tuple[array, array] | None = None
+        self._backward: tuple[array, array] | None = None
+        self.note_states: dict[str, tuple[int, int]] = {}
+
+    @classmethod
+    def from_index(
+        cls, vault_index: "VaultIndex", file_name_to_path_dict: dict[str, str]
+    ) -> "LinkGraph":
+        """Builds the graph of every note in the index."""
+        graph = cls()
+        for record in vault_index:
+            graph.add_note(record.path, record.wiki_links, file_name_to_path_dict)
+        logging.info(
+            f"Link graph: {graph.note_count()} notes, {graph.edge_count()} links"
+        )
+        return graph
+
+    @classmethod
+    def load_or_build(
+        cls,
+        graph_path: str,
+        note_states: dict[str, tuple[int, int]],
+        vault_index: "VaultIndex",
+        file_name_to_path_dict: dict[str, str],
+    ) -> "LinkGraph":
+        """Loads the saved graph and updates it for the notes which changed since.
+
+        Notes are changed when their state in `note_states` differs from the
+        saved one. Without a saved graph, it is built from the index.
+        """
+        graph = cls.load(graph_path)
+        if graph is None:
+            graph = cls.from_index(vault_index, file_name_to_path_dict)
+        else:
+            changed = {
+                file_path
+                for file_path in note_states.keys() | graph.note_states.keys()
+                if note_states.get(file_path) != graph.note_states.get(file_path)
+            }
+            graph.update(changed, vault_index, file_name_to_path_dict)
+            logging.info(f"Link graph: loaded from {graph_path}, {len(changed)} notes changed")
+        graph.note_states = note_states
+        return graph
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def note_count(self) -> int:
+        return self._kinds.count(NODE_NOTE)
+
+    def edge_count(self) -> int:
+        return len(self._sources)
+
+    def _intern(self, name: str, kind: int) -> int:
+        node = self._ids.get(name)
+        if node is None:
+            node = len(self._names)
+            self._ids[name] = node
+            self._names.append(name)
+            self._kinds.append(kind)
+        else:
+            # a removed note may come back
+            self._kinds[node] = kind
+        return node
+
+    def add_note(
+        self,
+        file_path: str,
+        wiki_links: list[Hyperlink],
+        file_name_to_path_dict: dict[str, str],
+    ) -> None:
+        """Adds a note and its links, resolved like `graph_util.bfs` does.
+
+        Every note is added once, edges are not deduplicated across calls.
+        """
+        source = self._intern(file_path, NODE_NOTE)
+        targets = {}
+        for hyperlink in wiki_links:
+            link = hyperlink.link
+            if has_extension(link):
+                targets.setdefault(self._intern(link, NODE_ASSET), None)
+                continue
+            file_link = link.split("#", 1)[0]
+            if not file_link:
+                # [[#header]] links stay inside the note
+                continue
+            markdown_link = file_link + ".md"
+            target_path = file_name_to_path_dict.get(markdown_link)
+            if target_path is None:
+                target = self._intern(markdown_link, NODE_MISSING)
+            else:
+                target = self._intern(target_path, NODE_NOTE)
+            targets.setdefault(target, None)
+        self._sources.extend([source] * len(targets))
+        self._targets.extend(targets)
+        self._forward = self._backward = None
+
+    def update(
+        self,
+        file_paths,
+        vault_index: "VaultIndex",
+        file_name_to_path_dict: dict[str, str],
+    ) -> set[str]:
+        """Updates the graph after the notes at `file_paths` were created, changed or deleted.
+
+        The links of these notes are added again from the index, notes which
+        are no longer in it are removed. So are the links of every note linking
+        to one of their names, which may now resolve to another note.
+
+        Returns:
+            The notes whose links were added again.
+        """
+        file_paths = {str(file_path) for file_path in file_paths if str(file_path).endswith(".md")}
+        file_names = {os.path.basename(file_path) for file_path in file_paths}
+        sources = set(file_paths)
+        for node, name in enumerate(self._names):
+            if self._kinds[node] != NODE_ASSET and os.path.basename(name) in file_names:
+                sources.update(self.predecessors(name))
+
+        source_nodes = {self._ids[source] for source in sources if source in self._ids}
+        kept = [i for i, source in enumerate(self._sources) if source not in source_nodes]
+        self._sources = array("I", map(self._sources.__getitem__, kept))
+        self._targets = array("I", map(self._targets.__getitem__, kept))
+        for node in source_nodes:
+            self._kinds[node] = NODE_REMOVED
+        self._forward = self._backward = None
+
+        for source in sorted(sources):
+            if source in vault_index:
+                self.add_note(source, vault_index.get(source).wiki_links, file_name_to_path_dict)
+        return sources
+
+    def _index(self, sources: array, targets: array) -> tuple[array, array]:
+        """Groups the targets by source, returns the offsets and the grouped targets."""
+        order = sorted(range(len(sources)), key=sources.__getitem__)
+        grouped = array("I", map(targets.__getitem__, order))
+        sorted_sources = array("I", map(sources.__getitem__, order))
+        offsets = array(
+            "I", (bisect_left(sorted_sources, node) for node in range(len(self._names) + 1))
+        )
+        return offsets, grouped
+
+    def _adjacent(self, name: str, backward: bool) -> list[int]:
+        node = self._ids.get(name)
+        if node is None:
+            return []
+        if backward:
+            if self._backward is None:
+                self._backward = self._index(self._targets, self._sources)
+            offsets, grouped = self._backward
+        else:
+            if self._forward is None:
+                self._forward = self._index(self._sources, self._targets)
+            offsets, grouped = self._forward
+        return grouped[offsets[node] : offsets[node + 1]].tolist()
+
+    def successors(self, name: str) -> list[str]:
+        """Returns what a note links to."""
+        return sorted(self._names[node] for node in self._adjacent(name, backward=False))
+
+    def predecessors(self, name: str) -> list[str]:
+        """Returns the notes linking to a note, an asset or a missing note."""
+        return sorted(self._names[node] for node in self._adjacent(name, backward=True))
+
+    def note_dependencies(self, file_path: str) -> list[str]:
+        """Same as `graph_util.get_note_dependencies`, from the graph."""
+        return sorted(
+            self._names[node]
+            for node in self._adjacent(file_path, backward=False)
+            if self._kinds[node] == NODE_NOTE and self._names[node] != file_path
+        )
+
+    def dependents(self, file_paths) -> set[str]:
+        """Returns the notes which render links to any of `file_paths`."""
+        dependents = set()
+        for file_path in file_paths:
+            dependents.update(
+                self._names[node] for node in self._adjacent(file_path, backward=True)
+            )
+        return dependents
+
+    def orphans(self) -> list[str]:
+        """Returns the notes no other note links to."""
+        if self._backward is None:
+            self._backward = self._index(self._targets, self._sources)
+        offsets, grouped = self._backward
+        return sorted(
+            name
+            for node, name in enumerate(self._names)
+            if self._kinds[node] == NODE_NOTE
+            and all(grouped[i] == node for i in range(offsets[node], offsets[node + 1]))
+        )
+
+    def broken_links(self) -> dict[str, list[str]]:
+        """Maps every missing note to the notes linking to it."""
+        broken = {}
+        for node, name in sorted(enumerate(self._names), key=lambda item: item[1]):
+            if self._kinds[node] == NODE_MISSING:
+                # links to it may have been updated away
+                predecessors = self.predecessors(name)
+                if predecessors:
+                    broken[name] = predecessors
+        return broken
+
+    def save(self, graph_path: str) -> None:
+        data = {
+            "version": LINK_GRAPH_VERSION,
+            "names": self._names,
+            "kinds": bytes(self._kinds),
+            "sources": self._sources.tobytes(),
+            "targets": self._targets.tobytes(),
+            "note_states": self.note_states,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(graph_path)), exist_ok=True)
+        temp_path = graph_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, graph_path)
+
+    @classmethod
+    def load(cls, graph_path: str) -> "LinkGraph | None":
+        """Loads a saved graph, returns None when it is missing or unusable."""
+        if not os.path.isfile(graph_path):
+            return None
+        try:
+            with open(graph_path, "rb") as f:
+                data = pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable link graph {graph_path}: {e}")
+            return None
+        if data.get("version") != LINK_GRAPH_VERSION:
+            return None
+        graph = cls()
+        graph._names = data["names"]
+        graph._ids = {name: node for node, name in enumerate(graph._names)}
+        graph._kinds = bytearray(data["kinds"])
+        graph._sources.frombytes(data["sources"])
+        graph._targets.frombytes(data["targets"])
+        graph.note_states = data["note_states"]
+        return graph
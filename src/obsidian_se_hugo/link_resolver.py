@@ -0,0 +1,164 @@
+from dataclasses import dataclass, replace
+
+from obsidian_se_hugo.constants import (
+    excalidraw_extension_pattern,
+    image_extension_pattern,
+    optimizable_image_pattern,
+)
+from obsidian_se_hugo.vault_index import VaultIndex
+
+CS_PROBLEMS_SECTION = "cs/problems"
+# sections whose notes all have urls in the section itself, whatever their subsection
+DEFAULT_FLATTENED_SECTIONS = (CS_PROBLEMS_SECTION,)
+
+
+# How a wiki link target is rendered
+LINK_KIND_ALTERNATE = "alternate"
+LINK_KIND_ASSET = "asset"
+LINK_KIND_NOTE = "note"
+
+
+@dataclass(frozen=True)
+class ResolvedNote:
+    """How links to a note or an asset are rendered.
+
+    For alternate links and assets `url` is the final link target. For notes
+    it is the absolute relref target (without a header anchor), None for notes
+    that are not in the vault or have no hugo section.
+    """
+
+    name: str
+    slug: str
+    kind: str
+    hugo_section: str | None
+    url: str | None
+
+
+class LinkResolver:
+    """Memoized wiki link target lookup, built once per export.
+
+    Every distinct link target is slugified and looked up in the vault index
+    once, after that rendering a link does no filesystem or YAML work.
+    Excalidraw drawings are linked as `<name>.excalidraw<excalidraw_extension>`,
+    ".svg" when the export renders them. Assets in `asset_aliases` link to
+    the copy of the asset they duplicate. Raster images get
+    `optimized_image_suffix` appended when the export optimizes them, unless
+    they already end in it or are in `unoptimized_images`. Notes
+    in the subsections of `flattened_sections` are linked by the url of the
+    flattened section.
+    """
+
+    def __init__(
+        self,
+        file_name_to_path_dict: dict[str, str],
+        file_name_to_alternate_link_dict: dict[str, str],
+        vault_index: VaultIndex,
+        excalidraw_extension: str = ".png",
+        asset_aliases: dict[str, str] | None = None,
+        optimized_image_suffix: str = "",
+        unoptimized_images: set[str] | frozenset[str] = frozenset(),
+        flattened_sections: tuple[str, ...] | list[str] = DEFAULT_FLATTENED_SECTIONS,
+    ):
+        self.file_name_to_path_dict = file_name_to_path_dict
+        self.file_name_to_alternate_link_dict = file_name_to_alternate_link_dict
+        self.vault_index = vault_index
+        self.excalidraw_extension = excalidraw_extension
+        self.asset_aliases = asset_aliases or {}
+        self.optimized_image_suffix = optimized_image_suffix
+        self.unoptimized_images = unoptimized_images
+        self.flattened_sections = tuple(flattened_sections)
+        self._notes: dict[str, ResolvedNote] = {}
+        self._section_slugs: dict[str, str] = {}
+
+    def resolve(self, name: str) -> ResolvedNote:
+        note = self._notes.get(name)
+        if note is None:
+            note = self._resolve(name)
+            self._notes[name] = note
+        return note
+
+    def _resolve(self, name: str) -> ResolvedNote:
+        # imported here, these modules import this one
+        from obsidian_se_hugo.file_util import EXCALIDRAW_SUBDIR, REGULAR_IMAGES_SUBDIR
+        from obsidian_se_hugo.hugo_util import slugify_filename
+
+        slug = slugify_filename(name)
+
+        # handle non published links as external links
+        alternate_link = self.file_name_to_alternate_link_dict.get(name)
+        if alternate_link is not None:
+            return ResolvedNote(name, slug, LINK_KIND_ALTERNATE, None, alternate_link)
+
+        stored_name = self.asset_aliases.get(name)
+        if stored_name is not None:
+            return replace(self.resolve(stored_name), name=name, slug=slug)
+
+        if slug.lower().endswith(".excalidraw"):
+            image_slug = excalidraw_extension_pattern.sub(
+                ".excalidraw" + self.excalidraw_extension, slug
+            )
+            url = f"/images/obsidian/{EXCALIDRAW_SUBDIR}/{image_slug}"
+            return ResolvedNote(name, slug, LINK_KIND_ASSET, None, url)
+
+        if image_extension_pattern.search(slug):
+            if slug.lower().endswith(".gif"):
+                # GIF files go to content images directory
+                url = f"/images/content/{slug}"
+            else:
+                image_slug = slug
+                if (
+                    self.optimized_image_suffix
+                    and optimizable_image_pattern.search(slug)
+                    and not slug.lower().endswith(self.optimized_image_suffix)
+                    and name not in self.unoptimized_images
+                ):
+                    image_slug += self.optimized_image_suffix
+                url = f"/images/obsidian/{REGULAR_IMAGES_SUBDIR}/{image_slug}"
+            return ResolvedNote(name, slug, LINK_KIND_ASSET, None, url)
+
+        hugo_section = None
+        # paths in the dictionary come from the vault scan, so they exist
+        file_path = self.file_name_to_path_dict.get(name + ".md") if slug else None
+        if file_path:
+            hugo_section = self.vault_index.get_hugo_section(file_path)
+
+        url = None
+        if hugo_section:
+            url = f"/{self.url_section(hugo_section)}/{slug}.md"
+        return ResolvedNote(name, slug, LINK_KIND_NOTE, hugo_section, url)
+
+    def flattened_section(self, section: str | None) -> str | None:
+        """Returns the flattened section `section` belongs to, if any."""
+        if section:
+            for flattened in self.flattened_sections:
+                if section.startswith(flattened):
+                    return flattened
+        return None
+
+    def url_section(self, section: str) -> str:
+        """Returns the section in the url of the notes of `section`."""
+        return self.flattened_section(section) or section
+
+    def section_slug(self, section: str) -> str:
+        slug = self._section_slugs.get(section)
+        if slug is None:
+            from obsidian_se_hugo.hugo_util import slugify_section
+
+            slug = slugify_section(section)
+            self._section_slugs[section] = slug
+        return slug
+
+    def relref(self, note: ResolvedNote, current_hugo_section: str | None) -> str:
+        """Returns the relref target of a note, relative when both share a section.
+
+        Notes in any two subsections of a flattened section, like cs/problems,
+        link relatively as well.
+        """
+        flattened = self.flattened_section(note.hugo_section)
+        if (
+            note.url
+            and not (flattened and flattened == self.flattened_section(current_hugo_section))
+            and note.hugo_section != current_hugo_section
+        ):
+            return note.url
+        return f"{note.slug}.md"
@@ -0,0 +1,266 @@
+import hashlib
+import json
+import logging
+import os
+
+MANIFEST_FILE_NAME = ".obsidian-se-hugo-manifest.json"
+# Bump whenever the output of a conversion changes for the same input, so that
+# the next incremental run rebuilds everything.
+MANIFEST_VERSION = 3
+
+
+def hash_file(file_path: str, chunk_size: int = 1 << 20) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def file_states(file_paths) -> dict[str, tuple[int, int]]:
+    """Returns the (mtime, size) of every file by path, one stat call per file."""
+    states = {}
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        states[str(file_path)] = (stat.st_mtime_ns, stat.st_size)
+    return states
+
+
+def hash_states(states: dict[str, tuple[int, int]]) -> str:
+    """Hashes the path, mtime and size of every file, in path order."""
+    sha256 = hashlib.sha256()
+    for file_path, (mtime_ns, size) in sorted(states.items()):
+        sha256.update(f"{file_path}\0{mtime_ns}\0{size}\n".encode("utf-8"))
+    return sha256.hexdigest()
+
+
+def hash_file_states(file_paths) -> str:
+    """Hashes the path, mtime and size of every file."""
+    return hash_states(file_states(file_paths))
+
+
+def hash_settings(*settings) -> str:
+    """Hashes the settings that influence every output file."""
+    payload = json.dumps([MANIFEST_VERSION, *settings], sort_keys=True, default=sorted)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+    """Record of what the previous export produced and from which sources.
+
+    `sources` maps a source path to its fingerprint (mtime, size, content hash
+    and, for notes, the link signature other notes render links from).
+    `notes` and `assets` map a source path to the output it was written to and,
+    for notes, the source paths of the notes it links to. `manual` lists the
+    files copied from the manual content directory. `asset_aliases` maps the
+    assets duplicating another one to the asset whose copy they link to.
+    `inputs` is the `hash_file_states` of every file the export read, None
+    when they are not known.
+    """
+
+    def __init__(self, settings: str):
+        self.settings = settings
+        self.sources: dict[str, dict] = {}
+        self.notes: dict[str, dict] = {}
+        self.assets: dict[str, dict] = {}
+        self.manual: list[str] = []
+        self.asset_aliases: dict[str, str] = {}
+        self.inputs: str | None = None
+
+    @classmethod
+    def load(cls, manifest_path: str) -> "Manifest | None":
+        """Loads a manifest, returns None when it is missing or unusable."""
+        if not os.path.isfile(manifest_path):
+            return None
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable manifest {manifest_path}: {e}")
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+        manifest = cls(data["settings"])
+        manifest.sources = data["sources"]
+        manifest.notes = data["notes"]
+        manifest.assets = data["assets"]
+        manifest.manual = data["manual"]
+        manifest.asset_aliases = data["asset_aliases"]
+        manifest.inputs = data["inputs"]
+        return manifest
+
+    def save(self, manifest_path: str) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "settings": self.settings,
+            "sources": self.sources,
+            "notes": self.notes,
+            "assets": self.assets,
+            "manual": self.manual,
+            "asset_aliases": self.asset_aliases,
+            "inputs": self.inputs,
+        }
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True, default=str)
+        os.replace(temp_path, manifest_path)
+
+    def fingerprint(
+        self,
+        source_path: str,
+        previous: "Manifest | None" = None,
+        link_signature: list | None = None,
+    ) -> dict:
+        """Records the fingerprint of a source file.
+
+        The content is only hashed when mtime or size differ from the previous
+        manifest, so unchanged files cost a single stat call.
+        """
+        stat = os.stat(source_path)
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        old_entry = previous.sources.get(source_path) if previous else None
+        if (
+            old_entry
+            and old_entry["sha256"] is not None
+            and old_entry["mtime_ns"] == entry["mtime_ns"]
+            and old_entry["size"] == entry["size"]
+        ):
+            entry["sha256"] = old_entry["sha256"]
+        else:
+            entry["sha256"] = hash_file(source_path)
+        if link_signature is not None:
+            entry["link_signature"] = link_signature
+        self.sources[source_path] = entry
+        return entry
+
+    def _source_changed(self, source_path: str, previous: "Manifest") -> bool:
+        old_entry = previous.sources.get(source_path)
+        return old_entry is None or old_entry["sha256"] != self.sources[source_path]["sha256"]
+
+    def _link_signature_changed(self, source_path: str, previous: "Manifest") -> bool:
+        old_entry = previous.sources.get(source_path)
+        new_entry = self.sources.get(source_path)
+        if old_entry is None or new_entry is None:
+            return True
+        return old_entry.get("link_signature") != new_entry.get("link_signature")
+
+    def invalidate(self, source_path: str) -> None:
+        """Forces a source to count as changed on the next incremental run."""
+        self.sources[source_path]["sha256"] = None
+
+    def add_note(self, source_path: str, output_path: str, deps: list[str]) -> None:
+        self.notes[source_path] = {"output": output_path, "deps": sorted(deps)}
+
+    def add_asset(self, source_path: str, output_path: str) -> None:
+        self.assets[source_path] = {"output": output_path}
+
+    def note_needs_conversion(self, source_path: str, previous: "Manifest | None") -> bool:
+        """Checks if a note recorded in this manifest must be converted again.
+
+        That is the case when the note itself changed, when its output is gone,
+        or when any note it links to changed how links to it are rendered.
+        """
+        if previous is None or previous.settings != self.settings:
+            return True
+        old_note = previous.notes.get(source_path)
+        note = self.notes[source_path]
+        if old_note is None or old_note["output"] != note["output"]:
+            return True
+        if not os.path.exists(note["output"]):
+            return True
+        if self._source_changed(source_path, previous):
+            return True
+        return any(self._link_signature_changed(dep, previous) for dep in note["deps"])
+
+    def asset_needs_copy(self, source_path: str, previous: "Manifest | None") -> bool:
+        if previous is None:
+            return True
+        old_asset = previous.assets.get(source_path)
+        asset = self.assets[source_path]
+        if old_asset is None or old_asset["output"] != asset["output"]:
+            return True
+        if not os.path.exists(asset["output"]):
+            return True
+        return self._source_changed(source_path, previous)
+
+    def nothing_changed(self, previous: "Manifest | None") -> bool:
+        """Checks if the export recorded in `previous` is still current.
+
+        That is the case when the settings and the input files are the same,
+        no source is left to retry and every output is still in place.
+        """
+        if previous is None or previous.settings != self.settings:
+            return False
+        if self.inputs is None or previous.inputs != self.inputs:
+            return False
+        if any(entry["sha256"] is None for entry in previous.sources.values()):
+            return False
+        return all(os.path.exists(output) for output in previous.outputs())
+
+    def changed_asset_aliases(self, previous: "Manifest | None") -> set[str]:
+        """Returns the assets whose links point at another copy than before."""
+        if previous is None:
+            return set()
+        names = self.asset_aliases.keys() | previous.asset_aliases.keys()
+        return {
+            name
+            for name in names
+            if self.asset_aliases.get(name) != previous.asset_aliases.get(name)
+        }
+
+    def relocate(self, moves: dict[str, str]) -> None:
+        """Moves the outputs under a key of `moves` to the same place under its value."""
+
+        def move(output_path: str) -> str:
+            normalized = os.path.normpath(output_path)
+            for old_dir, new_dir in moves.items():
+                if normalized == old_dir or normalized.startswith(old_dir + os.sep):
+                    return new_dir + normalized[len(old_dir) :]
+            return output_path
+
+        for entry in (*self.notes.values(), *self.assets.values()):
+            entry["output"] = move(entry["output"])
+        self.manual = [move(output_path) for output_path in self.manual]
+
+    def outputs(self) -> set[str]:
+        outputs = {note["output"] for note in self.notes.values()}
+        outputs.update(asset["output"] for asset in self.assets.values())
+        outputs.update(self.manual)
+        return outputs
+
+
+def prune_stale_outputs(
+    previous: Manifest | None,
+    current: Manifest,
+    logger: logging.Logger = logging.getLogger(__name__),
+) -> list[str]:
+    """Deletes the files the previous export wrote that this one no longer produces."""
+    if previous is None:
+        return []
+    outputs = {os.path.normpath(output) for output in current.outputs()}
+    stale = sorted(output for output in previous.outputs() if os.path.normpath(output) not in outputs)
+    for output_path in stale:
+        if os.path.isfile(output_path):
+            logger.info(f"Removing stale output: {output_path}")
+            os.remove(output_path)
+    return stale
+
+
+def prune_unlisted_outputs(
+    file_paths,
+    current: Manifest,
+    logger: logging.Logger = logging.getLogger(__name__),
+) -> list[str]:
+    """Deletes the files of `file_paths` which the current export did not produce.
+
+    A full export owns the directories it writes to. Given the files found
+    there before the export, this leaves them as if they had been wiped
+    first, while the outputs which did not change keep their mtime.
+    """
+    outputs = {os.path.normpath(output) for output in current.outputs()}
+    stale = sorted(path for path in file_paths if os.path.normpath(path) not in outputs)
+    for output_path in stale:
+        if os.path.isfile(output_path):
+            logger.info(f"Removing unlisted output: {output_path}")
+            os.remove(output_path)
+    return stale
@@ -1,14 +1,17 @@
 import logging
+from bisect import bisect_left
 from pathlib import Path
+from typing import Iterable
 import frontmatter
-import re
 from .hyperlink import Hyperlink
 import os
 from obsidian_se_hugo.constants import (
     wiki_link_pattern,
     code_block_pattern,
     inline_code_pattern,
+    json_code_block_pattern,
 )
+from obsidian_se_hugo.transform_pipeline import STREAM_CHUNK_SIZE
 
 
 def is_published(file_path: str, publish_key: str = "published") -> bool:
@@ -51,50 +54,141 @@ def get_alternate_link_dict(origin: Path, publish_key: str = "published") -> lis
     return alternate_link
 
 
-def extract_wiki_links(markdown_text: str) -> list[Hyperlink]:
+class CodeRegions:
+    """Sorted, non-overlapping spans of fenced and inline code in a document.
+
+    Computed once per document so that checking whether a match lies in code
+    is a bisect instead of another scan of the whole text.
+    """
+
+    def __init__(self, starts: list[int], ends: list[int], length: int):
+        self.starts = starts
+        self.ends = ends
+        self.length = length
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """Checks if the span [start, end) touches any code region."""
+        # regions are disjoint, so only the last one starting before `end` can overlap
+        i = bisect_left(self.starts, end) - 1
+        return i >= 0 and self.ends[i] > start
+
+    def gaps(self):
+        """Yields the (start, end) spans of text lying outside code."""
+        position = 0
+        for start, end in zip(self.starts, self.ends):
+            yield position, start
+            position = end
+        yield position, self.length
+
+
+def find_code_regions(text: str) -> CodeRegions:
+    """Builds the code region index of a document in a single pass.
+
+    Code blocks are located first and inline code is only searched for in the
+    text between them, so backticks inside a fence never pair up with ones
+    outside of it.
+    """
+    starts = []
+    ends = []
+    position = 0
+    for block in code_block_pattern.finditer(text):
+        for inline in inline_code_pattern.finditer(text, position, block.start()):
+            starts.append(inline.start())
+            ends.append(inline.end())
+        starts.append(block.start())
+        ends.append(block.end())
+        position = block.end()
+    for inline in inline_code_pattern.finditer(text, position):
+        starts.append(inline.start())
+        ends.append(inline.end())
+    return CodeRegions(starts, ends, len(text))
+
+
+def extract_wiki_links(
+    markdown_text: str, code_regions: CodeRegions | None = None
+) -> list[Hyperlink]:
     """
     This function extracts wiki links from a markdown file using regular expressions.
 
     Args:
         markdown_text: The text content of the markdown file as a string.
+        code_regions: The code region index of `markdown_text`, computed when not given.
 
     Returns:
         A list of extracted wiki links as Hyperlink objects.
     """
-    # Split the markdown text into non-code parts using code blocks as delimiters
-    non_code_parts = re.split(code_block_pattern, markdown_text)
+    if code_regions is None:
+        code_regions = find_code_regions(markdown_text)
 
     wiki_links = []
-    for part in non_code_parts:
-        # Extract wiki links from each non-code part
-        sub_parts = re.split(
-            inline_code_pattern, part
-        )  # Split based on inline code texts
-        for sub_part in sub_parts:
-            wiki_links += extract_wiki_links_from_text(sub_part)
+    # Only the text between code regions can contain wiki links
+    for start, end in code_regions.gaps():
+        for match in wiki_link_pattern.finditer(markdown_text, start, end):
+            wiki_links.append(_to_hyperlink(match.groups()))
 
     return wiki_links
 
 
-def extract_wiki_links_from_text(text: str) -> list[Hyperlink]:
-    matches = re.findall(wiki_link_pattern, text)
-    wiki_links = []
-    for match in matches:
-        # The first item is the link, the second is the alias which might be empty
-        link = match[0]
-        alias = match[1][1:] if match[1] else None  # Exclude the leading pipe character
-        hyperlink = Hyperlink(link, alias)
-        wiki_links.append(hyperlink)
+def extract_wiki_links_from_lines(
+    lines: Iterable[str], chunk_size: int = STREAM_CHUNK_SIZE
+) -> list[Hyperlink]:
+    """Extracts the wiki links of a document given line by line.
 
+    The lines are joined into chunks which are cut where no code region is
+    left open, so the links are the same as `extract_wiki_links` finds in
+    the whole text. Until an open region is closed its chunk keeps growing.
+    """
+    wiki_links = []
+    pending: list[str] = []
+    pending_size = 0
+    cut_size = chunk_size
+    for line in lines:
+        pending.append(line)
+        pending_size += len(line)
+        if pending_size >= cut_size:
+            chunk = "".join(pending)
+            code_regions = find_code_regions(chunk)
+            # code blocks are paired before inline code, a fence after the last
+            # block or a backtick after the last region may be closed later on
+            block_end = 0
+            for block in code_block_pattern.finditer(chunk):
+                block_end = block.end()
+            if (
+                chunk.find("```", block_end) >= 0
+                or chunk.find("`", code_regions.ends[-1] if code_regions.ends else 0) >= 0
+            ):
+                pending = [chunk]
+                cut_size = 2 * pending_size
+            else:
+                wiki_links.extend(extract_wiki_links(chunk, code_regions))
+                pending = []
+                pending_size = 0
+                cut_size = chunk_size
+    wiki_links.extend(extract_wiki_links("".join(pending)))
     return wiki_links
 
 
+def extract_wiki_links_from_text(text: str) -> list[Hyperlink]:
+    matches = wiki_link_pattern.findall(text)
+    return [_to_hyperlink(match) for match in matches]
+
+
+def _to_hyperlink(match: tuple[str, str]) -> Hyperlink:
+    # The first item is the link, the second is the alias which might be empty
+    link = match[0]
+    alias = match[1][1:] if match[1] else None  # Exclude the leading pipe character
+    return Hyperlink(link, alias)
+
+
 # Read the markdown file and extract JSON content
 def read_json_from_markdown(markdown_path: str) -> str:
     with open(markdown_path, "r", encoding="utf8") as file:
         content = file.read()
         # This regex assumes that your JSON is correctly formatted and indented
-        matches = re.search(r"```json\n([\s\S]*?)\n```", content)
+        matches = json_code_block_pattern.search(content)
         if matches:
             return matches.group(1).strip()
     return None
@@ -114,7 +208,7 @@ def extract_single_wiki_link(wiki_link: str) -> str:
     """
     Extract the target from a wiki link string like [[target|alias]] or [[target]]
     """
-    m = re.match(r"\[\[(.*?)(\|.*?)?\]\]", wiki_link)
+    m = wiki_link_pattern.match(wiki_link)
     if m:
         return m.group(1).split("|")[0].strip()
     return wiki_link.strip()
@@ -0,0 +1,81 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Counter names, kept here so the report has a stable vocabulary
+NOTES_PARSED = "notes_parsed"
+PARSE_CACHE_HITS = "parse_cache_hits"
+FILES_READ = "files_read"
+BYTES_READ = "bytes_read"
+FILES_WRITTEN = "files_written"
+# outputs which already held what the export would have written
+FILES_UNCHANGED = "files_unchanged"
+BYTES_WRITTEN = "bytes_written"
+# notes which nothing in their body needed rewriting, so they were not scanned
+NOTES_NOT_SCANNED = "notes_not_scanned"
+
+
+class RunMetrics:
+    """Stage timings and counters of one export run.
+
+    The module keeps one instance in `metrics`, which the pipeline stages
+    record into. Worker processes have their own instance and hand their
+    counters back with their results.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Starts recording a new run."""
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.counters: Counter[str] = Counter()
+        self.note_seconds: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times a stage, a stage entered several times accumulates its time."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+            logging.debug(f"Stage {name} took {elapsed:.3f}s")
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def merge_counters(self, counters: dict[str, int]) -> None:
+        with self._lock:
+            self.counters.update(counters)
+
+    def report(self, slowest: int = 20) -> dict:
+        slowest_notes = sorted(self.note_seconds.items(), key=lambda item: -item[1])
+        return {
+            "started_at": self.started_at.isoformat(),
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "counters": dict(sorted(self.counters.items())),
+            "notes_converted": len(self.note_seconds),
+            "slowest_notes": [
+                {"note": note, "seconds": round(seconds, 6)}
+                for note, seconds in slowest_notes[:slowest]
+            ],
+        }
+
+    def save_report(self, report_path: str, slowest: int = 20) -> None:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(slowest), f, indent=2)
+
+
+metrics = RunMetrics()
+
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from obsidian_se_hugo.manifest import hash_file
+from obsidian_se_hugo.metrics import BYTES_WRITTEN, FILES_UNCHANGED, FILES_WRITTEN, metrics
+
+
+def _temp_path(path: str) -> str:
+    # hidden and in the same directory, so the rename stays on one filesystem
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def holds(path: str, data: bytes) -> bool:
+    """Checks if the file at `path` already holds `data`, by size and then by hash."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return False
+    return size == len(data) and hash_file(path) == hashlib.sha256(data).hexdigest()
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    """Replaces the file at `path` with `data` atomically, unless it already holds it.
+
+    An unchanged file keeps its mtime, so `hugo server` does not rebuild its
+    page. Returns True when the file was written.
+    """
+    if holds(path, data):
+        metrics.count(FILES_UNCHANGED)
+        return False
+    temp_path = _temp_path(path)
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    metrics.count(FILES_WRITTEN)
+    metrics.count(BYTES_WRITTEN, len(data))
+    return True
+
+
+@contextmanager
+def atomic_text_output(path: str):
+    """Yields a text file which replaces `path` when the block ends.
+
+    This is `write_if_changed` for output written piece by piece: the file is
+    discarded when `path` already holds the same bytes, or when the block
+    raises.
+    """
+    temp_path = _temp_path(path)
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            yield f
+        size = os.path.getsize(temp_path)
+        if (
+            os.path.isfile(path)
+            and os.path.getsize(path) == size
+            and hash_file(path) == hash_file(temp_path)
+        ):
+            os.remove(temp_path)
+            metrics.count(FILES_UNCHANGED)
+            return
+        os.replace(temp_path, path)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    metrics.count(FILES_WRITTEN)
+    metrics.count(BYTES_WRITTEN, size)
+
+
+class OutputWriter:
+    """Writes text files with `write_if_changed` on a background thread.
+
+    `write` only queues the text, encoding, comparing and writing happen off
+    the converting thread. The queue is bounded, so a slow disk holds the
+    conversion back instead of piling up converted notes in memory. Errors
+    are collected per path in `errors`, which is complete once `close`
+    returns.
+    """
+
+    def __init__(self, max_pending: int = 64):
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self.errors: dict[str, str] = {}
+        self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            path, text = item
+            try:
+                write_if_changed(path, text.encode("utf-8"))
+            except Exception as e:
+                self.errors[path] = f"{type(e).__name__}: {e}"
+
+    def write(self, path: str, text: str) -> None:
+        self._queue.put((path, text))
+
+    def close(self) -> dict[str, str]:
+        """Waits for the queued writes, returns the errors."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        return self.errors
+
+    def __enter__(self) -> "OutputWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+
+DEFAULT_PARSE_CACHE_PATH = os.path.join(".cache", "obsidian-se-hugo", "parse-cache.sqlite3")
+# Bump when a NoteRecord from the same text would differ in a way the parser
+# sources do not show, the stamp below already covers changes to the parser.
+PARSE_CACHE_VERSION = 1
+
+# modules whose source decides what a parsed note looks like
+_PARSER_MODULES = (
+    "obsidian_se_hugo.constants",
+    "obsidian_se_hugo.hyperlink",
+    "obsidian_se_hugo.markdown_util",
+    "obsidian_se_hugo.vault_index",
+)
+
+
+def parser_stamp() -> str:
+    """Identifies the parser, records cached by another parser are discarded."""
+    # imported here, only the stamp needs the YAML parser
+    import yaml
+
+    sha256 = hashlib.sha256(f"{PARSE_CACHE_VERSION}:{yaml.__version__}".encode())
+    for module_name in _PARSER_MODULES:
+        with open(sys.modules[module_name].__file__, "rb") as f:
+            sha256.update(f.read())
+    return sha256.hexdigest()
+
+
+class ParseCache:
+    """Parsed notes persisted between runs in SQLite.
+
+    A record is reused while the note keeps its path, mtime and size, so an
+    unchanged vault is loaded with one stat call per note. All rows are read
+    when the cache is opened, records are only unpickled when they are used.
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_PARSE_CACHE_PATH):
+        self.cache_path = cache_path
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        self._connection = sqlite3.connect(cache_path)
+        self._rows: dict[str, tuple[int, int, bytes]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._open()
+
+    def _open(self) -> None:
+        connection = self._connection
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        stamp = parser_stamp()
+        row = connection.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+        if row is None or row[0] != stamp:
+            if row is not None:
+                logging.info("Parser changed, discarding the parse cache")
+            connection.execute("DROP TABLE IF EXISTS notes")
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('stamp', ?)", (stamp,))
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS notes "
+            "(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, record BLOB)"
+        )
+        connection.commit()
+        for path, mtime_ns, size, record in connection.execute(
+            "SELECT path, mtime_ns, size, record FROM notes"
+        ):
+            self._rows[path] = (mtime_ns, size, record)
+
+    def get(self, file_path: str, stat: os.stat_result):
+        """Returns the cached record of a note, None when it changed or is unknown."""
+        row = self._rows.get(file_path)
+        if row is None or row[0] != stat.st_mtime_ns or row[1] != stat.st_size:
+            self.misses += 1
+            return None
+        try:
+            record = pickle.loads(row[2])
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable cache entry of {file_path}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return record
+
+    def put(self, file_path: str, stat: os.stat_result, record) -> None:
+        row = (stat.st_mtime_ns, stat.st_size, pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+        self._rows[file_path] = row
+        self._connection.execute(
+            "INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?)", (file_path, *row)
+        )
+        self._dirty = True
+
+    def retain(self, file_paths: set[str]) -> None:
+        """Forgets the notes which are no longer in the vault."""
+        stale = [path for path in self._rows if path not in file_paths]
+        for path in stale:
+            del self._rows[path]
+        self._connection.executemany("DELETE FROM notes WHERE path = ?", [(p,) for p in stale])
+        self._dirty = self._dirty or bool(stale)
+
+    def flush(self) -> None:
+        if self._dirty:
+            self._connection.commit()
+            self._dirty = False
+
+    def close(self) -> None:
+        self.flush()
+        self._connection.close()
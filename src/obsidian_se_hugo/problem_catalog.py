@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+
+from obsidian_se_hugo.link_resolver import LinkResolver
+from obsidian_se_hugo.markdown_util import extract_single_wiki_link
+from obsidian_se_hugo.vault_index import NoteRecord
+
+
+@dataclass(frozen=True)
+class Problem:
+    """A note as the target of a `related_problems` entry.
+
+    `url` is None unless the note is published and has a hugo section.
+    """
+
+    path: str
+    published: bool
+    hugo_section: str | None
+    slug: str
+    url: str | None
+
+
+class UnresolvedProblemsError(ValueError):
+    """Raised with every `related_problems` entry of a note that cannot be linked."""
+
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+        super().__init__(f"{len(errors)} unresolved related problems:\n" + "\n".join(errors))
+
+
+class ProblemCatalog:
+    """Notes by file name, as the targets of `related_problems` front matter.
+
+    Lookups go through the link resolver's name map and vault index, and
+    every note is looked up once. `from_index` fills the catalog with all
+    indexed notes up front.
+    """
+
+    def __init__(self, link_resolver: LinkResolver):
+        self.link_resolver = link_resolver
+        self._problems: dict[str, Problem] = {}
+
+    @classmethod
+    def from_index(cls, link_resolver: LinkResolver) -> "ProblemCatalog":
+        """Builds the catalog in one pass over the notes in the vault index."""
+        catalog = cls(link_resolver)
+        file_name_to_path_dict = link_resolver.file_name_to_path_dict
+        for record in link_resolver.vault_index:
+            file_name = record.name + ".md"
+            # of notes with the same name, links resolve to the one in the dictionary
+            if file_name_to_path_dict.get(file_name) == record.path:
+                catalog._problems[file_name] = catalog._problem(record)
+        return catalog
+
+    def _problem(self, record: NoteRecord) -> Problem:
+        # imported here, hugo_util imports this module
+        from obsidian_se_hugo.hugo_util import slugify_filename
+
+        slug = slugify_filename(record.name)
+        url = None
+        if record.published and record.hugo_section:
+            url = f"/{self.link_resolver.url_section(record.hugo_section)}/{slug}"
+        return Problem(record.path, bool(record.published), record.hugo_section, slug, url)
+
+    def get(self, file_name: str) -> Problem | None:
+        problem = self._problems.get(file_name)
+        if problem is None:
+            file_path = self.link_resolver.file_name_to_path_dict.get(file_name)
+            if file_path is None:
+                return None
+            problem = self._problem(self.link_resolver.vault_index.get(file_path))
+            self._problems[file_name] = problem
+        return problem
+
+    def forget(self, file_names) -> None:
+        """Drops the notes with these file names, they are looked up again when needed."""
+        for file_name in file_names:
+            self._problems.pop(file_name, None)
+
+    def related_problem_urls(self, related_problems: list[str], input_file_path: str) -> list[str]:
+        """Returns the urls of the `related_problems` wiki links of a note.
+
+        Raises:
+            UnresolvedProblemsError: With every entry which is not found, not
+                published or has no hugo section.
+        """
+        urls = []
+        errors = []
+        for related_problem in related_problems:
+            related_problem_name = extract_single_wiki_link(related_problem) + ".md"
+            problem = self.get(related_problem_name)
+            if problem is None:
+                errors.append(
+                    f"Related problem '{related_problem_name}' not found for '{input_file_path}'"
+                )
+            elif not problem.published:
+                errors.append(
+                    f"Related problem '{related_problem_name}' not published for '{input_file_path}'"
+                )
+            elif problem.url is None:
+                errors.append(
+                    f"Related problem '{related_problem_name}' for '{input_file_path}' doesn't have a Hugo section"
+                )
+            else:
+                urls.append(problem.url)
+        if errors:
+            raise UnresolvedProblemsError(errors)
+        return urls
@@ -0,0 +1,121 @@
+import logging
+import os
+import shutil
+from dataclasses import replace
+
+from obsidian_se_hugo.config import Config
+
+STAGING_SUFFIX = ".staging"
+PREVIOUS_SUFFIX = ".previous"
+
+
+def _sibling(directory: str, suffix: str) -> str:
+    # hidden and next to the directory, so renaming it stays on one filesystem
+    parent, name = os.path.split(directory)
+    return os.path.join(parent, f".{name}{suffix}")
+
+
+def _link_or_copy(source_path: str, destination_path: str) -> None:
+    try:
+        os.link(source_path, destination_path)
+    except OSError:
+        shutil.copy2(source_path, destination_path)
+
+
+def output_directories(config: Config) -> list[str]:
+    """Returns the directories an export writes to, without nested ones."""
+    directories = sorted(
+        {
+            os.path.normpath(os.path.join(config.hugo.root_path, directory))
+            for directory in (
+                config.hugo.content_dir,
+                config.hugo.images_dir,
+                config.hugo.content_images_dir,
+            )
+        }
+    )
+    outermost = []
+    for directory in directories:
+        if not any(directory.startswith(parent + os.sep) for parent in outermost):
+            outermost.append(directory)
+    return outermost
+
+
+def prepare_staging(directories: list[str], logger: logging.Logger = logging.getLogger(__name__)) -> dict[str, str]:
+    """Creates a staging copy of every directory, made of hardlinks where possible.
+
+    Everything in it is written by replacing files, never in place, so the
+    live directories do not change until `publish_staging`.
+
+    Returns:
+        A dictionary of directory to its staging directory.
+    """
+    staged = {}
+    for directory in directories:
+        staging = _sibling(directory, STAGING_SUFFIX)
+        if os.path.exists(staging):
+            logger.info(f"Removing leftover staging directory {staging}")
+            shutil.rmtree(staging)
+        if os.path.isdir(directory):
+            shutil.copytree(directory, staging, symlinks=True, copy_function=_link_or_copy)
+        else:
+            os.makedirs(staging)
+        staged[directory] = staging
+    return staged
+
+
+def staged_config(config: Config, staged: dict[str, str]) -> Config:
+    """Returns the configuration which writes into the staging directories."""
+    root_path = config.hugo.root_path
+
+    def rebase(relative_dir: str) -> str:
+        directory = os.path.normpath(os.path.join(root_path, relative_dir))
+        for live, staging in staged.items():
+            if directory == live or directory.startswith(live + os.sep):
+                return os.path.relpath(staging + directory[len(live) :], root_path)
+        return relative_dir
+
+    hugo = replace(
+        config.hugo,
+        content_dir=rebase(config.hugo.content_dir),
+        images_dir=rebase(config.hugo.images_dir),
+        content_images_dir=rebase(config.hugo.content_images_dir),
+    )
+    return replace(config, hugo=hugo)
+
+
+def discard_staging(staged: dict[str, str]) -> None:
+    for staging in staged.values():
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def publish_staging(staged: dict[str, str], logger: logging.Logger = logging.getLogger(__name__)) -> None:
+    """Moves every staging directory into the place of its live directory.
+
+    Each directory takes two renames: the live one is moved aside, then the
+    staging one takes its place. When a rename fails, the directories moved
+    so far are put back and the error is raised.
+    """
+    published = []
+    try:
+        for live, staging in staged.items():
+            previous = _sibling(live, PREVIOUS_SUFFIX)
+            shutil.rmtree(previous, ignore_errors=True)
+            if os.path.isdir(live):
+                os.rename(live, previous)
+            try:
+                os.rename(staging, live)
+            except OSError:
+                if os.path.isdir(previous):
+                    os.rename(previous, live)
+                raise
+            published.append((live, staging, previous))
+    except OSError:
+        for live, staging, previous in reversed(published):
+            os.rename(live, staging)
+            if os.path.isdir(previous):
+                os.rename(previous, live)
+        raise
+    for live, _, previous in published:
+        shutil.rmtree(previous, ignore_errors=True)
+        logger.info(f"Published {live}")
@@ -0,0 +1,363 @@
+import fnmatch
+import re
+from typing import Callable, Iterable
+
+from obsidian_se_hugo.constants import (
+    code_block_pattern,
+    inline_code_pattern,
+    last_blank_line_pattern,
+)
+
+# Code is copied verbatim, so these tokens are matched before any transform's
+CODE_BLOCK_TOKEN = "code_block"
+INLINE_CODE_TOKEN = "inline_code"
+CODE_BLOCK_OPENER = "```"
+# run_lines tries to cut the document once this many characters are pending
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class Token:
+    """A token found by the combined tokenizer.
+
+    `group(i)` returns the i-th group of the pattern the transform registered
+    for the token kind, not of the combined pattern.
+    """
+
+    __slots__ = ("kind", "match", "offset")
+
+    def __init__(self, kind: str, match: re.Match, offset: int):
+        self.kind = kind
+        self.match = match
+        self.offset = offset
+
+    @property
+    def string(self) -> str:
+        return self.match.string
+
+    @property
+    def text(self) -> str:
+        return self.match.group(self.offset)
+
+    def group(self, index: int = 0) -> str | None:
+        return self.match.group(self.offset + index)
+
+    def start(self) -> int:
+        return self.match.start()
+
+    def end(self) -> int:
+        return self.match.end()
+
+
+class OutputBuffer:
+    """Collects the transformed document in a single list of pieces.
+
+    With a `sink`, `flush` hands the output that can no longer change over to
+    it, so a streamed document is never held in memory as a whole.
+    """
+
+    def __init__(self, sink: Callable[[str], None] | None = None):
+        self._pieces: list[str] = []
+        self._strip_leading = False
+        self._sink = sink
+        # number of pieces handed to the sink, marks count them as well
+        self._flushed = 0
+        self._held: int | None = None
+
+    def write(self, text: str) -> None:
+        if self._strip_leading:
+            text = text.lstrip()
+            if not text:
+                return
+            self._strip_leading = False
+        self._pieces.append(text)
+
+    def mark(self) -> int:
+        """Returns a position that `rstrip` must not strip beyond.
+
+        The output after the mark is held back from `flush` until `rstrip`
+        is called with it.
+        """
+        position = self._flushed + len(self._pieces)
+        if self._held is None:
+            self._held = position
+        return position
+
+    def strip_leading_whitespace(self) -> None:
+        """Drops whitespace written next, until some other text is written."""
+        self._strip_leading = True
+
+    def rstrip(self, mark: int = 0) -> None:
+        """Strips trailing whitespace written after `mark`."""
+        self._strip_leading = False
+        if self._held is not None and mark <= self._held:
+            self._held = None
+        while self._pieces and self._flushed + len(self._pieces) > mark:
+            last = self._pieces[-1].rstrip()
+            if last:
+                self._pieces[-1] = last
+                return
+            self._pieces.pop()
+
+    def flush(self) -> None:
+        """Hands the output that can no longer change to the sink.
+
+        Trailing whitespace stays in the buffer, so that the document can
+        still be stripped once it is complete.
+        """
+        end = len(self._pieces) if self._held is None else self._held - self._flushed
+        text = "".join(self._pieces[:end])
+        stripped = text.rstrip()
+        if not stripped:
+            return
+        self._sink(stripped)
+        tail = text[len(stripped) :]
+        self._pieces[:end] = [tail] if tail else []
+        self._flushed += end - 1 if tail else end
+
+    def getvalue(self) -> str:
+        """Returns the output which has not been flushed."""
+        return "".join(self._pieces)
+
+
+class Transform:
+    """A rewrite applied while the pipeline scans a document.
+
+    `tokens` maps the token kinds the transform subscribes to onto their
+    regular expressions. Patterns must only use unnamed groups, and a kind
+    shared by several transforms must use the same pattern everywhere.
+    """
+
+    name = ""
+    tokens: dict[str, str] = {}
+    # Opening delimiters of tokens which may span lines, and end at the first
+    # closing delimiter. Other tokens may only span lines through whitespace.
+    openers: tuple[str, ...] = ()
+    # Opening delimiters of tokens which end at the first closing delimiter
+    # within their paragraph. One left open before a blank line is text.
+    paragraph_openers: tuple[str, ...] = ()
+    # Strings of which a document must contain one for the transform to change
+    # it, see `TransformRegistry.pipeline`. Empty when any document may change.
+    requires: tuple[str, ...] = ()
+
+    def applies_to(self, text: str) -> bool:
+        return not self.requires or any(required in text for required in self.requires)
+
+    def front_matter(self, metadata: dict) -> None:
+        """Rewrites the front matter of a document before its body is transformed."""
+
+    def begin(self, context) -> object | None:
+        """Returns the per document state, or None to skip the document."""
+        return True
+
+    def handle(self, token: Token, out: OutputBuffer, context, state) -> bool:
+        """Handles a token, returns True when it wrote the replacement itself.
+
+        Returning False lets the next subscriber handle the token, once none
+        is left the token text is written unchanged.
+        """
+        return False
+
+    def end(self, out: OutputBuffer, context, state) -> None:
+        """Called after the last token of the document."""
+
+
+class TransformPipeline:
+    """Applies several transforms in one scan of the document.
+
+    All token patterns are combined into one alternation, so the document is
+    tokenized once no matter how many transforms are registered. Fenced and
+    inline code always win over transform tokens and are never rewritten.
+    """
+
+    def __init__(self, transforms: list[Transform]):
+        self.transforms = list(transforms)
+
+        patterns = {
+            CODE_BLOCK_TOKEN: code_block_pattern.pattern,
+            INLINE_CODE_TOKEN: inline_code_pattern.pattern,
+        }
+        self._subscribers: dict[str, list[int]] = {}
+        for position, transform in enumerate(self.transforms):
+            for kind, pattern in transform.tokens.items():
+                if patterns.setdefault(kind, pattern) != pattern:
+                    raise ValueError(
+                        f"Transform {transform.name} redefines the pattern of token {kind}"
+                    )
+                self._subscribers.setdefault(kind, []).append(position)
+
+        self._regex = re.compile(
+            "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in patterns.items())
+        )
+        self._offsets = {kind: self._regex.groupindex[kind] for kind in patterns}
+        openers = ["`"] + [opener for transform in self.transforms for opener in transform.openers]
+        self._opener_regex = re.compile("|".join(map(re.escape, openers)))
+        paragraph_openers = [
+            opener for transform in self.transforms for opener in transform.paragraph_openers
+        ]
+        self._paragraph_opener_regex = (
+            re.compile("|".join(map(re.escape, paragraph_openers))) if paragraph_openers else None
+        )
+
+    def _begin(self, context) -> tuple[list, dict]:
+        states = [transform.begin(context) for transform in self.transforms]
+        subscribers = {
+            kind: [(self.transforms[i], states[i]) for i in positions if states[i] is not None]
+            for kind, positions in self._subscribers.items()
+        }
+        return states, subscribers
+
+    def _scan(self, text: str, matches: Iterable[re.Match], out, context, subscribers) -> None:
+        position = 0
+        for match in matches:
+            if match.start() > position:
+                out.write(text[position : match.start()])
+            position = match.end()
+
+            kind = match.lastgroup
+            token = Token(kind, match, self._offsets[kind])
+            for transform, state in subscribers.get(kind, ()):
+                if transform.handle(token, out, context, state):
+                    break
+            else:
+                out.write(token.text)
+        if position < len(text):
+            out.write(text[position:])
+
+    def _end(self, out, context, states) -> None:
+        for transform, state in zip(self.transforms, states):
+            if state is not None:
+                transform.end(out, context, state)
+
+    def run(self, text: str, context=None) -> str:
+        states, subscribers = self._begin(context)
+        out = OutputBuffer()
+        self._scan(text, self._regex.finditer(text), out, context, subscribers)
+        self._end(out, context, states)
+        return out.getvalue()
+
+    def _closed_tokens(self, text: str) -> list[re.Match] | None:
+        """Tokenizes `text`, a prefix of a document that ends with a newline.
+
+        Returns None when the rest of the document could change the tokens:
+        a fence, inline code or another multi-line token left open in `text`
+        may still be closed further down.
+        """
+        opener_regex = self._opener_regex
+        paragraph_opener_regex = self._paragraph_opener_regex
+        # paragraph openers before the last blank line can no longer be closed
+        paragraph_start = len(text)
+        if paragraph_opener_regex is not None:
+            last_blank_line = last_blank_line_pattern.match(text)
+            paragraph_start = last_blank_line.start(1) if last_blank_line else 0
+        matches = []
+        position = 0
+        for match in self._regex.finditer(text):
+            if opener_regex.search(text, position, match.start()):
+                return None
+            if paragraph_start < match.start() and paragraph_opener_regex.search(
+                text, max(position, paragraph_start), match.start()
+            ):
+                return None
+            if match.lastgroup == INLINE_CODE_TOKEN and text.startswith(
+                CODE_BLOCK_OPENER, match.start()
+            ):
+                # an unclosed fence, read as inline code until it is closed
+                return None
+            matches.append(match)
+            position = match.end()
+        if opener_regex.search(text, position):
+            return None
+        if paragraph_start < len(text) and paragraph_opener_regex.search(
+            text, max(position, paragraph_start)
+        ):
+            return None
+        return matches
+
+    def run_lines(
+        self,
+        lines: Iterable[str],
+        out: OutputBuffer,
+        context=None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> None:
+        """Transforms a document given line by line, flushing `out` as it goes.
+
+        The document is cut into chunks at the start of lines which begin
+        with a non-whitespace character, where no fence, inline code or `$$`
+        block is left open, so the output is the same as `run` on the whole
+        text. Until an open block is closed its chunk keeps growing.
+        """
+        states, subscribers = self._begin(context)
+        pending: list[str] = []
+        pending_size = 0
+        cut_size = chunk_size
+        for line in lines:
+            if pending_size >= cut_size and line[:1] and not line[:1].isspace():
+                chunk = "".join(pending)
+                matches = self._closed_tokens(chunk)
+                if matches is None:
+                    pending = [chunk]
+                    cut_size = 2 * pending_size
+                else:
+                    self._scan(chunk, matches, out, context, subscribers)
+                    out.flush()
+                    pending = []
+                    pending_size = 0
+                    cut_size = chunk_size
+            pending.append(line)
+            pending_size += len(line)
+        chunk = "".join(pending)
+        self._scan(chunk, self._regex.finditer(chunk), out, context, subscribers)
+        self._end(out, context, states)
+
+
+class TransformRegistry:
+    """Picks the transforms of a document by its section, and their pipeline.
+
+    `rules` pairs globs of sections with the names of the transforms for the
+    documents in a matching section. A document gets the transforms of all
+    rules its section matches, in the order of `transforms`.
+    """
+
+    def __init__(self, transforms: list[Transform], rules: list[tuple[list[str], list[str]]]):
+        self.transforms = {transform.name: transform for transform in transforms}
+        self.rules = []
+        for sections, names in rules:
+            unknown = sorted(set(names) - set(self.transforms))
+            if unknown:
+                raise ValueError(f"Unknown transforms {unknown}, known are {sorted(self.transforms)}")
+            self.rules.append((list(sections), set(names)))
+        self._by_section: dict[str, list[Transform]] = {}
+        self._pipelines: dict[tuple[str, ...], TransformPipeline] = {}
+
+    def transforms_for(self, section: str | None) -> list[Transform]:
+        section = section or ""
+        transforms = self._by_section.get(section)
+        if transforms is None:
+            names = set()
+            for globs, rule_names in self.rules:
+                if any(fnmatch.fnmatchcase(section, glob) for glob in globs):
+                    names |= rule_names
+            transforms = [transform for name, transform in self.transforms.items() if name in names]
+            self._by_section[section] = transforms
+        return transforms
+
+    def pipeline(self, section: str | None, text: str | None = None) -> TransformPipeline:
+        """Returns the pipeline for a document of `section`.
+
+        Given the `text` of the document, transforms which cannot change it are
+        left out, so a document without any matching transform need not be
+        scanned, see `TransformPipeline.transforms`. The pipeline of each
+        combination of transforms is compiled once.
+        """
+        transforms = [
+            transform
+            for transform in self.transforms_for(section)
+            if transform.tokens and (text is None or transform.applies_to(text))
+        ]
+        key = tuple(transform.name for transform in transforms)
+        pipeline = self._pipelines.get(key)
+        if pipeline is None:
+            pipeline = TransformPipeline(transforms)
+            self._pipelines[key] = pipeline
+        return pipeline
@@ -0,0 +1,353 @@
+import copy
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import frontmatter
+from frontmatter.default_handlers import YAMLHandler
+
+from obsidian_se_hugo.hyperlink import Hyperlink
+from obsidian_se_hugo.markdown_util import extract_wiki_links, extract_wiki_links_from_lines
+from obsidian_se_hugo.metrics import (
+    BYTES_READ,
+    FILES_READ,
+    NOTES_PARSED,
+    PARSE_CACHE_HITS,
+    metrics,
+)
+from obsidian_se_hugo.parse_cache import ParseCache
+from obsidian_se_hugo.vault_scanner import DEFAULT_IGNORE, scan_vault
+
+PUBLISH_KEY = "published"
+HUGO_SECTION_KEY = "hugo_section"
+ALTERNATE_LINK_KEY = "alternate_link"
+
+# notes from this size on are read line by line instead of in memory, when
+# they are indexed and when they are converted
+STREAMING_THRESHOLD_BYTES = 1024 * 1024
+
+_yaml_handler = YAMLHandler()
+
+
+@dataclass
+class NoteRecord:
+    """Everything the exporter needs to know about a note, parsed once.
+
+    `body_start`/`body_end` are offsets into the raw file text and delimit the
+    same (stripped) content that `frontmatter.load(path).content` returns.
+    """
+
+    path: str
+    name: str
+    published: bool
+    hugo_section: str | None
+    alternate_link: str | None
+    title: str | None
+    body_start: int
+    body_end: int
+    wiki_links: list[Hyperlink] = field(default_factory=list)
+    metadata: dict = field(default_factory=dict)
+
+    def require_hugo_section(self) -> str | None:
+        """Mirrors `markdown_util.get_hugo_section` for an already parsed note."""
+        if HUGO_SECTION_KEY not in self.metadata and ALTERNATE_LINK_KEY not in self.metadata:
+            raise ValueError(f"{HUGO_SECTION_KEY} not found in file: {self.path}")
+        return self.hugo_section
+
+
+def split_frontmatter(text: str) -> tuple[str | None, int, int]:
+    """Locates the YAML header and the body of a note.
+
+    Returns:
+        The raw YAML header (or None when the note has none) and the start/end
+        offsets of the stripped body inside `text`.
+    """
+    start = len(text) - len(text.lstrip())
+    end = len(text.rstrip())
+    stripped = text[start:end]
+
+    fm = None
+    if _yaml_handler.detect(stripped):
+        boundaries = _yaml_handler.FM_BOUNDARY.finditer(stripped)
+        opening = next(boundaries)
+        closing = next(boundaries, None)
+        if closing is not None:
+            fm = stripped[opening.end() : closing.start()]
+            start += closing.end()
+
+    # skip the whitespace frontmatter strips between the header and the content
+    while start < end and text[start].isspace():
+        start += 1
+    return fm, start, end
+
+
+def parse_note_text(file_path: str, text: str) -> NoteRecord:
+    fm, body_start, body_end = split_frontmatter(text)
+    return _note_record(file_path, fm, body_start, body_end, extract_wiki_links(text))
+
+
+def parse_note_lines(file_path: str, lines: Iterable[str]) -> NoteRecord:
+    """Parses a note given line by line, like `parse_note_text` parses its text.
+
+    Only the YAML header and one chunk of lines are held in memory, the
+    offsets of the body are counted as the lines go by.
+    """
+    # before the header, in it, between it and the body, in the body
+    state = "before"
+    header_lines: list[str] = []
+    header_start = 0
+    fm = None
+    body_start = 0
+    body_end = 0
+    position = 0
+
+    def read_lines():
+        nonlocal state, header_start, fm, body_start, body_end, position
+        for line in lines:
+            content = line.lstrip()
+            if state == "header":
+                if _yaml_handler.FM_BOUNDARY.match(line):
+                    fm = "".join(header_lines)
+                    header_lines.clear()
+                    state = "after"
+                else:
+                    header_lines.append(line)
+            elif content and state != "body":
+                content_start = position + len(line) - len(content)
+                if state == "before" and _yaml_handler.FM_BOUNDARY.match(content):
+                    state = "header"
+                    header_start = content_start
+                else:
+                    state = "body"
+                    body_start = content_start
+            if content:
+                body_end = position + len(line.rstrip())
+            position += len(line)
+            yield line
+
+    wiki_links = extract_wiki_links_from_lines(read_lines())
+    if state == "before":
+        # only whitespace
+        body_start = position
+    elif state == "header":
+        # the header is never closed, so it is content
+        body_start = header_start
+    elif state == "after":
+        body_start = body_end
+    return _note_record(file_path, fm, body_start, body_end, wiki_links)
+
+
+def _note_record(
+    file_path: str, fm: str | None, body_start: int, body_end: int, wiki_links: list[Hyperlink]
+) -> NoteRecord:
+    metadata = {}
+    if fm is not None:
+        fm_data = _yaml_handler.load(fm)
+        if isinstance(fm_data, dict):
+            metadata = fm_data
+
+    base_file_name_wo_ext, _ = os.path.splitext(os.path.basename(file_path))
+    return NoteRecord(
+        path=str(file_path),
+        name=base_file_name_wo_ext,
+        published=metadata.get(PUBLISH_KEY, False),
+        hugo_section=metadata.get(HUGO_SECTION_KEY),
+        alternate_link=metadata.get(ALTERNATE_LINK_KEY),
+        title=metadata.get("title"),
+        body_start=body_start,
+        body_end=body_end,
+        wiki_links=wiki_links,
+        metadata=metadata,
+    )
+
+
+def parse_note(file_path: str) -> NoteRecord:
+    """Reads and parses a single note from disk, large notes line by line."""
+    metrics.count(FILES_READ)
+    metrics.count(NOTES_PARSED)
+    with open(file_path, "r", encoding="utf-8") as f:
+        size = os.fstat(f.fileno()).st_size
+        metrics.count(BYTES_READ, size)
+        try:
+            if size >= STREAMING_THRESHOLD_BYTES:
+                return parse_note_lines(file_path, f)
+            return parse_note_text(file_path, f.read())
+        except Exception as e:
+            logging.error(f"Error in reading file: {file_path} - {e}")
+            raise e
+
+
+class VaultIndex:
+    """Parsed view of the vault, so every note is read and YAML-parsed once.
+
+    Records are keyed by the note path as a string. Notes which were not part
+    of the initial scan are parsed on first access and memoized. With a parse
+    cache, notes unchanged since an earlier run are not parsed at all.
+    """
+
+    def __init__(
+        self,
+        records: dict[str, NoteRecord] | None = None,
+        parse_cache: ParseCache | None = None,
+    ):
+        self._records: dict[str, NoteRecord] = records or {}
+        self.parse_cache = parse_cache
+
+    def __getstate__(self) -> dict:
+        # the cache connection stays in the process which opened it
+        return {"_records": self._records, "parse_cache": None}
+
+    @classmethod
+    def from_vault(cls, origin: Path, ignore=DEFAULT_IGNORE) -> "VaultIndex":
+        return cls.from_files(scan_vault(origin, ignore).markdown_files)
+
+    @classmethod
+    def from_files(
+        cls,
+        markdown_files: list[str],
+        parse_cache: ParseCache | None = None,
+        jobs: int | None = None,
+    ) -> "VaultIndex":
+        """Indexes the notes, parsing them on `jobs` threads, see `prefetch`."""
+        index = cls(parse_cache=parse_cache)
+        index.prefetch(markdown_files, jobs)
+        if parse_cache is not None:
+            parse_cache.retain(set(map(str, markdown_files)))
+            parse_cache.flush()
+            logging.info(
+                f"Parse cache: {parse_cache.hits} hits, {parse_cache.misses} misses"
+            )
+        logging.info(f"Indexed {len(index)} notes")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, file_path) -> bool:
+        return str(file_path) in self._records
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def get(self, file_path) -> NoteRecord:
+        key = str(file_path)
+        record = self._records.get(key)
+        if record is None:
+            if self.parse_cache is None:
+                record = parse_note(key)
+            else:
+                stat = os.stat(key)
+                record = self.parse_cache.get(key, stat)
+                if record is not None:
+                    metrics.count(PARSE_CACHE_HITS)
+                else:
+                    record = parse_note(key)
+                    self.parse_cache.put(key, stat, record)
+            self._records[key] = record
+        return record
+
+    def prefetch(self, file_paths, jobs: int | None = None) -> None:
+        """Indexes the given notes, parsing the ones not indexed yet on a thread pool.
+
+        Reading and parsing overlap across the notes, the parse cache is only
+        used from the calling thread.
+        """
+        keys = [key for key in dict.fromkeys(map(str, file_paths)) if key not in self._records]
+        records: dict[str, NoteRecord] = {}
+        stats: dict[str, os.stat_result] = {}
+        for key in keys:
+            if self.parse_cache is not None:
+                stats[key] = os.stat(key)
+                record = self.parse_cache.get(key, stats[key])
+                if record is not None:
+                    metrics.count(PARSE_CACHE_HITS)
+                    records[key] = record
+        to_parse = [key for key in keys if key not in records]
+        if len(to_parse) > 1:
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                records.update(zip(to_parse, executor.map(parse_note, to_parse)))
+        else:
+            records.update((key, parse_note(key)) for key in to_parse)
+        if self.parse_cache is not None:
+            for key in to_parse:
+                self.parse_cache.put(key, stats[key], records[key])
+        for key in keys:
+            self._records[key] = records[key]
+
+    def reload(self, file_path) -> NoteRecord | None:
+        """Parses a note again after it changed, returns None once it is deleted."""
+        key = str(file_path)
+        self._records.pop(key, None)
+        if not os.path.isfile(key):
+            return None
+        record = self.get(key)
+        if self.parse_cache is not None:
+            self.parse_cache.flush()
+        return record
+
+    def is_published(self, file_path) -> bool:
+        return self.get(file_path).published
+
+    def get_alternate_link(self, file_path) -> str | None:
+        return self.get(file_path).alternate_link
+
+    def get_hugo_section(self, file_path) -> str | None:
+        return self.get(file_path).require_hugo_section()
+
+    def explicit_publish_list(self) -> list[str]:
+        to_publish = []
+        for record in self._records.values():
+            if record.published:
+                logging.info("TO PUBLISH: %s", record.path)
+                to_publish.append(record.path)
+        return sorted(to_publish)
+
+    def alternate_link_dict(self) -> dict[str, str]:
+        alternate_link = {}
+        for record in self._records.values():
+            if ALTERNATE_LINK_KEY in record.metadata:
+                logging.info("Alternate link in: %s", record.path)
+                alternate_link[record.name] = record.alternate_link
+        return alternate_link
+
+    def load_post(self, file_path, text: str | None = None) -> frontmatter.Post:
+        """Rebuilds the `frontmatter.Post` of a note without parsing YAML again.
+
+        The metadata is deep-copied, as callers are free to mutate the post.
+        """
+        record = self.get(file_path)
+        if text is None:
+            with open(record.path, "r", encoding="utf-8") as f:
+                text = f.read()
+                metrics.count(BYTES_READ, os.fstat(f.fileno()).st_size)
+            metrics.count(FILES_READ)
+        content = text[record.body_start : record.body_end]
+        post = frontmatter.Post(content)
+        post.metadata = self.load_metadata(file_path)
+        return post
+
+    def load_metadata(self, file_path) -> dict:
+        """Returns a deep copy of the front matter of a note."""
+        return copy.deepcopy(self.get(file_path).metadata)
+
+    def read_body_lines(self, file_path) -> Iterator[str]:
+        """Reads the body of a note line by line, without the front matter.
+
+        The lines join up to the content `load_post` returns, but only one
+        line is held in memory at a time.
+        """
+        record = self.get(file_path)
+        with open(record.path, "r", encoding="utf-8") as f:
+            position = 0
+            for line in f:
+                line_end = position + len(line)
+                if line_end > record.body_start:
+                    yield line[max(record.body_start - position, 0) : record.body_end - position]
+                position = line_end
+                if position >= record.body_end:
+                    break
+            metrics.count(BYTES_READ, os.fstat(f.fileno()).st_size)
+        metrics.count(FILES_READ)
@@ -0,0 +1,115 @@
+import fnmatch
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# Obsidian state, version control and the trash never hold publishable files
+DEFAULT_IGNORE = (".obsidian", ".git", ".trash")
+
+
+@dataclass
+class VaultScan:
+    """Files found by one scan of the vault, paths are sorted.
+
+    `duplicates` maps a file name found more than once to all of its paths,
+    the first of which is the one in `file_name_to_path_dict`.
+    """
+
+    files: list[str] = field(default_factory=list)
+    file_name_to_path_dict: dict[str, str] = field(default_factory=dict)
+    markdown_files: list[str] = field(default_factory=list)
+    duplicates: dict[str, list[str]] = field(default_factory=dict)
+
+
+def is_ignored(relative_path: str, ignore: tuple[str, ...] | list[str]) -> bool:
+    """Checks a path relative to the vault root against the ignore globs.
+
+    A glob matches either a file or directory name, like `.obsidian`, or a
+    relative path, like `templates/*`. Files inside an ignored directory are
+    ignored as well.
+    """
+    parts = relative_path.replace(os.sep, "/").split("/")
+    return any(
+        _matches(name, "/".join(parts[:depth]), ignore)
+        for depth, name in enumerate(parts, start=1)
+    )
+
+
+def _matches(name: str, relative_path: str, ignore) -> bool:
+    relative_path = relative_path.replace(os.sep, "/")
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+        for pattern in ignore
+    )
+
+
+def _scan_tree(top: str, origin: str, ignore) -> list[str]:
+    """Returns the files under `top`, skipping ignored entries."""
+    files = []
+    prefix_length = len(os.path.join(origin, ""))
+    stack = [top]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                # parents were checked before they were pushed
+                if _matches(entry.name, entry.path[prefix_length:], ignore):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    files.append(entry.path)
+    return files
+
+
+def scan_vault(
+    origin,
+    ignore: tuple[str, ...] | list[str] = DEFAULT_IGNORE,
+    jobs: int | None = None,
+) -> VaultScan:
+    """Lists the vault once, with `os.scandir`.
+
+    Every top level directory is scanned on its own thread, which keeps the
+    filesystem busy on network drives and cold caches.
+
+    Args:
+        origin: The vault root.
+        ignore: Globs of the files and directories to skip, see `is_ignored`.
+        jobs: Number of scanning threads, defaults to the executor's default.
+    """
+    origin = str(origin)
+    files = []
+    subtrees = []
+    with os.scandir(origin) as entries:
+        for entry in entries:
+            if _matches(entry.name, entry.name, ignore):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subtrees.append(entry.path)
+            elif entry.is_file():
+                files.append(entry.path)
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for subtree_files in executor.map(
+            lambda top: _scan_tree(top, origin, ignore), subtrees
+        ):
+            files.extend(subtree_files)
+    files.sort()
+
+    scan = VaultScan(files=files)
+    for file_path in files:
+        file_name = os.path.basename(file_path)
+        if file_name in scan.file_name_to_path_dict:
+            scan.duplicates.setdefault(
+                file_name, [scan.file_name_to_path_dict[file_name]]
+            ).append(file_path)
+        else:
+            scan.file_name_to_path_dict[file_name] = file_path
+        if file_name.endswith(".md"):
+            scan.markdown_files.append(file_path)
+
+    logging.info(
+        f"Scanned {len(files)} files under {origin}, {len(scan.markdown_files)} notes"
+    )
+    return scan
@@ -0,0 +1,240 @@
+import logging
+import os
+import queue
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from obsidian_se_hugo.config import Config
+from obsidian_se_hugo.file_util import COMPARE_STAT, LINK_MODE_COPY
+from obsidian_se_hugo.manifest import Manifest, hash_states
+from obsidian_se_hugo.vault_scanner import DEFAULT_IGNORE, is_ignored, scan_vault
+
+if TYPE_CHECKING:
+    from obsidian_se_hugo.hugo_util import ConversionResult
+    from obsidian_se_hugo.link_graph import LinkGraph
+    from obsidian_se_hugo.vault_index import VaultIndex
+
+# An editor save fires several events, changes closer than this are batched
+DEBOUNCE_SECONDS = 0.1
+POLL_INTERVAL_SECONDS = 0.5
+
+_WATCHED_EVENT_TYPES = {"created", "modified", "deleted", "moved"}
+
+
+def snapshot_vault(vault_path, ignore=DEFAULT_IGNORE) -> dict[str, tuple[int, int]]:
+    """Returns the (mtime, size) of every file in the vault, by path."""
+    snapshot = {}
+    for file_path in scan_vault(vault_path, ignore).files:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            continue
+        snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def poll_changes(
+    vault_path, ignore=DEFAULT_IGNORE, interval: float = POLL_INTERVAL_SECONDS
+) -> Iterator[set[str]]:
+    """Yields the paths created, modified or deleted between two scans of the vault."""
+    snapshot = snapshot_vault(vault_path, ignore)
+    while True:
+        time.sleep(interval)
+        current = snapshot_vault(vault_path, ignore)
+        changed = {
+            file_path
+            for file_path in current.keys() | snapshot.keys()
+            if current.get(file_path) != snapshot.get(file_path)
+        }
+        snapshot = current
+        if changed:
+            yield changed
+
+
+def watchdog_changes(
+    vault_path, ignore=DEFAULT_IGNORE, debounce: float = DEBOUNCE_SECONDS
+) -> Iterator[set[str]]:
+    """Yields batches of changed paths as the OS reports them, using watchdog."""
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    events = queue.SimpleQueue()
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in _WATCHED_EVENT_TYPES:
+                return
+            events.put(os.fsdecode(event.src_path))
+            if event.event_type == "moved":
+                events.put(os.fsdecode(event.dest_path))
+
+    observer = Observer()
+    observer.schedule(_Handler(), str(vault_path), recursive=True)
+    observer.start()
+    try:
+        while True:
+            changed = {events.get()}
+            while True:
+                try:
+                    changed.add(events.get(timeout=debounce))
+                except queue.Empty:
+                    break
+            changed = {
+                file_path
+                for file_path in changed
+                if not is_ignored(os.path.relpath(file_path, vault_path), ignore)
+            }
+            if changed:
+                yield changed
+    finally:
+        observer.stop()
+        observer.join()
+
+
+def vault_changes(
+    vault_path,
+    ignore=DEFAULT_IGNORE,
+    poll_interval: float = POLL_INTERVAL_SECONDS,
+    logger: logging.Logger = logging.getLogger(__name__),
+) -> Iterator[set[str]]:
+    """Yields batches of changed paths, polling when watchdog is not installed."""
+    try:
+        import watchdog  # noqa: F401
+    except ImportError:
+        logger.info(f"watchdog is not installed, polling every {poll_interval}s")
+        return poll_changes(vault_path, ignore, poll_interval)
+    return watchdog_changes(vault_path, ignore)
+
+
+class WatchSession:
+    """Keeps an export up to date while the vault changes.
+
+    The vault index, the file name dictionary, the link graph, the catalog
+    of related problems and the manifest of the last export stay in memory.
+    A change reparses only the changed notes and updates the graph and the
+    catalog for them, and the manifest decides what is converted again: the
+    changed notes and the notes whose rendered links depend on them.
+
+    `input_states` are the `file_states` the manifest's inputs were hashed
+    from. They are kept up to date, so that an incremental run after the
+    session finds nothing changed.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        vault_path: Path,
+        vault_index: "VaultIndex",
+        file_name_to_path_dict: dict[str, str],
+        manifest: Manifest,
+        manifest_path: str,
+        link_mode: str = LINK_MODE_COPY,
+        compare: str = COMPARE_STAT,
+        logger: logging.Logger = logging.getLogger(__name__),
+        link_graph: "LinkGraph | None" = None,
+        input_states: dict[str, tuple[int, int]] | None = None,
+    ):
+        # imported here, the command line only needs them once there is work to do
+        from obsidian_se_hugo.link_graph import LinkGraph
+        from obsidian_se_hugo.link_resolver import LinkResolver
+        from obsidian_se_hugo.problem_catalog import ProblemCatalog
+
+        self.config = config
+        self.vault_path = vault_path
+        self.vault_index = vault_index
+        self.file_name_to_path_dict = file_name_to_path_dict
+        self.manifest = manifest
+        self.manifest_path = manifest_path
+        self.link_mode = link_mode
+        self.compare = compare
+        self.logger = logger
+        if link_graph is None:
+            link_graph = LinkGraph.from_index(vault_index, file_name_to_path_dict)
+        self.link_graph = link_graph
+        self.problem_catalog = ProblemCatalog.from_index(
+            LinkResolver(
+                file_name_to_path_dict,
+                {},
+                vault_index,
+                flattened_sections=config.hugo.flattened_sections,
+            )
+        )
+        self.input_states = input_states
+
+    def apply_changes(self, changed_paths: set[str]) -> "ConversionResult | None":
+        """Exports the changes, returns None when the vault cannot be exported as is."""
+        # imported here, the command line only needs it once there is work to do
+        from obsidian_se_hugo.exporter import export_notes
+
+        manifest = Manifest(self.manifest.settings)
+        manifest.manual = self.manifest.manual
+        if self.input_states is not None:
+            # stated before the export, a change during it makes the inputs differ
+            for file_path in changed_paths:
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    self.input_states.pop(file_path, None)
+                    continue
+                self.input_states[file_path] = (stat.st_mtime_ns, stat.st_size)
+        try:
+            for file_path in sorted(changed_paths):
+                file_name = os.path.basename(file_path)
+                known_path = self.file_name_to_path_dict.get(file_name)
+                if os.path.isfile(file_path):
+                    if known_path is None or not os.path.isfile(known_path):
+                        self.file_name_to_path_dict[file_name] = file_path
+                    elif known_path != file_path:
+                        self.logger.warning(
+                            f"Duplicate file name {file_name}, links resolve to {known_path}"
+                        )
+                elif known_path == file_path:
+                    del self.file_name_to_path_dict[file_name]
+                if file_name.endswith(".md"):
+                    self.vault_index.reload(file_path)
+            self.link_graph.update(changed_paths, self.vault_index, self.file_name_to_path_dict)
+            self.problem_catalog.forget(os.path.basename(file_path) for file_path in changed_paths)
+
+            conversion = export_notes(
+                self.config,
+                self.vault_index,
+                self.file_name_to_path_dict,
+                manifest,
+                self.manifest,
+                link_mode=self.link_mode,
+                compare=self.compare,
+                logger=self.logger,
+                link_graph=self.link_graph,
+                problem_catalog=self.problem_catalog,
+            )
+        except Exception as e:
+            # e.g. a link to a note which is not written yet, the next save retries
+            self.logger.error(f"Could not export the changes: {type(e).__name__}: {e}")
+            return None
+
+        if self.input_states is not None:
+            manifest.inputs = hash_states(self.input_states)
+        manifest.save(self.manifest_path)
+        self.manifest = manifest
+        for link, error in sorted(conversion.errors.items()):
+            self.logger.error(f"Could not convert ({link}): {error}")
+        return conversion
+
+    def watch(self, poll_interval: float = POLL_INTERVAL_SECONDS) -> None:
+        """Exports every change of the vault until interrupted."""
+        self.logger.info(f"Watching {self.vault_path} for changes")
+        try:
+            for changed_paths in vault_changes(
+                self.vault_path, self.config.obsidian.ignore, poll_interval, self.logger
+            ):
+                started = time.perf_counter()
+                conversion = self.apply_changes(changed_paths)
+                if conversion is not None:
+                    self.logger.info(
+                        f"Exported {len(conversion.written)} notes for {len(changed_paths)} "
+                        f"changed files in {time.perf_counter() - started:.3f}s"
+                    )
+        except KeyboardInterrupt:
+            self.logger.info("Stopped watching")
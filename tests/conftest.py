@@ -1 +1,16 @@
 """Contains global fixtures for unit tests."""
+
+import pytest
+
+
+@pytest.fixture()
+def make_note(tmp_path):
+    """Returns a helper writing a note into a temporary vault."""
+
+    def _make_note(relative_path: str, text: str):
+        path = tmp_path / "vault" / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    return _make_note
@@ -0,0 +1,38 @@
+"""Unit tests for the deduplicated asset store."""
+
+from obsidian_se_hugo.asset_store import find_duplicate_assets
+from obsidian_se_hugo.link_resolver import LinkResolver
+from obsidian_se_hugo.manifest import Manifest, hash_file
+from obsidian_se_hugo.vault_index import VaultIndex
+
+
+def test_duplicate_assets_link_to_one_copy(tmp_path):
+    contents = {
+        "image 1.png": b"same",
+        "Pasted image 2.png": b"same",
+        "Pasted image 3.png": b"other",
+        "same.gif": b"same",
+    }
+    destinations = {}
+    for name, content in contents.items():
+        (tmp_path / name).write_bytes(content)
+        directory = "content" if name.endswith(".gif") else "regular"
+        destinations[name] = (str(tmp_path / name), f"site/{directory}/{name}")
+
+    aliases = find_duplicate_assets(destinations, hash_file)
+    # the gif goes to another directory, so it keeps its own copy
+    assert aliases == {"image 1.png": "Pasted image 2.png"}
+
+    resolver = LinkResolver({}, {}, VaultIndex(), asset_aliases=aliases)
+    assert resolver.resolve("image 1.png").url == "/images/obsidian/regular/pasted-image-2.png"
+    assert resolver.resolve("image 1.png").name == "image 1.png"
+    assert resolver.resolve("Pasted image 3.png").url == "/images/obsidian/regular/pasted-image-3.png"
+
+
+def test_changed_asset_aliases():
+    previous = Manifest("settings")
+    previous.asset_aliases = {"a.png": "A.png", "b.png": "A.png"}
+    current = Manifest("settings")
+    current.asset_aliases = {"a.png": "A.png", "c.png": "A.png"}
+    assert current.changed_asset_aliases(previous) == {"b.png", "c.png"}
+    assert current.changed_asset_aliases(None) == set()
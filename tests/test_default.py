@@ -1,6 +1,29 @@
 """Stub unit test file."""
 
-from obsidian_se_hugo.lib import adder
+import ast
+import os
+import subprocess
+import sys
+import threading
+
+import hmain
+from obsidian_se_hugo import vault_index
+from obsidian_se_hugo.cli import main
+from obsidian_se_hugo.file_util import LINK_MODE_COPY
+
+
+def make_site(tmp_path):
+    """Writes a vault with one published note, an empty site and its configuration."""
+    (tmp_path / "vault").mkdir()
+    (tmp_path / "vault" / "A.md").write_text("---\ntitle: A\npublished: true\nhugo_section: cs\n---\nA")
+    (tmp_path / "site" / "content").mkdir(parents=True)
+    (tmp_path / "logs").mkdir()
+    (tmp_path / "hconfig.yaml").write_text(
+        f"obsidian:\n  root_path: {tmp_path / 'vault'}\n"
+        f"hugo:\n  root_path: {tmp_path / 'site'}\n  posts_dir: ''\n  posts_dir_list: [cs]\n"
+        "  images_dir: images\n  allowed_frontmatter_keys: []\n  manual_content_dir: manual\n"
+        "  content_dir: content\n  content_images_dir: content-images\n"
+    )
 
 
 def test_stub() -> None:
@@ -9,6 +32,61 @@ def test_stub() -> None:
     assert not False
 
 
-def test_adder():
-    """Test the adder function."""
-    assert adder(3, 4) == 7  # noqa: PLR2004
+def test_default_arguments():
+    """Test the defaults of the command line."""
+    args = hmain.parse_args([])
+    assert args.jobs == 1
+    assert args.asset_link_mode == LINK_MODE_COPY
+    assert not args.incremental
+
+
+def test_run_without_changes_loads_no_parser(tmp_path):
+    """An incremental run of an unchanged vault stops before the conversion modules load."""
+    make_site(tmp_path)
+    script = (
+        "import sys\n"
+        "from obsidian_se_hugo.cli import main\n"
+        "main(['--config', 'hconfig.yaml', '--incremental'])\n"
+        "print(sorted(name for name in sys.modules if name.split('.')[0] in "
+        "('frontmatter', 'slugify', 'sqlite3', 'obsidian_se_hugo')))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    for _ in range(2):
+        run = subprocess.run(
+            [sys.executable, "-c", script], cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+        )
+
+    assert (tmp_path / "site" / "content" / "cs" / "a.md").exists()
+    loaded = ast.literal_eval(run.stdout)
+    assert "frontmatter" not in loaded
+    assert "slugify" not in loaded
+    assert "sqlite3" not in loaded
+    assert not {
+        "obsidian_se_hugo.exporter",
+        "obsidian_se_hugo.link_graph",
+        "obsidian_se_hugo.parse_cache",
+        "obsidian_se_hugo.publish",
+        "obsidian_se_hugo.vault_index",
+        "obsidian_se_hugo.watch",
+    } & set(loaded)
+
+
+def test_export_parses_notes_on_threads(tmp_path, monkeypatch):
+    """An export parses every note once, on the threads of the index."""
+    make_site(tmp_path)
+    (tmp_path / "vault" / "B.md").write_text("---\ntitle: B\npublished: true\nhugo_section: cs\n---\n[[A]]")
+    (tmp_path / "vault" / "C.md").write_text("---\ntitle: C\n---\nC")
+    threads = []
+    parse_note = vault_index.parse_note
+
+    def recording_parse_note(file_path):
+        threads.append(threading.current_thread())
+        return parse_note(file_path)
+
+    monkeypatch.setattr(vault_index, "parse_note", recording_parse_note)
+    monkeypatch.chdir(tmp_path)
+    main(["--config", "hconfig.yaml", "--jobs", "2", "--no-parse-cache"])
+
+    assert (tmp_path / "site" / "content" / "cs" / "b.md").exists()
+    assert len(threads) == 3
+    assert threading.main_thread() not in threads
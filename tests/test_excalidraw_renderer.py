@@ -0,0 +1,78 @@
+"""Unit tests for the Excalidraw renderer, with a stub converter."""
+
+import sys
+
+from obsidian_se_hugo.excalidraw_renderer import ExcalidrawRenderer, svg_destination
+
+# writes <name>.svg next to every <name>.excalidraw, logs one line per call
+STUB_CONVERTER = """
+import json, os, sys
+with open(os.environ["STUB_LOG"], "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+for path in sys.argv[1:]:
+    with open(path) as f:
+        drawing = json.load(f)
+    if drawing.get("fail"):
+        sys.exit(1)
+    with open(path[: -len(".excalidraw")] + ".svg", "w") as f:
+        f.write("<svg>" + drawing["text"] + "</svg>")
+"""
+
+
+def write_drawing(path, json_content):
+    path.write_text(f"# Excalidraw Data\n\n```json\n{json_content}\n```\n")
+    return str(path)
+
+
+def test_drawings_are_rendered_in_batches_and_cached(tmp_path, monkeypatch):
+    converter = tmp_path / "converter.py"
+    converter.write_text(STUB_CONVERTER)
+    log = tmp_path / "calls.log"
+    monkeypatch.setenv("STUB_LOG", str(log))
+    vault = tmp_path / "vault"
+    vault.mkdir()
+    out = tmp_path / "out"
+    pairs = [
+        (write_drawing(vault / f"d{i}.excalidraw.md", f'{{"text": "{i}"}}'), str(out / f"d{i}.excalidraw.svg"))
+        for i in range(3)
+    ]
+    # same drawing twice, rendered once
+    pairs.append((write_drawing(vault / "copy.excalidraw.md", '{"text": "0"}'), str(out / "copy.excalidraw.svg")))
+    renderer = ExcalidrawRenderer(
+        [sys.executable, str(converter)], cache_dir=str(tmp_path / "cache"), batch_size=2, jobs=2
+    )
+
+    failed, stats = renderer.render(pairs)
+    assert failed == []
+    assert (stats.rendered, stats.cached, stats.failed) == (3, 0, 0)
+    assert len(log.read_text().splitlines()) == 2
+    assert (out / "d1.excalidraw.svg").read_text() == "<svg>1</svg>"
+    assert (out / "copy.excalidraw.svg").read_text() == "<svg>0</svg>"
+
+    (out / "d2.excalidraw.svg").unlink()
+    failed, stats = renderer.render(pairs)
+    assert (stats.rendered, stats.cached) == (0, 4)
+    assert len(log.read_text().splitlines()) == 2
+    assert (out / "d2.excalidraw.svg").read_text() == "<svg>2</svg>"
+
+
+def test_failed_drawings_are_returned(tmp_path, monkeypatch):
+    converter = tmp_path / "converter.py"
+    converter.write_text(STUB_CONVERTER)
+    monkeypatch.setenv("STUB_LOG", str(tmp_path / "calls.log"))
+    broken = (write_drawing(tmp_path / "broken.excalidraw.md", '{"fail": true}'), str(tmp_path / "broken.svg"))
+    no_json = tmp_path / "empty.excalidraw.md"
+    no_json.write_text("no drawing here")
+    empty = (str(no_json), str(tmp_path / "empty.svg"))
+    renderer = ExcalidrawRenderer([sys.executable, str(converter)], cache_dir=str(tmp_path / "cache"))
+
+    failed, stats = renderer.render([broken, empty])
+    assert sorted(failed) == sorted([broken, empty])
+    assert stats.failed == 2
+
+    missing = ExcalidrawRenderer([str(tmp_path / "no-such-converter")], cache_dir=str(tmp_path / "cache"))
+    assert missing.render([broken])[0] == [broken]
+
+
+def test_svg_destination():
+    assert svg_destination("images/excalidraw/a.excalidraw.md") == "images/excalidraw/a.excalidraw.svg"
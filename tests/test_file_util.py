@@ -0,0 +1,78 @@
+"""Unit tests for the file helpers."""
+
+import os
+
+import pytest
+
+from obsidian_se_hugo.file_util import LINK_MODE_HARDLINK, MergeConflictError, copy_files, merge_folders
+
+
+@pytest.mark.parametrize("link_mode", ["copy", "hardlink", "reflink"])
+def test_copy_files_skips_unchanged(tmp_path, link_mode):
+    sources = []
+    for i in range(3):
+        source = tmp_path / f"source-{i}.png"
+        source.write_bytes(b"x" * (i + 1))
+        sources.append(source)
+    pairs = [(str(source), str(tmp_path / f"dest-{i}.png")) for i, source in enumerate(sources)]
+
+    first = copy_files(pairs, link_mode=link_mode)
+    second = copy_files(pairs, link_mode=link_mode, compare="hash")
+    sources[0].write_bytes(b"changed")
+    copy_files(pairs, link_mode=link_mode)
+
+    assert (first.copied, first.bytes_copied) == (3, 6)
+    assert (second.skipped, second.bytes_skipped) == (3, 6)
+    assert (tmp_path / "dest-0.png").read_bytes() == b"changed"
+    if link_mode == "hardlink":
+        assert os.path.samefile(sources[1], tmp_path / "dest-1.png")
+
+
+def test_merge_folders_reports_conflicts_and_removes_deleted_files(tmp_path):
+    source = tmp_path / "manual"
+    dest = tmp_path / "content"
+    (source / "cs").mkdir(parents=True)
+    (dest / "cs").mkdir(parents=True)
+    (source / "about.md").write_text("about")
+    (source / "cs" / "_index.md").write_text("index")
+    (source / "cs" / "old.md").write_text("old")
+    (source / ".DS_Store").write_text("")
+
+    merged = merge_folders(str(source), str(dest))
+    assert sorted(merged) == [str(dest / "about.md"), str(dest / "cs" / "_index.md"), str(dest / "cs" / "old.md")]
+    assert not (dest / ".DS_Store").exists()
+    # files are copied, editing the merged file in place leaves the manual one alone
+    with open(dest / "about.md", "a") as f:
+        f.write(" edited")
+    assert (source / "about.md").read_text() == "about"
+
+    (source / "cs" / "old.md").unlink()
+    (source / "cs" / "_index.md").write_text("new index")
+    merged_again = merge_folders(str(source), str(dest), previous=merged)
+    assert (dest / "cs" / "_index.md").read_text() == "new index"
+    assert not (dest / "cs" / "old.md").exists()
+
+    # every conflict is reported, nothing is copied
+    (source / "new.md").write_text("new")
+    (source / "cs" / "note.md").write_text("manual")
+    (dest / "cs" / "note.md").write_text("exported")
+    with pytest.raises(MergeConflictError) as error:
+        merge_folders(str(source), str(dest))
+    assert error.value.conflicts == [
+        str(source / "about.md"),
+        str(source / "cs" / "_index.md"),
+        str(source / "cs" / "note.md"),
+    ]
+    assert not (dest / "new.md").exists()
+    linked = merge_folders(
+        str(source),
+        str(dest),
+        replaceable={str(dest / "cs" / "note.md")},
+        previous=merged_again,
+        link_mode=LINK_MODE_HARDLINK,
+    )
+    assert (dest / "cs" / "note.md").read_text() == "manual"
+    assert os.path.samefile(source / "cs" / "note.md", dest / "cs" / "note.md")
+    # switching back to copies unlinks the merged file from the manual one
+    merge_folders(str(source), str(dest), previous=linked)
+    assert not os.path.samefile(source / "cs" / "note.md", dest / "cs" / "note.md")
@@ -0,0 +1,38 @@
+"""Unit tests for the link graph discovery."""
+
+import pytest
+
+from obsidian_se_hugo.file_util import create_file_name_to_path_dictionary
+from obsidian_se_hugo.graph_util import MissingLinksError, grow_publish_list
+from obsidian_se_hugo.vault_index import VaultIndex
+
+
+def test_publish_list_grows_over_the_frontiers(tmp_path, make_note):
+    a = make_note("A.md", "---\npublished: true\n---\n[[B#Header]] [[#Local]] ![[x.png]]")
+    make_note("B.md", "---\npublished: true\n---\n[[C]] [[A]]")
+    make_note("C.md", "---\nalternate_link: https://example.com\n---\n[[Private]]")
+    make_note("Private.md", "---\ntitle: Private\n---\n")
+    file_name_to_path_dict = create_file_name_to_path_dictionary(tmp_path / "vault")
+
+    # notes are parsed as the frontiers reach them
+    vault_index = VaultIndex()
+    reachable_links, reachable_assets = grow_publish_list([str(a)], file_name_to_path_dict, vault_index, jobs=2)
+
+    assert reachable_links == ["A", "B", "C"]
+    assert reachable_assets == ["x.png"]
+    assert len(vault_index) == 3
+
+
+def test_all_broken_links_are_reported(tmp_path, make_note):
+    a = make_note("A.md", "---\npublished: true\n---\n[[Missing]] [[B]] [[Private]]")
+    make_note("B.md", "---\npublished: true\n---\n[[Also Missing]]")
+    make_note("Private.md", "---\ntitle: Private\n---\n")
+    file_name_to_path_dict = create_file_name_to_path_dictionary(tmp_path / "vault")
+
+    with pytest.raises(MissingLinksError) as excinfo:
+        grow_publish_list([str(a)], file_name_to_path_dict, VaultIndex())
+
+    assert len(excinfo.value.errors) == 3
+    assert "Outgoing Link Missing.md in 'A.md' cannot be found." in excinfo.value.errors
+    assert "Outgoing Link Also Missing.md in 'B.md' cannot be found." in excinfo.value.errors
+    assert any("should not be published" in error for error in excinfo.value.errors)
@@ -0,0 +1,222 @@
+"""Unit tests for the Hugo conversion."""
+
+import pytest
+
+from obsidian_se_hugo.config import HugoConfig, TransformRule
+from obsidian_se_hugo.file_util import create_file_name_to_path_dictionary
+import obsidian_se_hugo.hugo_util as hugo_util
+from obsidian_se_hugo.hugo_util import (
+    ConversionContext,
+    convert_markdown_file_to_hugo_format,
+    copy_markdown_files_using_hugo_section,
+    create_transform_registry,
+    default_transform_registry,
+    hugo_transform_pipeline,
+    insert_code_tabs,
+    insert_related_problems,
+    replace_latex_syntax,
+    replace_wikilinks_with_markdown_links,
+    replace_youtube_links_with_hugo_format_links,
+)
+from obsidian_se_hugo.link_resolver import LinkResolver
+from obsidian_se_hugo.transform_pipeline import STREAM_CHUNK_SIZE, OutputBuffer
+from obsidian_se_hugo.vault_index import VaultIndex
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_conversion_collects_errors_per_note(tmp_path, make_note, jobs):
+    make_note("A.md", "---\ntitle: A\npublished: true\nhugo_section: cs\n---\nSee [[B]]")
+    make_note("B.md", "---\ntitle: B\npublished: true\nhugo_section: cs/problems\n---\nB")
+    make_note("C.md", "---\npublished: true\nhugo_section: cs\n---\nNo title")
+    vault = tmp_path / "vault"
+    content = tmp_path / "content"
+    (content / "cs" / "problems").mkdir(parents=True)
+
+    result = copy_markdown_files_using_hugo_section(
+        ["A", "B", "C"],
+        str(content),
+        create_file_name_to_path_dictionary(vault),
+        vault_index=VaultIndex.from_vault(vault),
+        jobs=jobs,
+    )
+
+    assert sorted(result.written) == ["A", "B"]
+    assert sorted(result.seconds) == ["A", "B", "C"]
+    assert list(result.errors) == ["C"]
+    assert "Title is missing" in result.errors["C"]
+    converted = (content / "cs" / "a.md").read_text()
+    assert '[B]({{< relref "/cs/problems/b.md" >}})' in converted
+
+
+PIPELINE_DOCUMENTS = [
+    "No tokens at all\n",
+    "[[External|ext]] ![Intro](https://youtu.be/abc) $$a \\\\ b \\$ \\cellcolor{YellowOrange}$$",
+    "## Solution\n\n#### Code\n\n  ```java\nclass A {}\n```\n\n\n### Next\n\n#### Code\n\ntail\n\n",
+    "Intro `[[inline]]`\n\n#### Code\n\nx\n## Solution\ntext\n## Solution\n",
+]
+
+
+@pytest.mark.parametrize("document", PIPELINE_DOCUMENTS)
+def test_pipeline_matches_sequential_passes(document):
+    alternate_links = {"External": "https://example.com"}
+    expected = replace_wikilinks_with_markdown_links(document, alternate_links)
+    expected = replace_youtube_links_with_hugo_format_links(expected)
+    expected = replace_latex_syntax(expected)
+    expected = insert_related_problems(insert_code_tabs(expected))
+    context = ConversionContext(
+        input_file_path="",
+        hugo_section="cs/problems/algorithms",
+        metadata={"related_problems": ["/cs/problems/x"]},
+        link_resolver=LinkResolver({}, alternate_links, VaultIndex()),
+    )
+
+    assert hugo_transform_pipeline.run(document, context) == expected
+
+
+@pytest.mark.parametrize("document", PIPELINE_DOCUMENTS)
+def test_prefiltered_pipeline_matches_full_pipeline(document):
+    context = ConversionContext(
+        input_file_path="",
+        hugo_section="cs/problems/algorithms",
+        metadata={"related_problems": ["/cs/problems/x"]},
+        link_resolver=LinkResolver({}, {"External": "https://example.com"}, VaultIndex()),
+    )
+    pipeline = default_transform_registry.pipeline("cs/problems/algorithms", document)
+
+    assert pipeline.run(document, context) == hugo_transform_pipeline.run(document, context)
+
+
+def test_transform_registry_picks_transforms_by_section_and_content():
+    def names(pipeline):
+        return [transform.name for transform in pipeline.transforms]
+
+    registry = default_transform_registry
+    assert names(registry.pipeline("cs/problems/arrays")) == [
+        "wikilinks",
+        "youtube",
+        "latex",
+        "code_tabs",
+        "related_problems",
+    ]
+    assert "related_problems" not in names(registry.pipeline("cs/algorithms"))
+    assert names(registry.pipeline("cs/problems/arrays", "No tokens at all\n")) == []
+    assert names(registry.pipeline("cs", "[[A]] and $$x$$")) == ["wikilinks", "latex"]
+    assert registry.pipeline("maths", "[[A]]") is registry.pipeline("cs", "[[B]]")
+
+    hugo_config = HugoConfig("site", "", ["cs"], "images", [], "manual", "content", "images")
+    hugo_config.transforms = [TransformRule(["maths/*"], ["latex", "topic_categories"])]
+    hugo_config.topic_categories = {"sql": ["database", "sql"]}
+    registry = create_transform_registry(hugo_config)
+    assert names(registry.pipeline("maths/statistics")) == ["latex"]
+    assert names(registry.pipeline("cs")) == []
+    metadata = {"topic": "sql"}
+    for transform in registry.transforms_for("maths/statistics"):
+        transform.front_matter(metadata)
+    assert metadata["categories"] == ["database", "sql"]
+
+    hugo_config.transforms = [TransformRule(["*"], ["wikilink"])]
+    with pytest.raises(ValueError, match="Unknown transforms"):
+        create_transform_registry(hugo_config)
+
+
+def test_unclosed_latex_is_text():
+    # the $$ in the first paragraph is never closed, the one after it pairs
+    document = "Cost $$ [[External]]\n\n#### Code\n\nx\n## Solution\nb $$\\\\$$ [[External]]"
+    alternate_links = {"External": "https://example.com"}
+    context = ConversionContext(
+        input_file_path="",
+        hugo_section="cs/problems/algorithms",
+        metadata={"related_problems": ["/cs/problems/x"]},
+        link_resolver=LinkResolver({}, alternate_links, VaultIndex()),
+    )
+    expected = replace_wikilinks_with_markdown_links(document, alternate_links)
+    expected = insert_related_problems(insert_code_tabs(replace_latex_syntax(expected)))
+
+    assert hugo_transform_pipeline.run(document, context) == expected
+    assert expected == (
+        "Cost $$ [External](https://example.com)\n\n#### Code\n\n{{< code_tabs >}}\nx\n"
+        "{{< /code_tabs >}}\n{{< related_problems_expander >}}\n## Solution\n"
+        "b $$\\\\\\\\$$ [External](https://example.com)"
+    )
+    flushed = []
+    out = OutputBuffer(sink=flushed.append)
+    hugo_transform_pipeline.run_lines(document.splitlines(keepends=True), out, context, chunk_size=1)
+    assert "".join(flushed) + out.getvalue() == expected
+    # the first paragraph could be flushed before the end of the note
+    assert flushed
+    # math is paired within a paragraph, a $$ block with a blank line in it is text
+    document = "$$\nx \\\\ y\n\nz\n$$\n"
+    assert hugo_transform_pipeline.run(document, context) == document
+
+
+def test_pipeline_ignores_headings_inside_code():
+    document = "#### Code\n\n```python\n## comment\n```\n#### Complexity\nO(n)"
+    context = ConversionContext("", None, {}, LinkResolver({}, {}, VaultIndex()))
+
+    assert hugo_transform_pipeline.run(document, context) == (
+        "#### Code\n\n{{< code_tabs >}}\n```python\n## comment\n```\n{{< /code_tabs >}}\n#### Complexity\nO(n)"
+    )
+
+
+STREAMED_DOCUMENTS = PIPELINE_DOCUMENTS + [
+    "a\n```python\n[[External]]\n\n## not a heading\n```\nb [[External]]\n",
+    "$$\nx \\\\ y\n\nz\n$$\n`open\ninline` and ``` unclosed\n[[External]]\n",
+    "#### Code\n\n```java\nA\n```\n\n| a |\n| b |\n## Solution\nend",
+]
+
+
+@pytest.mark.parametrize("document", STREAMED_DOCUMENTS)
+def test_streamed_pipeline_matches_run(document):
+    context = ConversionContext(
+        input_file_path="",
+        hugo_section="cs/problems/algorithms",
+        metadata={"related_problems": ["/cs/problems/x"]},
+        link_resolver=LinkResolver({}, {"External": "https://example.com"}, VaultIndex()),
+    )
+    flushed = []
+    out = OutputBuffer(sink=flushed.append)
+    # cut the document wherever possible
+    hugo_transform_pipeline.run_lines(
+        document.splitlines(keepends=True), out, context, chunk_size=1
+    )
+
+    streamed = "".join(flushed) + out.getvalue()
+    assert streamed == hugo_transform_pipeline.run(document, context)
+
+
+def test_streamed_latex_matches_run():
+    context = ConversionContext("", "cs", {}, LinkResolver({}, {}, VaultIndex()))
+    paragraphs = [
+        f"Step {i} $$x_{i} \\\\ y$$ and\n$$\na_{i} \\\\ b\n$$\n" + ("\n" if i % 2 else "")
+        for i in range(4 * STREAM_CHUNK_SIZE // 40)
+    ]
+    document = "".join(paragraphs) + "Left open $$\n\nEnd\n"
+    flushed = []
+    out = OutputBuffer(sink=flushed.append)
+    hugo_transform_pipeline.run_lines(document.splitlines(keepends=True), out, context)
+
+    assert "".join(flushed) + out.getvalue() == hugo_transform_pipeline.run(document, context)
+    assert len(flushed) > 1
+
+
+def test_large_notes_are_streamed_to_the_same_output(tmp_path, make_note, monkeypatch):
+    body = "\n".join(f"| {i} | [[B]] | `[[B]]` |" for i in range(50))
+    make_note("A.md", f"---\ntitle: A\nhugo_section: cs\n---\n\n#### Code\n\nx\n\n{body}\n\n")
+    make_note("B.md", "---\ntitle: B\npublished: true\nhugo_section: cs\n---\nB")
+    vault = tmp_path / "vault"
+    file_name_to_path_dict = create_file_name_to_path_dictionary(vault)
+    vault_index = VaultIndex.from_vault(vault)
+
+    outputs = []
+    for threshold in (1 << 30, 0):
+        monkeypatch.setattr(hugo_util, "STREAMING_THRESHOLD_BYTES", threshold)
+        output = tmp_path / f"a-{threshold}.md"
+        convert_markdown_file_to_hugo_format(
+            str(vault / "A.md"),
+            str(output),
+            file_name_to_path_dict=file_name_to_path_dict,
+            vault_index=vault_index,
+        )
+        outputs.append(output.read_text())
+
+    assert outputs[0] == outputs[1]
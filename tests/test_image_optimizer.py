@@ -0,0 +1,108 @@
+"""Unit tests for the image optimizer, skipped without Pillow."""
+
+import os
+
+import pytest
+
+from obsidian_se_hugo.config import Config, HugoConfig, ImageOptimizationConfig, ObsidianConfig
+from obsidian_se_hugo.exporter import export_notes
+from obsidian_se_hugo.file_util import create_file_name_to_path_dictionary
+from obsidian_se_hugo.image_optimizer import ImageOptimizer, optimized_destination
+from obsidian_se_hugo.manifest import Manifest, hash_file
+from obsidian_se_hugo.vault_index import VaultIndex
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_image(path, size, mode="RGB"):
+    image = Image.new(mode, size, "red")
+    exif = Image.Exif()
+    exif[0x010F] = "Camera"
+    image.save(path, exif=exif)
+    return str(path)
+
+
+def test_images_are_resized_converted_and_cached(tmp_path):
+    sources = [
+        make_image(tmp_path / "wide.png", (400, 100)),
+        make_image(tmp_path / "small.jpg", (50, 40)),
+        make_image(tmp_path / "palette.png", (20, 20), mode="P"),
+    ]
+    images = [
+        (source, hash_file(source), optimized_destination(str(tmp_path / "out" / source.rsplit("/", 1)[1])))
+        for source in sources
+    ]
+    optimizer = ImageOptimizer(max_width=200, quality=80, cache_dir=str(tmp_path / "cache"), jobs=2)
+
+    failed, stats = optimizer.optimize(images)
+    assert failed == []
+    assert (stats.optimized, stats.cached) == (3, 0)
+    with Image.open(tmp_path / "out" / "wide.png.webp") as optimized:
+        assert optimized.format == "WEBP"
+        assert optimized.size == (200, 50)
+        assert not optimized.getexif()
+    with Image.open(tmp_path / "out" / "small.jpg.webp") as optimized:
+        assert optimized.size == (50, 40)
+
+    failed, stats = optimizer.optimize(images)
+    assert (stats.optimized, stats.cached) == (0, 3)
+
+    # other settings are cached separately
+    _, stats = ImageOptimizer(max_width=100, quality=80, cache_dir=str(tmp_path / "cache")).optimize(images[:1])
+    assert stats.optimized == 1
+
+
+def test_broken_images_are_returned(tmp_path):
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image")
+    image = (str(broken), hash_file(str(broken)), str(tmp_path / "broken.png.webp"))
+
+    failed, stats = ImageOptimizer(max_width=200, quality=80, cache_dir=str(tmp_path / "cache")).optimize([image])
+    assert failed == [image]
+    assert stats.failed == 1
+    assert not (tmp_path / "broken.png.webp").exists()
+
+
+def test_export_links_images_which_cannot_be_optimized_by_their_name(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    vault = tmp_path / "vault"
+    site = tmp_path / "site"
+    (vault / "attachments").mkdir(parents=True)
+    (site / "content" / "cs").mkdir(parents=True)
+    (vault / "A.md").write_text(
+        "---\ntitle: A\npublished: true\nhugo_section: cs\n---\n"
+        "![[broken.png]] ![[photo.webp]] ![[ok.png]]"
+    )
+    broken = vault / "attachments" / "broken.png"
+    broken.write_bytes(b"not an image")
+    make_image(vault / "attachments" / "photo.webp", (20, 20))
+    make_image(vault / "attachments" / "ok.png", (20, 20))
+    config = Config(
+        ObsidianConfig(str(vault)),
+        HugoConfig(
+            str(site), "", ["cs"], "images", [], "manual", "content", "content-images",
+            image_optimization=ImageOptimizationConfig(max_width=10),
+        ),
+    )
+    vault_index = VaultIndex.from_vault(vault)
+    name_map = create_file_name_to_path_dictionary(vault)
+    images = site / "images" / "regular"
+
+    manifest = Manifest("settings")
+    export_notes(config, vault_index, name_map, manifest)
+    note = (site / "content" / "cs" / "a.md").read_text()
+    assert "regular/broken.png)" in note
+    assert "regular/photo.webp)" in note
+    assert "regular/ok.png.webp)" in note
+    assert sorted(os.listdir(images)) == ["broken.png", "ok.png.webp", "photo.webp"]
+    assert (images / "broken.png").read_bytes() == b"not an image"
+    with Image.open(images / "photo.webp") as optimized:
+        assert optimized.size == (10, 10)
+
+    # the image is optimized again on the next run, and linked by its WebP name
+    make_image(broken, (30, 30))
+    next_manifest = Manifest("settings")
+    conversion = export_notes(config, vault_index, name_map, next_manifest, manifest)
+    assert sorted(conversion.written) == ["A"]
+    assert "regular/broken.png.webp)" in (site / "content" / "cs" / "a.md").read_text()
+    assert sorted(os.listdir(images)) == ["broken.png.webp", "ok.png.webp", "photo.webp"]
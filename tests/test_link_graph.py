@@ -0,0 +1,94 @@
+"""Unit tests for the link graph."""
+
+import logging
+
+from obsidian_se_hugo.file_util import create_file_name_to_path_dictionary
+from obsidian_se_hugo.graph_util import get_note_dependencies
+from obsidian_se_hugo.link_graph import LinkGraph
+from obsidian_se_hugo.manifest import file_states
+from obsidian_se_hugo.vault_index import VaultIndex
+
+
+def test_graph_answers_both_directions(tmp_path, make_note):
+    a = make_note("A.md", "[[B]] [[B#Header|b]] [[#Local]] [[A]] ![[x.png]] [[Missing]]")
+    b = make_note("B.md", "[[c]] [[C]]")
+    c = make_note("sub/C.md", "[[Missing]]")
+    orphan = make_note("Orphan.md", "no links")
+    vault = tmp_path / "vault"
+    file_name_to_path_dict = create_file_name_to_path_dictionary(vault)
+    vault_index = VaultIndex.from_vault(vault)
+
+    graph = LinkGraph.from_index(vault_index, file_name_to_path_dict)
+
+    assert graph.note_count() == 4
+    assert graph.successors(str(a)) == sorted(["Missing.md", str(a), str(b), "x.png"])
+    assert graph.predecessors(str(b)) == [str(a)]
+    assert graph.dependents([str(b), str(c)]) == {str(a), str(b)}
+    assert graph.orphans() == sorted([str(a), str(orphan)])
+    assert graph.broken_links() == {"Missing.md": sorted([str(a), str(c)]), "c.md": [str(b)]}
+    for note in (a, b, c, orphan):
+        assert graph.note_dependencies(str(note)) == get_note_dependencies(
+            str(note), file_name_to_path_dict, vault_index
+        )
+
+    graph_path = tmp_path / "graph.pickle"
+    graph.save(str(graph_path))
+    loaded = LinkGraph.load(str(graph_path))
+    assert loaded.edge_count() == graph.edge_count()
+    assert loaded.predecessors("Missing.md") == graph.predecessors("Missing.md")
+    assert LinkGraph.load(str(tmp_path / "nothing")) is None
+
+
+def test_update_matches_rebuilt_graph(tmp_path, make_note):
+    a = make_note("A.md", "[[B]] [[Missing]] [[C]]")
+    b = make_note("B.md", "[[C]]")
+    make_note("sub/C.md", "no links")
+    orphan = make_note("Orphan.md", "no links")
+    vault = tmp_path / "vault"
+    file_name_to_path_dict = create_file_name_to_path_dictionary(vault)
+    vault_index = VaultIndex.from_vault(vault)
+    graph = LinkGraph.from_index(vault_index, file_name_to_path_dict)
+
+    b.unlink()
+    missing = make_note("Missing.md", "[[Orphan]]")
+    orphan.write_text("[[B]]")
+    changed = [str(b), str(missing), str(orphan)]
+    file_name_to_path_dict = create_file_name_to_path_dictionary(vault)
+    for file_path in changed:
+        vault_index.reload(file_path)
+    assert graph.update(changed, vault_index, file_name_to_path_dict) == {*changed, str(a)}
+
+    rebuilt = LinkGraph.from_index(vault_index, file_name_to_path_dict)
+    assert graph.note_count() == rebuilt.note_count() == 4
+    assert graph.orphans() == rebuilt.orphans() == [str(a)]
+    assert graph.broken_links() == rebuilt.broken_links() == {"B.md": [str(a), str(orphan)]}
+    for note in vault_index:
+        assert graph.successors(note.path) == rebuilt.successors(note.path)
+        assert graph.predecessors(note.path) == rebuilt.predecessors(note.path)
+
+
+def test_saved_graph_is_updated_for_changed_notes(tmp_path, make_note, caplog):
+    a = make_note("A.md", "[[B]]")
+    b = make_note("B.md", "[[A]]")
+    vault = tmp_path / "vault"
+    graph_path = str(tmp_path / "graph.pickle")
+    file_name_to_path_dict = create_file_name_to_path_dictionary(vault)
+    vault_index = VaultIndex.from_vault(vault)
+    states = file_states([a, b])
+    graph = LinkGraph.load_or_build(graph_path, states, vault_index, file_name_to_path_dict)
+    assert graph.successors(str(a)) == [str(b)]
+    graph.save(graph_path)
+
+    b.write_text("[[C]] and more")
+    c = make_note("C.md", "")
+    file_name_to_path_dict = create_file_name_to_path_dictionary(vault)
+    vault_index = VaultIndex.from_vault(vault)
+    states = file_states([a, b, c])
+    with caplog.at_level(logging.INFO):
+        updated = LinkGraph.load_or_build(graph_path, states, vault_index, file_name_to_path_dict)
+
+    assert f"loaded from {graph_path}, 2 notes changed" in caplog.text
+    assert updated.note_states == states
+    assert updated.successors(str(a)) == [str(b)]
+    assert updated.successors(str(b)) == [str(c)]
+    assert updated.orphans() == [str(a)]
@@ -0,0 +1,42 @@
+"""Unit tests for the wiki link resolver."""
+
+from obsidian_se_hugo.file_util import create_file_name_to_path_dictionary
+from obsidian_se_hugo.hugo_util import wikilink_to_markdown
+from obsidian_se_hugo.link_resolver import LinkResolver
+from obsidian_se_hugo.vault_index import VaultIndex
+
+
+def test_links_render_by_section(tmp_path, make_note):
+    make_note("Two Sum.md", "---\nhugo_section: cs/problems/arrays\n---\n")
+    make_note("Graphs.md", "---\nhugo_section: cs/algorithms\n---\n")
+    make_note("drawing.excalidraw.md", "no frontmatter")
+    vault = tmp_path / "vault"
+    resolver = LinkResolver(
+        create_file_name_to_path_dictionary(vault),
+        {"Private": "https://example.com"},
+        VaultIndex.from_vault(vault),
+    )
+
+    def render(link, section):
+        return wikilink_to_markdown(link, None, resolver, section)
+
+    assert render("Two Sum", "cs/problems/trees") == (
+        '[Two Sum]({{< relref "two-sum.md" >}})'
+    )
+    assert render("Two Sum#Approach", "cs/algorithms") == (
+        '[Two Sum#Approach]({{< relref "/cs/problems/two-sum.md/#approach" >}})'
+    )
+    assert render("Graphs", "cs/algorithms") == '[Graphs]({{< relref "graphs.md" >}})'
+    assert render("Private", "cs") == "[Private](https://example.com)"
+    assert render("drawing.excalidraw", "cs") == (
+        "[drawing.excalidraw](/images/obsidian/excalidraw/drawing.excalidraw.png)"
+    )
+    assert resolver.resolve("Two Sum") is resolver.resolve("Two Sum")
+
+    # without flattened sections problems link by their own section
+    unflattened = LinkResolver(
+        create_file_name_to_path_dictionary(vault), {}, VaultIndex.from_vault(vault), flattened_sections=()
+    )
+    assert wikilink_to_markdown("Two Sum", None, unflattened, "cs/problems/trees") == (
+        '[Two Sum]({{< relref "/cs/problems/arrays/two-sum.md" >}})'
+    )
@@ -0,0 +1,102 @@
+"""Unit tests for the incremental export manifest."""
+
+from obsidian_se_hugo.manifest import (
+    Manifest,
+    hash_file_states,
+    prune_stale_outputs,
+    prune_unlisted_outputs,
+)
+
+
+def make_manifest(tmp_path, note, dep, signature):
+    output = tmp_path / "out.md"
+    output.write_text("converted")
+    manifest = Manifest("settings")
+    manifest.fingerprint(str(note), link_signature=[True, "cs", None])
+    manifest.fingerprint(str(dep), link_signature=signature)
+    manifest.add_note(str(note), str(output), [str(dep)])
+    return manifest
+
+
+def test_roundtrip_and_unchanged_note(tmp_path):
+    note = tmp_path / "A.md"
+    dep = tmp_path / "B.md"
+    note.write_text("a")
+    dep.write_text("b")
+    make_manifest(tmp_path, note, dep, [True, "cs", None]).save(str(tmp_path / "m.json"))
+
+    previous = Manifest.load(str(tmp_path / "m.json"))
+    current = make_manifest(tmp_path, note, dep, [True, "cs", None])
+
+    assert not current.note_needs_conversion(str(note), previous)
+
+
+def test_changed_source_or_link_target_triggers_conversion(tmp_path):
+    note = tmp_path / "A.md"
+    dep = tmp_path / "B.md"
+    note.write_text("a")
+    dep.write_text("b")
+    previous = make_manifest(tmp_path, note, dep, [True, "cs", None])
+
+    moved_dep = make_manifest(tmp_path, note, dep, [True, "cs/problems", None])
+    assert moved_dep.note_needs_conversion(str(note), previous)
+
+    note.write_text("edited")
+    edited = make_manifest(tmp_path, note, dep, [True, "cs", None])
+    assert edited.note_needs_conversion(str(note), previous)
+
+
+def test_invalidated_source_is_hashed_again(tmp_path):
+    note = tmp_path / "A.md"
+    dep = tmp_path / "B.md"
+    note.write_text("a")
+    dep.write_text("b")
+    previous = make_manifest(tmp_path, note, dep, [True, "cs", None])
+    previous.invalidate(str(note))
+
+    current = Manifest("settings")
+    assert current.fingerprint(str(note), previous)["sha256"] is not None
+
+
+def test_nothing_changed(tmp_path):
+    note = tmp_path / "A.md"
+    dep = tmp_path / "B.md"
+    note.write_text("a")
+    dep.write_text("b")
+    previous = make_manifest(tmp_path, note, dep, [True, "cs", None])
+    previous.inputs = hash_file_states([str(note), str(dep)])
+    current = Manifest("settings")
+
+    current.inputs = hash_file_states([str(note), str(dep)])
+    assert current.nothing_changed(previous)
+    assert not Manifest("other settings").nothing_changed(previous)
+
+    dep.write_text("changed")
+    current.inputs = hash_file_states([str(note), str(dep)])
+    assert not current.nothing_changed(previous)
+
+    previous.inputs = current.inputs
+    (tmp_path / "out.md").unlink()
+    assert not current.nothing_changed(previous)
+
+
+def test_prune_stale_outputs(tmp_path):
+    stale = tmp_path / "stale.md"
+    stale.write_text("old")
+    previous = Manifest("settings")
+    previous.manual = [str(stale)]
+
+    assert prune_stale_outputs(previous, Manifest("settings")) == [str(stale)]
+    assert not stale.exists()
+
+
+def test_prune_unlisted_outputs(tmp_path):
+    kept = tmp_path / "kept.md"
+    unlisted = tmp_path / "unlisted.md"
+    kept.write_text("new")
+    unlisted.write_text("old")
+    current = Manifest("settings")
+    current.manual = [str(tmp_path / "." / "kept.md")]
+
+    assert prune_unlisted_outputs({str(kept), str(unlisted)}, current) == [str(unlisted)]
+    assert kept.exists() and not unlisted.exists()
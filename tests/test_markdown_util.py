@@ -0,0 +1,46 @@
+"""Unit tests for the markdown helpers."""
+
+import pytest
+
+from obsidian_se_hugo.markdown_util import (
+    extract_wiki_links,
+    extract_wiki_links_from_lines,
+    find_code_regions,
+)
+
+DOCUMENT = """[[A]] text `[[B]]` more
+```python
+x = "[[C]]"  # a lone ` backtick
+```
+[[D|alias]] `code` [[E]]
+"""
+
+
+def test_code_regions_are_sorted_and_disjoint():
+    regions = find_code_regions(DOCUMENT)
+
+    spans = [DOCUMENT[s:e] for s, e in zip(regions.starts, regions.ends)]
+    assert spans == ["`[[B]]`", '```python\nx = "[[C]]"  # a lone ` backtick\n```', "`code`"]
+    assert regions.overlaps(DOCUMENT.index("[[B]]"), DOCUMENT.index("[[B]]") + 5)
+    assert not regions.overlaps(0, 5)
+    assert not regions.overlaps(DOCUMENT.index("[[E]]"), len(DOCUMENT))
+
+
+def test_extract_wiki_links_skips_code():
+    links = extract_wiki_links(DOCUMENT)
+
+    assert [(link.link, link.alias) for link in links] == [
+        ("A", None),
+        ("D", "alias"),
+        ("E", None),
+    ]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 10, 1000])
+def test_wiki_links_from_lines_match_whole_text(chunk_size):
+    # the fence opened inside inline code still pairs with the one on the last line
+    document = DOCUMENT + "``[[F]]````\n[[G]]\n```\n[[H]]\n"
+    lines = document.splitlines(keepends=True)
+
+    assert extract_wiki_links_from_lines(lines, chunk_size) == extract_wiki_links(document)
+    assert [link.link for link in extract_wiki_links(document)] == ["A", "D", "E", "F", "H"]
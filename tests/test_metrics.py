@@ -0,0 +1,21 @@
+"""Unit tests for the run metrics."""
+
+import json
+
+from obsidian_se_hugo.metrics import FILES_READ, RunMetrics
+
+
+def test_report_accumulates_stages_and_counters(tmp_path):
+    metrics = RunMetrics()
+    for _ in range(2):
+        with metrics.stage("conversion"):
+            metrics.count(FILES_READ)
+    metrics.merge_counters({FILES_READ: 3})
+    metrics.note_seconds.update({"fast": 0.1, "slow": 2.0})
+
+    metrics.save_report(str(tmp_path / "report.json"), slowest=1)
+    report = json.loads((tmp_path / "report.json").read_text())
+
+    assert list(report["stages"]) == ["conversion"]
+    assert report["counters"] == {FILES_READ: 5}
+    assert report["slowest_notes"] == [{"note": "slow", "seconds": 2.0}]
@@ -0,0 +1,44 @@
+"""Unit tests for the output writer."""
+
+import os
+
+from obsidian_se_hugo.output_writer import OutputWriter, atomic_text_output, write_if_changed
+
+
+def test_identical_output_is_not_rewritten(tmp_path):
+    output = tmp_path / "a.md"
+    assert write_if_changed(str(output), b"converted")
+    os.utime(output, ns=(0, 0))
+
+    assert not write_if_changed(str(output), b"converted")
+    assert os.stat(output).st_mtime_ns == 0
+    assert write_if_changed(str(output), b"changed!!")
+    assert output.read_bytes() == b"changed!!"
+    assert os.listdir(tmp_path) == ["a.md"]
+
+
+def test_streamed_output_is_replaced_atomically(tmp_path):
+    output = tmp_path / "a.md"
+    output.write_text("old")
+    try:
+        with atomic_text_output(str(output)) as f:
+            f.write("half written")
+            raise RuntimeError("conversion failed")
+    except RuntimeError:
+        pass
+    assert output.read_text() == "old"
+
+    with atomic_text_output(str(output)) as f:
+        f.write("new")
+    assert output.read_text() == "new"
+    assert os.listdir(tmp_path) == ["a.md"]
+
+
+def test_writer_collects_errors(tmp_path):
+    with OutputWriter(max_pending=1) as writer:
+        for i in range(5):
+            writer.write(str(tmp_path / f"{i}.md"), f"note {i}")
+        writer.write(str(tmp_path / "missing" / "x.md"), "no directory")
+
+    assert list(writer.errors) == [str(tmp_path / "missing" / "x.md")]
+    assert (tmp_path / "4.md").read_text() == "note 4"
@@ -0,0 +1,39 @@
+"""Unit tests for the persistent parse cache."""
+
+import os
+
+from obsidian_se_hugo import parse_cache as parse_cache_module
+from obsidian_se_hugo.parse_cache import ParseCache
+from obsidian_se_hugo.vault_index import VaultIndex
+
+
+def test_unchanged_notes_come_from_the_cache(tmp_path, make_note):
+    note = make_note("A.md", "---\npublished: true\nhugo_section: cs\n---\n[[B]]")
+    cache_path = str(tmp_path / "cache" / "notes.sqlite3")
+    VaultIndex.from_files([str(note)], ParseCache(cache_path)).parse_cache.close()
+
+    cache = ParseCache(cache_path)
+    index = VaultIndex.from_files([str(note)], cache)
+    assert (cache.hits, cache.misses) == (1, 0)
+    assert index.get_hugo_section(note) == "cs"
+    assert [link.link for link in index.get(note).wiki_links] == ["B"]
+    cache.close()
+
+    note.write_text("---\npublished: true\nhugo_section: maths\n---\n")
+    os.utime(note, ns=(1, 1))
+    cache = ParseCache(cache_path)
+    assert VaultIndex.from_files([str(note)], cache).get_hugo_section(note) == "maths"
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.close()
+
+
+def test_parser_change_discards_the_cache(tmp_path, make_note, monkeypatch):
+    note = make_note("A.md", "---\nhugo_section: cs\n---\n")
+    cache_path = str(tmp_path / "notes.sqlite3")
+    VaultIndex.from_files([str(note)], ParseCache(cache_path)).parse_cache.close()
+
+    monkeypatch.setattr(parse_cache_module, "parser_stamp", lambda: "another parser")
+    cache = ParseCache(cache_path)
+    VaultIndex.from_files([str(note)], cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.close()
@@ -0,0 +1,44 @@
+"""Unit tests for the related problems catalog."""
+
+import pytest
+
+from obsidian_se_hugo.file_util import create_file_name_to_path_dictionary
+from obsidian_se_hugo.link_resolver import LinkResolver
+from obsidian_se_hugo.problem_catalog import ProblemCatalog, UnresolvedProblemsError
+from obsidian_se_hugo.vault_index import VaultIndex
+
+
+def make_catalog(tmp_path, make_note):
+    make_note("Two Sum.md", "---\npublished: true\nhugo_section: cs/problems/arrays\n---\n")
+    make_note("Graphs.md", "---\npublished: true\nhugo_section: cs/algorithms\n---\n")
+    make_note("Draft.md", "---\nhugo_section: cs/problems/arrays\n---\n")
+    make_note("Ext.md", "---\npublished: true\nalternate_link: https://example.com\n---\n")
+    vault = tmp_path / "vault"
+    resolver = LinkResolver(
+        create_file_name_to_path_dictionary(vault), {}, VaultIndex.from_vault(vault)
+    )
+    return ProblemCatalog.from_index(resolver)
+
+
+def test_related_problems_resolve_to_urls(tmp_path, make_note):
+    catalog = make_catalog(tmp_path, make_note)
+
+    assert catalog.related_problem_urls(["[[Two Sum]]", "[[Graphs|graphs]]", "Two Sum"], "a.md") == [
+        "/cs/problems/two-sum",
+        "/cs/algorithms/graphs",
+        "/cs/problems/two-sum",
+    ]
+    assert catalog.get("Two Sum.md") is catalog.get("Two Sum.md")
+    assert catalog.get("Missing.md") is None
+
+
+def test_unresolved_related_problems_are_reported_together(tmp_path, make_note):
+    catalog = make_catalog(tmp_path, make_note)
+
+    with pytest.raises(UnresolvedProblemsError) as error:
+        catalog.related_problem_urls(["[[Missing]]", "[[Two Sum]]", "[[Draft]]", "[[Ext]]"], "a.md")
+    assert error.value.errors == [
+        "Related problem 'Missing.md' not found for 'a.md'",
+        "Related problem 'Draft.md' not published for 'a.md'",
+        "Related problem 'Ext.md' for 'a.md' doesn't have a Hugo section",
+    ]
@@ -0,0 +1,74 @@
+"""Unit tests for staged exports."""
+
+import os
+
+from obsidian_se_hugo.config import Config, HugoConfig, ObsidianConfig
+from obsidian_se_hugo.file_util import link_or_copy_file
+from obsidian_se_hugo.manifest import Manifest
+from obsidian_se_hugo.publish import (
+    discard_staging,
+    output_directories,
+    prepare_staging,
+    publish_staging,
+    staged_config,
+)
+
+
+def make_config(site):
+    return Config(
+        ObsidianConfig("vault"),
+        HugoConfig(str(site), "", ["cs"], "static/images", [], "manual", "content", "content/images"),
+    )
+
+
+def test_staged_export_is_published_by_swapping_directories(tmp_path):
+    site = tmp_path / "site"
+    (site / "content" / "cs").mkdir(parents=True)
+    (site / "content" / "cs" / "a.md").write_text("old a")
+    (site / "content" / "cs" / "b.md").write_text("b")
+    config = make_config(site)
+    directories = output_directories(config)
+    assert directories == [str(site / "content"), str(site / "static" / "images")]
+
+    staged = prepare_staging(directories)
+    staging_content = staged[str(site / "content")]
+    assert os.path.samefile(staging_content + "/cs/b.md", site / "content" / "cs" / "b.md")
+    output_config = staged_config(config, staged)
+    assert os.path.join(site, output_config.hugo.content_images_dir) == staging_content + "/images"
+    assert output_config.hugo.root_path == config.hugo.root_path
+
+    new_a = tmp_path / "a.md"
+    new_a.write_text("new a")
+    link_or_copy_file(str(new_a), staging_content + "/cs/a.md")
+    os.remove(staging_content + "/cs/b.md")
+    # the live site is unchanged until it is published
+    assert (site / "content" / "cs" / "a.md").read_text() == "old a"
+    assert (site / "content" / "cs" / "b.md").exists()
+
+    publish_staging(staged)
+    assert (site / "content" / "cs" / "a.md").read_text() == "new a"
+    assert not (site / "content" / "cs" / "b.md").exists()
+    assert (site / "static" / "images").is_dir()
+    assert sorted(os.listdir(site)) == ["content", "static"]
+
+
+def test_discarded_staging_leaves_site_alone(tmp_path):
+    site = tmp_path / "site"
+    (site / "content").mkdir(parents=True)
+    (site / "content" / "a.md").write_text("a")
+    staged = prepare_staging(output_directories(make_config(site)))
+
+    discard_staging(staged)
+    assert os.listdir(site / "static") == []
+    assert sorted(os.listdir(site)) == ["content", "static"]
+    assert (site / "content" / "a.md").read_text() == "a"
+
+
+def test_relocate_manifest_outputs(tmp_path):
+    manifest = Manifest("settings")
+    manifest.add_note("a.md", "site/content/cs/a.md", [])
+    manifest.manual = ["site/content/about.md", "site/contents.md"]
+
+    manifest.relocate({"site/content": "site/.content.staging"})
+    assert manifest.notes["a.md"]["output"] == "site/.content.staging/cs/a.md"
+    assert manifest.manual == ["site/.content.staging/about.md", "site/contents.md"]
@@ -0,0 +1,104 @@
+"""Unit tests for the vault index."""
+
+import io
+import tracemalloc
+
+import frontmatter
+import pytest
+
+from obsidian_se_hugo.vault_index import (
+    STREAMING_THRESHOLD_BYTES,
+    VaultIndex,
+    parse_note,
+    parse_note_lines,
+    parse_note_text,
+)
+
+
+def write_note(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "---\ntitle: A\npublished: true\n---\n\n  Body [[B]]\n\n",
+        "\n---\ntitle: A\n---\nBody\n---\nmore\n",
+        "No frontmatter [[B|alias]]\n",
+        "---\ntitle: only a header\n---\n",
+        "---\nbroken header without end\n",
+    ],
+)
+def test_load_post_matches_frontmatter(tmp_path, text):
+    note = write_note(tmp_path / "A.md", text)
+    expected = frontmatter.load(note)
+
+    post = VaultIndex().load_post(note)
+
+    assert post.content == expected.content
+    assert post.metadata == expected.metadata
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        " \n\n",
+        "---\ntitle: A\npublished: true\n---\n\n  Body [[B]]\n\n",
+        "\n  ---\nrelated: '[[C]]'\n---  \n\n---\n",
+        "---\n\n\ntitle: A\n-----\nBody",
+        "--- x\ntitle: A\n---\n[[B]]",
+        "---\nbroken header without end [[B]]\n",
+        "---\ntitle: only a header\n---",
+        "```\n[[in code]]\n```\n[[B]] `[[inline]]` ``[[C]]````\n```[[code]]```\n",
+    ],
+)
+def test_note_lines_parse_like_note_text(text):
+    expected = parse_note_text("A.md", text)
+
+    assert parse_note_lines("A.md", io.StringIO(text, newline="")) == expected
+
+
+def test_large_note_is_never_read_whole(tmp_path):
+    lines = ["---\ntitle: Large\npublished: true\n---\n"]
+    for i in range(0, STREAMING_THRESHOLD_BYTES // 24):
+        if i % 5000 == 0:
+            lines.append(f"```\n[[Code {i}]]\n```\n[[Note {i}]]\n")
+        lines.append("Some long text of a large note, with no links in it at all\n")
+    note = write_note(tmp_path / "Large.md", "".join(lines))
+    size = note.stat().st_size
+    assert size > 2 * STREAMING_THRESHOLD_BYTES
+
+    tracemalloc.start()
+    try:
+        record = parse_note(str(note))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak < size / 4
+    assert record == parse_note_text(str(note), note.read_text(encoding="utf-8"))
+    assert record.wiki_links[-1].link == "Note 40000"
+
+
+def test_index_parses_each_note_once(tmp_path):
+    write_note(tmp_path / "A.md", "---\npublished: true\nhugo_section: cs\n---\n[[B]]")
+    write_note(
+        tmp_path / "sub" / "B.md", "---\nalternate_link: https://example.com\n---\n"
+    )
+    index = VaultIndex.from_vault(tmp_path)
+
+    assert index.explicit_publish_list() == [str(tmp_path / "A.md")]
+    assert index.alternate_link_dict() == {"B": "https://example.com"}
+    assert index.get_hugo_section(tmp_path / "A.md") == "cs"
+    assert index.get_hugo_section(tmp_path / "sub" / "B.md") is None
+    assert [link.link for link in index.get(tmp_path / "A.md").wiki_links] == ["B"]
+
+
+def test_missing_hugo_section_raises(tmp_path):
+    note = write_note(tmp_path / "A.md", "---\ntitle: A\n---\n")
+
+    with pytest.raises(ValueError, match="hugo_section not found"):
+        VaultIndex().get_hugo_section(note)
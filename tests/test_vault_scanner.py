@@ -0,0 +1,27 @@
+"""Unit tests for the vault scanner."""
+
+from obsidian_se_hugo.vault_scanner import is_ignored, scan_vault
+
+
+def test_scan_skips_ignored_and_reports_duplicates(tmp_path, make_note):
+    a = make_note("A.md", "a")
+    b = make_note("algos/B.md", "b")
+    duplicate = make_note("problems/B.md", "b")
+    image = make_note("algos/img.png", "png")
+    make_note(".obsidian/workspace.md", "state")
+    make_note("templates/T.md", "template")
+
+    scan = scan_vault(tmp_path / "vault", [".obsidian", "templates/*"], jobs=2)
+
+    assert scan.markdown_files == [str(a), str(b), str(duplicate)]
+    assert scan.file_name_to_path_dict == {
+        "A.md": str(a),
+        "B.md": str(b),
+        "img.png": str(image),
+    }
+    assert scan.duplicates == {"B.md": [str(b), str(duplicate)]}
+
+
+def test_files_in_ignored_directories_are_ignored():
+    assert is_ignored(".obsidian/plugins/x/data.json", [".obsidian"])
+    assert not is_ignored("notes/obsidian.md", [".obsidian"])
@@ -0,0 +1,85 @@
+"""Unit tests for the watch mode."""
+
+import time
+
+from obsidian_se_hugo.config import Config, HugoConfig, ObsidianConfig
+from obsidian_se_hugo.exporter import export_notes
+from obsidian_se_hugo.file_util import create_file_name_to_path_dictionary
+from obsidian_se_hugo.manifest import Manifest, file_states, hash_file_states
+from obsidian_se_hugo.vault_index import VaultIndex
+from obsidian_se_hugo.vault_scanner import scan_vault
+from obsidian_se_hugo.watch import WatchSession
+
+
+def make_config(tmp_path):
+    site = tmp_path / "site"
+    for section in ("cs", "maths"):
+        (site / "content" / section).mkdir(parents=True)
+    return Config(
+        ObsidianConfig(str(tmp_path / "vault")),
+        HugoConfig(str(site), "", ["cs", "maths"], "images", [], "manual", "content", "images"),
+    )
+
+
+def test_change_reconverts_note_and_dependents(tmp_path, make_note):
+    make_note("A.md", "---\ntitle: A\npublished: true\nhugo_section: cs\n---\n[[B]]")
+    note_b = make_note("B.md", "---\ntitle: B\npublished: true\nhugo_section: cs\n---\nB")
+    make_note("C.md", "---\ntitle: C\npublished: true\nhugo_section: cs\n---\nC")
+    vault = tmp_path / "vault"
+    site = tmp_path / "site"
+    config = make_config(tmp_path)
+    vault_index = VaultIndex.from_vault(vault)
+    name_map = create_file_name_to_path_dictionary(vault)
+    manifest = Manifest("settings")
+    export_notes(config, vault_index, name_map, manifest)
+    session = WatchSession(
+        config, vault, vault_index, name_map, manifest, str(tmp_path / "manifest.json")
+    )
+
+    note_b.write_text("---\ntitle: B\npublished: true\nhugo_section: maths\n---\nB")
+    conversion = session.apply_changes({str(note_b)})
+
+    assert sorted(conversion.written) == ["A", "B"]
+    assert 'relref "/maths/b.md"' in (site / "content" / "cs" / "a.md").read_text()
+    assert not (site / "content" / "cs" / "b.md").exists()
+
+
+def test_change_in_large_vault_is_exported_quickly(tmp_path, make_note):
+    for i in range(1000):
+        make_note(
+            f"notes/{i % 10}/Note {i}.md",
+            f"---\ntitle: Note {i}\npublished: true\nhugo_section: cs\n---\n"
+            f"[[Note {(i + 1) % 1000}]] [[Note {i * 7 % 1000}#Top]] ![[x.png]]",
+        )
+    make_note("x.png", "png")
+    vault = tmp_path / "vault"
+    config = make_config(tmp_path)
+    vault_scan = scan_vault(vault)
+    vault_index = VaultIndex.from_files(vault_scan.markdown_files)
+    manifest = Manifest("settings")
+    export_notes(config, vault_index, vault_scan.file_name_to_path_dict, manifest)
+    session = WatchSession(
+        config,
+        vault,
+        vault_index,
+        vault_scan.file_name_to_path_dict,
+        manifest,
+        str(tmp_path / "manifest.json"),
+        input_states=file_states(vault_scan.files),
+    )
+
+    note = vault / "notes" / "5" / "Note 5.md"
+    note.write_text(
+        "---\ntitle: Five\npublished: true\nhugo_section: cs\n---\n[[Note 6]] [[Note 999]]"
+    )
+    started = time.perf_counter()
+    conversion = session.apply_changes({str(note)})
+    assert time.perf_counter() - started < 1
+
+    assert sorted(conversion.written) == ["Note 5"]
+    assert session.link_graph.successors(str(note)) == sorted(
+        [str(vault / "notes" / "6" / "Note 6.md"), str(vault / "notes" / "9" / "Note 999.md")]
+    )
+    # an incremental run after the session has nothing to do
+    saved = Manifest.load(str(tmp_path / "manifest.json"))
+    assert saved.inputs == hash_file_states(scan_vault(vault).files)